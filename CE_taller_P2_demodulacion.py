@@ -1,29 +1,16 @@
 import numpy as np
-import sounddevice as sd
-import matplotlib
-matplotlib.use('Agg')  # Usar backend no interactivo para evitar errores en hilos
-import matplotlib.pyplot as plt
-from scipy.signal import butter, filtfilt
+from audio_backend import sd
 from scipy.io.wavfile import write
 import time
+import sys
 import os
-
-#filtro Paso bajo.
-def butter_lowpass(cutoff, fs, order=6):
-    nyq = fs / 2
-    b, a = butter(order, cutoff / nyq, btype='low')
-    return b, a
-
-def detectar_tono(bloque, tono, fs, margen=30, umbral=10):
-    N = len(bloque)
-    f = np.fft.rfftfreq(N, 1/fs)
-    S = np.abs(np.fft.rfft(bloque * np.hanning(N)))
-    idx = np.where((f >= tono - margen) & (f <= tono + margen))[0]
-    if len(idx) == 0:
-        return False, f, S
-    energia_tono = np.max(S[idx])
-    energia_promedio = np.mean(S)
-    return energia_tono > energia_promedio * umbral, f, S
+from render_pool import PoolGraficas
+import captura_iq
+from medidor_nivel import MedidorNivel
+from dsp_core import ReceptorTramas, demodular_coherente
+from tiempos_callback import InstrumentoCallback, anotar
+import traza
+import metricas
 
 def siguiente_nombre():
     base = "grabacion_"
@@ -32,7 +19,7 @@ def siguiente_nombre():
         i += 1
     return f"{base}{i:03d}.wav"
 
-def main():
+def main(modo_iq=False, guardar_pasabanda=False):
     #frecuencia de muestreo.
     fs = 44100
     #Frecuencia de portadora.
@@ -45,96 +32,211 @@ def main():
     sd.default.samplerate = fs
     sd.default.channels = 1
 
-    print("🔁 Sistema activo. Esperando tono de 4000 Hz...")
-
-    while True:
-        print("🕑 Esperando 0.5 segundos antes de iniciar...")
-        time.sleep(0.5)
-
-        mensaje = []
-        inicio_detectado = False
-        espectro_guardado = False
-        print("🎧 Escuchando en tiempo real...")
-
-        def callback_inicial(indata, frames, time_info, status):
-            nonlocal inicio_detectado, espectro_guardado, mensaje
-            bloque = indata[:, 0]
-            detectado, f, S = detectar_tono(bloque, 7000, fs, margen=30, umbral=umbral_inicio)
-            if detectado and not inicio_detectado:
-                inicio_detectado = True
-                mensaje.append(bloque.copy())
-                print("✅ Tono de inicio detectado.")
-                if not espectro_guardado:
-                    nombre_png = siguiente_nombre().replace('.wav', '_espectro.png')
-                    plt.figure()
-                    plt.plot(f, S)
-                    plt.title("Espectro al detectar el tono de inicio (8000 Hz)")
-                    plt.xlabel("Frecuencia [Hz]")
-                    plt.ylabel("Magnitud")
-                    plt.grid()
-                    plt.savefig(nombre_png)
-                    plt.close()
-                    espectro_guardado = True
-                    print(f"🖼️ Espectro guardado como '{nombre_png}'")
-            elif inicio_detectado:
-                mensaje.append(bloque.copy())
-
-        with sd.InputStream(callback=callback_inicial, blocksize=blocksize):
-            while not inicio_detectado:
-                time.sleep(0.05)
-
-            if not inicio_detectado:
+    # Las gráficas se renderizan en otros procesos; el bucle no las espera
+    graficas = PoolGraficas(procesos=2)
+
+    print("🔁 Sistema activo. Esperando tono de 7000 Hz...")
+
+    try:
+        _bucle_receptor(fs, fc, blocksize, dur_max_mensaje, umbral_inicio, umbral_fin, graficas, modo_iq,
+                        guardar_pasabanda)
+    finally:
+        print(f"⏳ Esperando {graficas.pendientes()} gráficas pendientes...")
+        graficas.cerrar()
+
+def _enviar_espectro(graficas, espectro):
+    nombre_png = siguiente_nombre().replace('.wav', '_espectro.png')
+    f, S = espectro
+    graficas.graficar_linea(nombre_png, S, x=f,
+                            titulo="Espectro al detectar el tono de inicio (7000 Hz)",
+                            xlabel="Frecuencia [Hz]", ylabel="Magnitud")
+    print(f"🖼️ Espectro enviado a '{nombre_png}' (cola: {graficas.pendientes()})")
+
+def _registrar_metricas(instrumento, medidor, graficas, actual):
+    # Lo que ya llevan el instrumento, el medidor y la cola de gráficas se
+    # lee al exportar; el resto lo suman el bucle y _procesar_trama
+    m = metricas.REGISTRO
+    m.describir("receptor_tramas_total", "counter", "Tramas recibidas, por cómo terminaron (fin o limite)")
+    m.describir("receptor_esperas_sin_tono_total", "counter", "Escuchas que terminaron sin tono de inicio")
+    m.describir("receptor_deteccion_latencia_segundos", "histogram",
+                "Desde que llega el bloque hasta decidir cada tono (inicio o fin); "
+                "no incluye el bloque de 0.1 s que hay que esperar",
+                bordes=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1))
+    m.describir("receptor_fin_a_audio_segundos", "histogram",
+                "Del tono de fin al .wav escrito (antes de reproducirlo)")
+    m.describir("receptor_disco_bytes_total", "counter", "Bytes escritos a disco, por tipo de archivo")
+    m.describir("receptor_callbacks_total", "counter", "Callbacks de audio atendidos")
+    m.describir("receptor_callbacks_excedidos_total", "counter", "Callbacks que tardaron más que su bloque")
+    m.describir("receptor_xruns_total", "counter", "Overflows de entrada y underflows de salida")
+    m.describir("receptor_callback_p99_segundos", "gauge", "Percentil 99 de la duración del callback")
+    m.describir("receptor_cola_graficas", "gauge", "Gráficas esperando en el pool de render")
+    m.describir("receptor_bloques_en_memoria", "gauge", "Bloques de la trama en curso")
+    m.describir("receptor_capturando", "gauge", "1 mientras se graba un mensaje")
+    m.describir("receptor_nivel_dbfs", "gauge", "Nivel RMS de entrada (última lectura)")
+    m.describir("receptor_snr_banda_db", "gauge", "SNR en la banda del mensaje (última lectura)")
+    m.describir("receptor_ultima_trama_timestamp_segundos", "gauge", "Época de la última trama recibida")
+
+    def leer():
+        r = instrumento.resumen()
+        muestras = [
+            ("receptor_callbacks_total", r["llamadas"], {}),
+            ("receptor_callbacks_excedidos_total", r["excedidos"], {}),
+            ("receptor_xruns_total", r["overflows"], {"tipo": "overflow"}),
+            ("receptor_xruns_total", r["underflows"], {"tipo": "underflow"}),
+            ("receptor_callback_p99_segundos", r["duracion_p99_ms"] / 1e3, {}),
+            ("receptor_cola_graficas", graficas.pendientes(), {}),
+        ]
+        receptor = actual.get("receptor")
+        if receptor is not None:
+            muestras.append(("receptor_bloques_en_memoria", len(receptor.bloques), {}))
+            muestras.append(("receptor_capturando", int(receptor.estado == "capturando"), {}))
+        if medidor.ultima is not None:
+            muestras.append(("receptor_nivel_dbfs", medidor.ultima["rms_dbfs"], {}))
+            muestras.append(("receptor_snr_banda_db", medidor.ultima["snr_db"], {}))
+        return muestras
+
+    m.colector(leer)
+
+def _bucle_receptor(fs, fc, blocksize, dur_max_mensaje, umbral_inicio, umbral_fin, graficas, modo_iq,
+                    guardar_pasabanda=False):
+    # Nivel de entrada y SNR en banda a 10 Hz en niveles.csv
+    medidor = MedidorNivel(fs, fc, archivo_log="niveles.csv")
+    # Duración y jitter de cada callback, xruns; resumen cada 10 s en
+    # callbacks.log y volcado de histogramas al salir
+    instrumento = InstrumentoCallback("receptor", fs, intervalo_resumen=10,
+                                      al_resumir=lambda r: print(anotar(r)),
+                                      archivo_volcado="callbacks_receptor.json")
+    actual = {}
+    _registrar_metricas(instrumento, medidor, graficas, actual)
+    # niveles.csv se cierra al salir (Ctrl+C o error en una trama)
+    try:
+        while True:
+            print("🕑 Esperando 0.5 segundos antes de iniciar...")
+            time.sleep(0.5)
+
+            # Un solo stream: la máquina de estados de dsp_core decide qué bloques
+            # son parte del mensaje (la misma que usa benchmarks/e2e_loopback.py)
+            receptor = ReceptorTramas(fs, umbral_inicio=umbral_inicio, umbral_fin=umbral_fin,
+                                      dur_max=dur_max_mensaje)
+            actual["receptor"] = receptor
+            fin = {}
+            print("🎧 Escuchando en tiempo real...")
+
+            def callback(indata, frames, time_info, status):
+                t0 = time.perf_counter()
+                bloque = indata[:, 0]
+                evento, f, S = receptor.procesar(bloque)
+                if evento in ("inicio", "fin"):
+                    metricas.REGISTRO.observar("receptor_deteccion_latencia_segundos",
+                                               time.perf_counter() - t0, tono=evento)
+                if evento in ("fin", "limite"):
+                    fin["t"] = time.perf_counter()
+                    fin["evento"] = evento
+                if S is not None:
+                    medidor.procesar(bloque, f, S)
+                if evento == "inicio":
+                    print("✅ Tono de inicio detectado.")
+                    print("⏺️ Grabando mensaje hasta detectar tono de fin (5000 Hz)...")
+                elif evento == "fin":
+                    print("✅ Tono de fin detectado.")
+                    raise sd.CallbackStop()
+                elif evento == "limite":
+                    print(f"⌛ Mensaje cortado a {dur_max_mensaje} s sin tono de fin.")
+                    raise sd.CallbackStop()
+
+            espectro_enviado = False
+            instrumento.nuevo_stream()
+            with traza.tramo("captura"), \
+                    sd.InputStream(callback=instrumento.envolver(callback), blocksize=blocksize) as stream:
+                while not receptor.completo() and stream.active:
+                    time.sleep(0.05)
+                    if not espectro_enviado and receptor.espectro_inicio is not None:
+                        # Sólo se guardó el espectro; se dibuja fuera del callback
+                        _enviar_espectro(graficas, receptor.espectro_inicio)
+                        espectro_enviado = True
+
+            if not receptor.bloques:
+                metricas.REGISTRO.sumar("receptor_esperas_sin_tono_total")
                 print("⌛ No se detectó tono de inicio. Reiniciando...\n")
                 continue
-
-        print("⏺️ Grabando mensaje hasta detectar tono de fin (15000 Hz)...")
-
-        def callback_mensaje(indata, frames, time_info, status):
-            nonlocal mensaje
-            bloque = indata[:, 0]
-            detectado_fin, _, _ = detectar_tono(bloque, 5000, fs, margen=30, umbral=umbral_fin)
-            if not detectado_fin:
-                mensaje.append(bloque.copy())
-            else:
-                print("✅ Tono de fin detectado.")
-                raise sd.CallbackStop()
-
-        with sd.InputStream(callback=callback_mensaje, blocksize=blocksize):
-            try:
-                sd.sleep(int(dur_max_mensaje * 1000))
-            except sd.CallbackStop:
-                pass
-
-        #Demodulacion coherente.
-        mensaje = np.concatenate(mensaje)
-        t = np.arange(len(mensaje)) / fs
-        phi = 0 # Error de fase.
-        deltaf = 0 # Error de frecuencia.
-        portadora = np.cos(2 * np.pi * (fc + deltaf) * t + phi)
-        baseband = mensaje * portadora
-        b, a = butter_lowpass(4000, fs)
-        audio = filtfilt(b, a, baseband)
-        audio /= np.max(np.abs(audio))
-
-        plt.figure()
-        plt.plot(t, audio)
-        plt.title("Mensaje demodulado (dominio del tiempo)")
-        plt.xlabel("Tiempo [s]")
-        plt.ylabel("Amplitud")
-        plt.grid()
-        nombre_senal = siguiente_nombre().replace('.wav', '_tiempo.png')
-        plt.savefig(nombre_senal)
-        plt.close()
-        print(f"🖼️ Señal en el tiempo guardada como '{nombre_senal}'")
-
-        output_file = nombre_senal.replace('_tiempo.png', '.wav')
-        print(f"🔊 Reproduciendo mensaje demodulado...")
-        sd.play(audio, fs)
+            metricas.REGISTRO.sumar("receptor_tramas_total", resultado=fin.get("evento", "cortada"))
+            metricas.REGISTRO.fijar("receptor_ultima_trama_timestamp_segundos", time.time())
+            if not espectro_enviado:
+                _enviar_espectro(graficas, receptor.espectro_inicio)
+
+            # --perfil: cProfile de la primera trama (demodulación, escritura,
+            # gráficas y reproducción; la captura corre en el hilo de audio)
+            with traza.perfil_trama():
+                _procesar_trama(receptor, fs, fc, graficas, modo_iq, guardar_pasabanda, fin.get("t"))
+            if medidor.ultima is not None:
+                print(f"🎚️ Último nivel: {medidor.ultima['rms_dbfs']:.1f} dBFS, "
+                      f"SNR en banda {medidor.ultima['snr_db']:.1f} dB")
+
+            print("🔁 Reiniciando escucha...\n")
+    finally:
+        medidor.cerrar()
+
+def _contar_disco(ruta, tipo):
+    try:
+        metricas.REGISTRO.sumar("receptor_disco_bytes_total", os.path.getsize(ruta), tipo=tipo)
+    except OSError:
+        pass
+
+def _procesar_trama(receptor, fs, fc, graficas, modo_iq, guardar_pasabanda, t_fin=None):
+    #Demodulacion coherente.
+    with traza.tramo("mensaje", bloques=len(receptor.bloques)):
+        mensaje = receptor.mensaje()
+    if guardar_pasabanda:
+        # Trama cruda para re-demodular offline (ver redemodular.py)
+        nombre_pb = siguiente_nombre().replace('.wav', '_pasabanda.wav')
+        with traza.tramo("write_pasabanda", mensaje=mensaje):
+            write(nombre_pb, fs, mensaje.astype(np.float32))
+        _contar_disco(nombre_pb, "pasabanda")
+        print(f"💾 Pasabanda guardada como '{nombre_pb}'")
+    phi = 0 # Error de fase.
+    deltaf = 0 # Error de frecuencia.
+    if modo_iq:
+        # Se guarda IQ decimado (complex64) y se demodula a la tasa reducida
+        with traza.tramo("mezclar_a_banda_base", mensaje=mensaje):
+            iq, fs_audio = captura_iq.mezclar_a_banda_base(mensaje, fs, fc)
+        nombre_iq = siguiente_nombre().replace('.wav', '_iq.npz')
+        with traza.tramo("guardar_iq", iq=iq):
+            captura_iq.guardar_iq(nombre_iq, iq, fs_audio, fs, fc)
+        _contar_disco(nombre_iq, "iq")
+        print(f"💾 IQ guardado como '{nombre_iq}' ({iq.nbytes / 1e3:.0f} kB, fs={fs_audio:.0f} Hz)")
+        with traza.tramo("demodular_iq", iq=iq):
+            audio = captura_iq.demodular_iq(iq, fs_audio, phi=phi, deltaf=deltaf)
+    else:
+        fs_audio = fs
+        with traza.tramo("demodular_coherente", mensaje=mensaje):
+            audio = demodular_coherente(mensaje, fs, fc, phi=phi, deltaf=deltaf)
+
+    nombre_senal = siguiente_nombre().replace('.wav', '_tiempo.png')
+    with traza.tramo("graficar", audio=audio):
+        graficas.graficar_linea(nombre_senal, audio, fs=fs_audio,
+                                titulo="Mensaje demodulado (dominio del tiempo)",
+                                xlabel="Tiempo [s]", ylabel="Amplitud")
+    print(f"🖼️ Señal en el tiempo enviada a '{nombre_senal}' (cola: {graficas.pendientes()})")
+
+    # Se guarda antes de reproducir: el .wav queda aunque falle la salida
+    output_file = nombre_senal.replace('_tiempo.png', '.wav')
+    with traza.tramo("write", audio=audio):
+        write(output_file, int(fs_audio), (audio * 32767).astype(np.int16))
+    if t_fin is not None:
+        metricas.REGISTRO.observar("receptor_fin_a_audio_segundos", time.perf_counter() - t_fin)
+    _contar_disco(output_file, "wav")
+    print(f"💾 Audio guardado como '{output_file}'")
+    print(f"🔊 Reproduciendo mensaje demodulado...")
+    with traza.tramo("reproducir", audio=audio):
+        sd.play(audio, int(fs_audio))
         sd.wait()
-        write(output_file, fs, (audio * 32767).astype(np.int16))
-        print(f"💾 Audio guardado como '{output_file}'\n")
-
-        print("🔁 Reiniciando escucha...\n")
+    print()
 
 if __name__ == '__main__':
-    main()
+    # --iq: guardar la captura en banda base compleja decimada
+    # --pasabanda: guardar además la trama pasabanda cruda
+    # --traza[=ruta]: trazas por etapa (Perfetto); --perfil[=ruta]: cProfile de una trama
+    # --metricas[=puerto] / --metricas-archivo[=ruta]: métricas Prometheus
+    traza.configurar(sys.argv, "receptor")
+    metricas.configurar(sys.argv, "receptor")
+    main(modo_iq='--iq' in sys.argv, guardar_pasabanda='--pasabanda' in sys.argv)
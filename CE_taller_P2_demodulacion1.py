@@ -1,5 +1,5 @@
 import numpy as np
-import sounddevice as sd
+from audio_backend import sd
 import matplotlib
 matplotlib.use('Agg')  # Usar backend no interactivo para evitar errores en hilos
 import matplotlib.pyplot as plt
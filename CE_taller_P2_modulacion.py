@@ -1,13 +1,19 @@
 import tkinter as tk
-from PIL import Image, ImageTk
-import sounddevice as sd
+from contextlib import nullcontext
+from audio_backend import sd, preparar_backend
 import numpy as np
-from scipy.io.wavfile import write, read
-from scipy.signal import hilbert
 import os
+import sys
 import threading
-import matplotlib.pyplot as plt
 import time
+import cache_modulacion
+from bus_ui import BusUI, VariableBus
+from ventanas_graficas import ProcesoGraficas
+from vigia_tk import VigiaLag
+import traza
+import arranque
+from dsp_core import (FC, DUR_TONO, TONO_INICIO, TONO_FIN, enmarcar,
+                      modulacion_ssb, modulacion_ssb_fc, modulacion_isb)
 
 # === Parámetros ===
 # === Parámetros ===
@@ -19,38 +25,59 @@ archivo_alta = 'audio_alta.wav'
 archivo_L_ISB = 'audio_baja.wav'
 archivo_R_ISB = 'audio_alta.wav'
 
-# === Parámetros de modulación ===
-FS = 44100
-FC = 10000
-DUR_TONO = 0.4
-TONO_INICIO = 7000
-TONO_FIN = 5000
+graficas = ProcesoGraficas()
+
+# === Sin interfaz ===
+# Importado (loopback, benchmarks) el estado va a la consola y no hay vigía,
+# bus ni raíz; __main__ los reemplaza por los de la ventana
+class EstadoConsola:
+    def set(self, texto):
+        print(texto)
+
+class VigiaNulo:
+    def operacion(self, nombre):
+        return nullcontext()
+
+    def envolver(self, nombre, funcion):
+        return funcion
+
+root = None
+bus = None
+vigia = VigiaNulo()
+estado_var = EstadoConsola()
+
+def refrescar_ui():
+    # Deja que la ventana muestre el estado antes de un cálculo largo
+    if bus is not None:
+        bus.vaciar()
+    if root is not None:
+        root.update()
 
 # === Funciones auxiliares ===
 def suavizar(audio, N=5):
     return np.convolve(audio, np.ones(N)/N, mode='same').astype(np.int16)
 
-def generar_tono(freq, duracion, fs):
-    t = np.arange(int(fs * duracion)) / fs
-    A = 0.7
-    return A * np.sin(2 * np.pi * freq * t)
-
 def reproducir_senal(senal, fs):
-    sd.play(senal, fs)
-    sd.wait()
+    # sd.wait() bloquea: si se llama desde el hilo de Tk queda en el vigía
+    with vigia.operacion("reproducir_senal"), traza.tramo("reproducir", senal=senal):
+        sd.play(senal, fs)
+        sd.wait()
 
 def cargar_audio(nombre_archivo):
-    fs, audio = read(nombre_archivo)
-    audio = audio.astype(np.float32)
-    if audio.ndim == 2:
-        audio = audio.mean(axis=1)
-    audio /= np.max(np.abs(audio))
+    from scipy.io.wavfile import read
+    with vigia.operacion("cargar_audio"), traza.tramo("cargar_audio", archivo=nombre_archivo):
+        fs, audio = read(nombre_archivo)
+    with traza.tramo("normalizar", audio=audio):
+        audio = audio.astype(np.float32)
+        if audio.ndim == 2:
+            audio = audio.mean(axis=1)
+        audio /= np.max(np.abs(audio))
     return fs, audio
 
 def grabar_audio(nombre_archivo):
     def grabar():
+        from scipy.io.wavfile import write
         estado_var.set(f"🎙️ Grabando en {nombre_archivo}...")
-        root.update()
         audio = sd.rec(int(duracion * fs), samplerate=fs, channels=1, dtype='float32')
         sd.wait()
         audio = audio[:, 0]  # Convertir a 1D
@@ -60,7 +87,6 @@ def grabar_audio(nombre_archivo):
         audio_int16 = (audio * 32767).astype(np.int16)  # Convertir a int16 para guardar
         write(nombre_archivo, fs, suavizar(audio_int16))  # Puedes comentar suavizar si no se desea
         estado_var.set(f"✅ Guardado: {nombre_archivo}")
-        root.update()
     threading.Thread(target=grabar).start()
 
 
@@ -68,73 +94,22 @@ def reproducir_audio(nombre_archivo):
     if not os.path.exists(nombre_archivo):
         estado_var.set(f"❌ Archivo no encontrado: {nombre_archivo}")
         return
+    from scipy.io.wavfile import read
     fs_leido, datos = read(nombre_archivo)
     reproducir_senal(datos, fs_leido)
     estado_var.set(f"✅ Reproducción: {nombre_archivo}")
 
-def graficar_senal_tiempo_frecuencia(senal, fs, titulo, usar_analitica=False, max_magnitud=100):
-    t = np.arange(len(senal)) / fs
-    plt.figure(figsize=(12, 4))
-    plt.subplot(1, 2, 1)
-    if np.iscomplexobj(senal):
-        plt.plot(t, np.real(senal), label='Real')
-        plt.plot(t, np.imag(senal), label='Imag', alpha=0.5)
-        plt.legend()
-    else:
-        plt.plot(t, senal)
-    plt.title(f'{titulo} - Tiempo')
-    plt.xlabel('Tiempo [s]')
-    plt.ylabel('Amplitud')
-    plt.grid(True)
-
-    plt.subplot(1, 2, 2)
-    if usar_analitica and not np.iscomplexobj(senal):
-        senal = hilbert(senal)
-    N = len(senal)
-    espectro = np.abs(np.fft.fft(senal))
-    freqs = np.fft.fftfreq(N, 1/fs)
-    indices = np.where((freqs >= 0) & (freqs <= 20000))
-    espectro = np.clip(espectro[indices], 0, max_magnitud)
-    freqs = freqs[indices]
-    plt.plot(freqs, espectro)
-    plt.title(f'{titulo} - Frecuencia (0–20 kHz)')
-    plt.xlabel('Frecuencia [Hz]')
-    plt.ylabel('Magnitud')
-    plt.xlim([0, 20000])
-    plt.ylim([0, max_magnitud + 10])
-    plt.grid(True)
-    plt.tight_layout()
-    plt.show()
-
-def modulacion_ssb(audio, tipo):
-    t = np.arange(len(audio)) / FS
-    carrier_cos = np.cos(2*np.pi*FC*t)
-    carrier_sin = np.sin(2*np.pi*FC*t)
-    analytic = np.imag(hilbert(audio))
-    if tipo == "USB":
-        return np.real(audio * carrier_cos - analytic * carrier_sin)
-    else:
-        return np.real(audio * carrier_cos + analytic * carrier_sin)
-
-def modulacion_ssb_fc(audio, tipo):
-    t = np.arange(len(audio)) / FS
-    carrier_cos = np.cos(2*np.pi*FC*t)
-    carrier_sin = np.sin(2*np.pi*FC*t)
-    analytic = np.imag(hilbert(audio))
-    if tipo == "USB":
-        return np.real(2 * carrier_cos + (audio * carrier_cos - analytic * carrier_sin))
-    else:
-        return np.real(2 * carrier_cos + (audio * carrier_cos + analytic * carrier_sin))
-
-def modulacion_isb(audio_L, audio_R):
-    t = np.arange(len(audio_L)) / FS
-    carrier_cos = np.cos(2*np.pi*FC*t)
-    carrier_sin = np.sin(2*np.pi*FC*t)
-    analyticL = np.imag(hilbert(audio_L))
-    analyticR = np.imag(hilbert(audio_R))
-    isb_usb = np.real(audio_L * carrier_cos - analyticL * carrier_sin)
-    isb_lsb = np.real(audio_R * carrier_cos + analyticR * carrier_sin)
-    return isb_usb + isb_lsb
+def graficar_senal_tiempo_frecuencia(senal, fs, titulo):
+    # No bloquea: la ventana se abre en el proceso de gráficas
+    with traza.tramo("graficar", titulo=titulo, senal=senal):
+        graficas.graficar(senal, fs, titulo)
+
+def parametros_cache(modo, fs, audio):
+    return {
+        "modo": modo, "fc": FC, "fs": fs,
+        "tono_inicio": TONO_INICIO, "tono_fin": TONO_FIN, "dur_tono": DUR_TONO,
+        "dtype": str(audio.dtype),
+    }
 
 def ejecutar_modulacion(tipo_modulacion, banda):
     try:
@@ -147,29 +122,35 @@ def ejecutar_modulacion(tipo_modulacion, banda):
             return
 
         estado_var.set(f"⚙️ Modulando {tipo_modulacion}-{banda}...")
-        root.update()
-
-        graficar_senal_tiempo_frecuencia(audio, fs, "Audio Original", usar_analitica=True)
-        
-        tono_i = generar_tono(TONO_INICIO, DUR_TONO, FS)
-        #reproducir_senal(tono_i, FS)     # 🔊 Reproducir el tono antes
-        time.sleep(0.1)                  # 🕒 Pequeña pausa opcional entre tono y señal
-        tono_f = generar_tono(TONO_FIN, DUR_TONO, FS)
+        refrescar_ui()
 
+        graficar_senal_tiempo_frecuencia(audio, fs, "Audio Original")
 
         if tipo_modulacion == "SC":
-            salida = modulacion_ssb(audio, banda)
+            modular = modulacion_ssb
         elif tipo_modulacion == "FC":
-            salida = modulacion_ssb_fc(audio, banda)
+            modular = modulacion_ssb_fc
         else:
             estado_var.set("❌ Tipo no reconocido")
             return
 
-        graficar_senal_tiempo_frecuencia(salida, fs, f"Modulada {tipo_modulacion}-{banda}", usar_analitica=True)
+        def calcular():
+            # Tono de inicio + señal modulada + tono de fin
+            return enmarcar(modular(audio, banda, fs), fs)
+
+        time.sleep(0.1)                  # 🕒 Pequeña pausa opcional entre tono y señal
+        with vigia.operacion("modular"), traza.tramo("modular", modo=f"{tipo_modulacion}-{banda}"):
+            total, en_cache = cache_modulacion.obtener_o_calcular(
+                [audio], parametros_cache(f"{tipo_modulacion}-{banda}", fs, audio), calcular)
+        if en_cache:
+            print(f"[CACHE] {tipo_modulacion}-{banda} leído de caché")
+
+        n_tono = int(fs * DUR_TONO)
+        salida = total[n_tono:len(total) - n_tono]
+        graficar_senal_tiempo_frecuencia(salida, fs, f"Modulada {tipo_modulacion}-{banda}")
 
-        total = np.concatenate((tono_i, salida, tono_f))
         estado_var.set(f"🔊 Reproduciendo {tipo_modulacion}-{banda}")
-        reproducir_senal(total, FS)
+        reproducir_senal(total, fs)
         estado_var.set(f"✅ {tipo_modulacion}-{banda} completado.")
     except Exception as e:
         estado_var.set(f"❌ Error: {e}")
@@ -179,6 +160,11 @@ def ejecutar_isb():
     try:
         fsL, audioL = cargar_audio(archivo_L_ISB)
         fsR, audioR = cargar_audio(archivo_R_ISB)
+        # Antes de graficar nada: con fs distintas no hay ISB
+        if fsL != fsR:
+            estado_var.set("❌ L y R con distinta frecuencia de muestreo")
+            return
+        fs = fsL
 
         # Asegurar que ambas señales tengan la misma longitud
         min_len = min(len(audioL), len(audioR))
@@ -188,87 +174,110 @@ def ejecutar_isb():
 
 
         estado_var.set("⚙️ Modulando ISB...")
-        root.update()
+        refrescar_ui()
 
-        graficar_senal_tiempo_frecuencia(audioL, fsL, "Audio L", usar_analitica=True)
-        graficar_senal_tiempo_frecuencia(audioR, fsR, "Audio R", usar_analitica=True)
-        
-        tono_i = generar_tono(TONO_INICIO, DUR_TONO, FS)
-        #reproducir_senal(tono_i, FS)     # 🔊 Reproducir el tono antes
-        time.sleep(0.1)                  # 🕒 Pequeña pausa opcional entre tono y señal
-        tono_f = generar_tono(TONO_FIN, DUR_TONO, FS)
+        graficar_senal_tiempo_frecuencia(audioL, fs, "Audio L")
+        graficar_senal_tiempo_frecuencia(audioR, fs, "Audio R")
+
+        def calcular():
+            return enmarcar(modulacion_isb(audioL, audioR, fs), fs)
 
-        
-        
-        isb = modulacion_isb(audioL, audioR)
+        time.sleep(0.1)                  # 🕒 Pequeña pausa opcional entre tono y señal
+        with vigia.operacion("modular"), traza.tramo("modular", modo="ISB"):
+            total, en_cache = cache_modulacion.obtener_o_calcular(
+                [audioL, audioR], parametros_cache("ISB", fs, audioL), calcular)
+        if en_cache:
+            print("[CACHE] ISB leído de caché")
 
-        graficar_senal_tiempo_frecuencia(isb, FS, "Modulada ISB", usar_analitica=True)
+        n_tono = int(fs * DUR_TONO)
+        isb = total[n_tono:len(total) - n_tono]
+        graficar_senal_tiempo_frecuencia(isb, fs, "Modulada ISB")
 
-        total = np.concatenate((tono_i, isb, tono_f))
         estado_var.set("🔊 Reproduciendo ISB")
-        reproducir_senal(total, FS)
+        reproducir_senal(total, fs)
         estado_var.set("✅ ISB completado.")
     except Exception as e:
         estado_var.set(f"❌ Error ISB: {e}")
         print("[ERROR]", e)
 
 # === Interfaz Gráfica ===
-imagen_path = "walki.png"
-imagen = Image.open(imagen_path)
-ancho, alto = imagen.size
-
-botones = {
-    "G_BAJA": (105, 163, 50, 16),
-    "G_ALTA": (165, 163, 50, 16),
-    "R_BAJA": (250, 163, 50, 16),
-    "R_ALTA": (305, 163, 50, 16),
-    "SSB-SCL": (77, 216, 71, 15),
-    "SSB-SCU": (177, 216, 69, 15),
-    "SSB-FCL": (272, 216, 70, 15),
-    "SSB-FCU": (78, 262, 69, 15),
-    "ISB": (177, 262, 70, 15),
-    "ESC": (313, 384, 26, 13)
-}
-
-root = tk.Tk()
-root.title("Modulador AM")
-root.geometry(f"{ancho}x{alto}")
-root.resizable(False, False)
-
-imagen_tk = ImageTk.PhotoImage(imagen)
-canvas = tk.Canvas(root, width=ancho, height=alto)
-canvas.pack()
-canvas.create_image(0, 0, anchor="nw", image=imagen_tk)
-
-estado_var = tk.StringVar(value="")
-tk.Label(root, textvariable=estado_var, bg="white", fg="black", font=("Arial", 14)).place(x=70, y=310, width=270)
-
-for nombre, (x, y, w, h) in botones.items():
-    if nombre == "G_BAJA":
-        comando = lambda: grabar_audio(archivo_baja)
-    elif nombre == "G_ALTA":
-        comando = lambda: grabar_audio(archivo_alta)
-    elif nombre == "R_BAJA":
-        comando = lambda: reproducir_audio(archivo_baja)
-    elif nombre == "R_ALTA":
-        comando = lambda: reproducir_audio(archivo_alta)
-    elif nombre == "ESC":
-        comando = root.destroy
-    elif nombre == "SSB-SCL":
-        comando = lambda: ejecutar_modulacion("SC", "LSB")
-    elif nombre == "SSB-SCU":
-        comando = lambda: ejecutar_modulacion("SC", "USB")
-    elif nombre == "SSB-FCU":
-        comando = lambda: ejecutar_modulacion("FC", "USB")
-    elif nombre == "SSB-FCL":
-        comando = lambda: ejecutar_modulacion("FC", "LSB")
-    elif nombre == "ISB":
-        comando = ejecutar_isb
-    else:
-        comando = lambda n=nombre: estado_var.set(f"Presionado: {n}")
-
-    tk.Button(root, text=nombre, command=comando,
-              bg="#222", fg="white", font=("Arial", 9)).place(x=x, y=y, width=w, height=h)
-
-root.mainloop()
-
+# Sólo al ejecutar el script: importarlo (benchmarks, procesos) no abre ventanas
+if __name__ == '__main__':
+    # --traza[=ruta]: trazas por etapa (Perfetto); --perfil[=ruta]: cProfile de una trama
+    traza.configurar(sys.argv, "modulador")
+
+    imagen_path = "walki.png"
+
+    botones = {
+        "G_BAJA": (105, 163, 50, 16),
+        "G_ALTA": (165, 163, 50, 16),
+        "R_BAJA": (250, 163, 50, 16),
+        "R_ALTA": (305, 163, 50, 16),
+        "SSB-SCL": (77, 216, 71, 15),
+        "SSB-SCU": (177, 216, 69, 15),
+        "SSB-FCL": (272, 216, 70, 15),
+        "SSB-FCU": (78, 262, 69, 15),
+        "ISB": (177, 262, 70, 15),
+        "ESC": (313, 384, 26, 13)
+    }
+
+    root = tk.Tk()
+    root.title("Modulador AM")
+    # Tk 8.6 lee PNG solo; PIL queda para Tk viejos
+    try:
+        imagen_tk = tk.PhotoImage(file=imagen_path)
+    except tk.TclError:
+        from PIL import Image, ImageTk
+        imagen_tk = ImageTk.PhotoImage(Image.open(imagen_path))
+    ancho, alto = imagen_tk.width(), imagen_tk.height()
+    root.geometry(f"{ancho}x{alto}")
+    root.resizable(False, False)
+
+    canvas = tk.Canvas(root, width=ancho, height=alto)
+    canvas.pack()
+    canvas.create_image(0, 0, anchor="nw", image=imagen_tk)
+
+    # Mide el atraso del bucle de Tk y qué operación lo causó (VIGIA_TK_JSON)
+    vigia = VigiaLag(root, nombre="modulador")
+
+    # Los hilos (grabar_audio) no tocan Tk: publican el estado en el bus
+    bus = BusUI(root, vigia=vigia)
+    estado_tk = tk.StringVar(value="")
+    estado_var = VariableBus(bus, estado_tk)
+    tk.Label(root, textvariable=estado_tk, bg="white", fg="black", font=("Arial", 14)).place(x=70, y=310, width=270)
+
+    for nombre, (x, y, w, h) in botones.items():
+        if nombre == "G_BAJA":
+            comando = lambda: grabar_audio(archivo_baja)
+        elif nombre == "G_ALTA":
+            comando = lambda: grabar_audio(archivo_alta)
+        elif nombre == "R_BAJA":
+            comando = lambda: reproducir_audio(archivo_baja)
+        elif nombre == "R_ALTA":
+            comando = lambda: reproducir_audio(archivo_alta)
+        elif nombre == "ESC":
+            comando = root.destroy
+        elif nombre == "SSB-SCL":
+            comando = lambda: ejecutar_modulacion("SC", "LSB")
+        elif nombre == "SSB-SCU":
+            comando = lambda: ejecutar_modulacion("SC", "USB")
+        elif nombre == "SSB-FCU":
+            comando = lambda: ejecutar_modulacion("FC", "USB")
+        elif nombre == "SSB-FCL":
+            comando = lambda: ejecutar_modulacion("FC", "LSB")
+        elif nombre == "ISB":
+            comando = ejecutar_isb
+        else:
+            comando = lambda n=nombre: estado_var.set(f"Presionado: {n}")
+        if nombre.startswith("SSB") or nombre == "ISB":
+            comando = traza.perfilada(traza.trazar(nombre)(comando))
+
+        tk.Button(root, text=nombre, command=vigia.envolver(nombre, comando),
+                  bg="#222", fg="white", font=("Arial", 9)).place(x=x, y=y, width=w, height=h)
+
+    # Con la ventana ya visible: scipy, el backend de audio y el proceso de
+    # gráficas se cargan en segundo plano para el primer botón
+    arranque.al_mostrar(root, "modulador",
+                        precarga=("scipy.io.wavfile", "scipy.signal", preparar_backend,
+                                  graficas.precalentar))
+    root.mainloop()
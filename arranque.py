@@ -0,0 +1,71 @@
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+
+# === Arranque: primero la ventana, después lo pesado ===
+# Las GUIs no importan matplotlib, scipy, PIL ni sounddevice antes de mostrar
+# la ventana. al_mostrar() espera el primer <Map> de la raíz, anota cuánto
+# tardó y qué módulos pesados ya estaban cargados, y recién ahí precarga el
+# resto en un hilo aparte. Con ARRANQUE_JSON=ruta.json se guarda la medición
+# y con ARRANQUE_SALIR=1 la GUI se cierra apenas aparece (lo usa
+# benchmarks/arranque_gui.py).
+
+PESADOS = ("matplotlib", "scipy", "PIL", "sounddevice")
+
+_inicio = time.perf_counter()
+
+
+def cargados(prefijos=PESADOS):
+    return sorted(p for p in prefijos if p in sys.modules)
+
+
+def precargar(modulos, al_terminar=None):
+    # Importa en un hilo daemon (nombres de módulo o funciones que preparan
+    # algo, p. ej. abrir el proceso de gráficas); al_terminar(tiempos) corre
+    # en ese hilo
+    tiempos = {}
+
+    def cargar():
+        for modulo in modulos:
+            nombre = modulo if isinstance(modulo, str) else getattr(modulo, "__name__", str(modulo))
+            t0 = time.perf_counter()
+            try:
+                if isinstance(modulo, str):
+                    importlib.import_module(modulo)
+                else:
+                    modulo()
+            except Exception as e:
+                print(f"[ERROR] Precarga de {nombre}:", e)
+            tiempos[nombre] = round((time.perf_counter() - t0) * 1000, 1)
+        if al_terminar is not None:
+            al_terminar(tiempos)
+
+    hilo = threading.Thread(target=cargar, name="precarga", daemon=True)
+    hilo.start()
+    return hilo
+
+
+def al_mostrar(root, nombre, precarga=(), al_terminar=None):
+    medicion = {"gui": nombre}
+
+    def mostrada(evento):
+        if evento.widget is not root or "primera_ventana_s" in medicion:
+            return
+        medicion["primera_ventana_s"] = round(time.perf_counter() - _inicio, 3)
+        medicion["epoca"] = time.time()
+        medicion["pesados_antes"] = cargados()
+        ruta = os.environ.get("ARRANQUE_JSON")
+        if ruta:
+            with open(ruta, "w", encoding="utf-8") as f:
+                json.dump(medicion, f, indent=2)
+        if os.environ.get("ARRANQUE_SALIR"):
+            root.after(0, root.destroy)
+            return
+        if precarga:
+            precargar(precarga, al_terminar)
+
+    root.bind("<Map>", mostrada, add="+")
+    return medicion
@@ -0,0 +1,417 @@
+import os
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+
+import numpy as np
+
+# === Backends de audio intercambiables ===
+# Los módulos hacen `from audio_backend import sd` en lugar de
+# `import sounddevice as sd`. El objeto `sd` expone el mismo subconjunto de
+# la API que usamos (rec, play, wait, sleep, InputStream, CallbackStop,
+# default) y delega en el backend activo:
+#
+#   portaudio  -> sounddevice (tarjeta de sonido real)
+#   archivo    -> lee/escribe WAV (a tiempo real salvo AUDIO_VELOCIDAD)
+#   nulo       -> entrada en silencio, salida descartada
+#   loopback   -> lo que se reproduce entra por el InputStream (TX -> RX)
+#
+# `velocidad` fija el ritmo de los streams simulados: None = tan rápido como
+# lo consuma el callback, 1.0 = tiempo real, 10.0 = diez veces más rápido.
+# Sin ritmo (AUDIO_VELOCIDAD=max) sólo sirve un receptor de un solo stream
+# (ReceptorTramas en CE_taller_P2_demodulacion.py): los que abren un stream
+# por etapa, como demod_gui02, sondean con time.sleep() y el primero se
+# consumiría el archivo entero antes de cerrarse.
+#
+# Se elige con la variable de entorno AUDIO_BACKEND (y AUDIO_ENTRADA,
+# AUDIO_SALIDA, AUDIO_VELOCIDAD) o con establecer_backend().
+
+
+class CallbackStop(Exception):
+    pass
+
+
+class CallbackAbort(Exception):
+    pass
+
+
+class EstadoCallback:
+    # Imita sounddevice.CallbackFlags: falso si no hubo problemas
+    def __init__(self, input_overflow=False, output_underflow=False):
+        self.input_overflow = input_overflow
+        self.output_underflow = output_underflow
+
+    def __bool__(self):
+        return self.input_overflow or self.output_underflow
+
+    def __str__(self):
+        flags = [n for n in ("input_overflow", "output_underflow") if getattr(self, n)]
+        return ", ".join(flags)
+
+
+# === Stream de entrada simulado ===
+class _StreamSimulado:
+    def __init__(self, backend, leer, callback=None, blocksize=None, channels=None,
+                 samplerate=None, dtype='float32', velocidad=None, **_):
+        self.backend = backend
+        self.leer = leer
+        self.callback = callback
+        self.samplerate = samplerate or backend.default.samplerate
+        self.channels = channels or backend.default.channels
+        self.blocksize = blocksize or int(0.1 * self.samplerate)
+        self.dtype = dtype
+        self.velocidad = velocidad
+        self.frames_procesados = 0
+        self._detener = threading.Event()
+        self._hilo = None
+        self._activo = False
+
+    @property
+    def active(self):
+        return self._activo
+
+    @property
+    def stopped(self):
+        return not self.active
+
+    def start(self):
+        self._detener.clear()
+        self._activo = True
+        self._hilo = threading.Thread(target=self._bucle, daemon=True)
+        self._hilo.start()
+        self.backend._registrar(self)
+
+    def stop(self):
+        self._detener.set()
+        if self._hilo is not None and self._hilo is not threading.current_thread():
+            self._hilo.join()
+        self.backend._olvidar(self)
+
+    abort = stop
+
+    def close(self):
+        self.stop()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def _bucle(self):
+        periodo = self.blocksize / self.samplerate / (self.velocidad or 1.0)
+        proximo = time.perf_counter()
+        while not self._detener.is_set():
+            bloque = self.leer(self.blocksize, self.channels)
+            if bloque is None:
+                break
+            if self._detener.is_set():
+                # Cerrado mientras se leía: el bloque queda para el próximo stream
+                self.backend._devolver(len(bloque))
+                break
+            indata = np.asarray(bloque, dtype=self.dtype).reshape(self.blocksize, self.channels)
+            ahora = time.perf_counter()
+            info = SimpleNamespace(inputBufferAdcTime=ahora, currentTime=ahora,
+                                   outputBufferDacTime=0.0)
+            try:
+                if self.callback is not None:
+                    self.callback(indata, self.blocksize, info, EstadoCallback())
+            except (CallbackStop, CallbackAbort):
+                break
+            except Exception as e:
+                print("[ERROR] callback de audio:", e)
+                break
+            finally:
+                self.frames_procesados += self.blocksize
+                self.backend._avisar()
+            if self.velocidad:
+                proximo += periodo
+                espera = proximo - time.perf_counter()
+                if espera > 0:
+                    self._detener.wait(espera)
+        self._activo = False
+        self.backend._avisar()
+
+
+# === Base común de los backends simulados ===
+class _BackendSimulado:
+    def __init__(self, samplerate=44100, channels=1, velocidad=None):
+        self.velocidad = velocidad
+        self.default = SimpleNamespace(samplerate=samplerate, channels=channels)
+        self.CallbackStop = CallbackStop
+        self.CallbackAbort = CallbackAbort
+        self._streams = set()
+        self._cond = threading.Condition()
+
+    def _registrar(self, stream):
+        with self._cond:
+            self._streams.add(stream)
+
+    def _olvidar(self, stream):
+        with self._cond:
+            self._streams.discard(stream)
+            self._cond.notify_all()
+
+    def _avisar(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    def _leer(self, n, canales):
+        raise NotImplementedError
+
+    def _devolver(self, n):
+        # Sólo las fuentes que se pueden rebobinar (archivo) lo usan
+        pass
+
+    def InputStream(self, callback=None, **kwargs):
+        kwargs.setdefault("velocidad", self.velocidad)
+        return _StreamSimulado(self, self._leer, callback=callback, **kwargs)
+
+    def rec(self, frames, samplerate=None, channels=None, dtype='float32', **_):
+        canales = channels or self.default.channels
+        datos = self._leer(int(frames), canales)
+        if datos is None:
+            datos = np.zeros((int(frames), canales))
+        return np.asarray(datos, dtype=dtype).reshape(int(frames), canales)
+
+    def play(self, data, samplerate=None, **_):
+        pass
+
+    def wait(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def sleep(self, msec):
+        # Tiempo virtual: espera a que los streams activos hayan procesado
+        # `msec` de audio (o terminen), no a que pase ese tiempo de reloj
+        with self._cond:
+            activos = [s for s in self._streams if s.active]
+            if not activos:
+                if self.velocidad:
+                    time.sleep(msec / 1000 / self.velocidad)
+                return
+            metas = {s: s.frames_procesados + msec * s.samplerate / 1000 for s in activos}
+            self._cond.wait_for(lambda: all(not s.active or s.frames_procesados >= m
+                                            for s, m in metas.items()))
+
+
+class BackendNulo(_BackendSimulado):
+    # Dispositivo mudo: la entrada es silencio al ritmo de una tarjeta real
+    def __init__(self, samplerate=44100, channels=1, velocidad=1.0):
+        super().__init__(samplerate, channels, velocidad)
+
+    def _leer(self, n, canales):
+        return np.zeros((n, canales), dtype=np.float32)
+
+
+class BackendArchivo(_BackendSimulado):
+    # Fuente y sumidero WAV: la entrada se lee de `entrada` al ritmo de
+    # `velocidad` (tiempo real por defecto, como una tarjeta); lo reproducido
+    # se acumula en `salida`
+    def __init__(self, entrada=None, salida=None, samplerate=None, channels=1,
+                 velocidad=1.0):
+        from scipy.io.wavfile import read
+        self.datos = np.zeros((0, channels), dtype=np.float32)
+        if entrada is not None:
+            fs, datos = read(entrada)
+            if np.issubdtype(datos.dtype, np.integer):
+                datos = datos / float(np.iinfo(datos.dtype).max)
+            datos = np.asarray(datos, dtype=np.float32)
+            self.datos = datos.reshape(len(datos), -1)
+            samplerate = samplerate or fs
+        super().__init__(samplerate or 44100, channels, velocidad)
+        self.salida = salida
+        self.posicion = 0
+        self._ultimo = 0
+        self.reproducido = []
+        self._lock = threading.Lock()
+
+    def _leer(self, n, canales):
+        with self._lock:
+            if self.posicion >= len(self.datos):
+                return None
+            bloque = self.datos[self.posicion:self.posicion + n]
+            self.posicion += n
+            self._ultimo = len(bloque)
+        if bloque.shape[1] != canales:
+            bloque = np.repeat(bloque.mean(axis=1, keepdims=True), canales, axis=1)
+        if len(bloque) < n:
+            bloque = np.concatenate((bloque, np.zeros((n - len(bloque), canales), bloque.dtype)))
+        return bloque
+
+    def _devolver(self, n):
+        with self._lock:
+            self.posicion -= min(n, self._ultimo)
+            self._ultimo = 0
+
+    def play(self, data, samplerate=None, **_):
+        self.reproducido.append(np.asarray(data, dtype=np.float32))
+        if self.salida is not None:
+            from scipy.io.wavfile import write
+            write(self.salida, int(samplerate or self.default.samplerate),
+                  np.concatenate(self.reproducido))
+
+
+class BackendLoopback(_BackendSimulado):
+    # Conecta en memoria lo que se reproduce con lo que se graba. `canal` es
+    # una función opcional senal -> senal (ruido, atenuación, retardo...).
+    # Sin datos pendientes la entrada entrega silencio sin girar en vacío.
+    # Por defecto va a tiempo real porque los receptores sondean con
+    # time.sleep(); con velocidad > 1 un bloque puede pasar sin que lo vean.
+    def __init__(self, samplerate=44100, channels=1, canal=None, velocidad=1.0):
+        super().__init__(samplerate, channels, velocidad)
+        self.canal = canal
+        self._cola = deque()
+        self._pendientes = 0
+
+    def _leer(self, n, canales):
+        salida = np.zeros(n, dtype=np.float32)
+        llenas = 0
+        with self._cond:
+            if self._pendientes == 0:
+                self._cond.wait(n / self.default.samplerate / (self.velocidad or 1.0))
+            while llenas < n and self._cola:
+                trozo = self._cola[0]
+                k = min(n - llenas, len(trozo))
+                salida[llenas:llenas + k] = trozo[:k]
+                llenas += k
+                self._pendientes -= k
+                if k == len(trozo):
+                    self._cola.popleft()
+                else:
+                    self._cola[0] = trozo[k:]
+            self._cond.notify_all()
+        return np.repeat(salida[:, None], canales, axis=1)
+
+    def play(self, data, samplerate=None, **_):
+        senal = np.asarray(data, dtype=np.float32)
+        if senal.ndim == 2:
+            senal = senal.mean(axis=1)
+        if self.canal is not None:
+            senal = np.asarray(self.canal(senal), dtype=np.float32)
+        with self._cond:
+            self._cola.append(senal)
+            self._pendientes += len(senal)
+            self._cond.notify_all()
+
+    def wait(self):
+        # Vuelve cuando el receptor consumió todo lo reproducido
+        with self._cond:
+            self._cond.wait_for(lambda: self._pendientes == 0
+                                or not any(s.active for s in self._streams))
+
+    def stop(self):
+        with self._cond:
+            self._cola.clear()
+            self._pendientes = 0
+            self._cond.notify_all()
+
+
+class BackendPortAudio:
+    # Tarjeta de sonido real a través de sounddevice
+    def __init__(self):
+        import sounddevice
+        self._sd = sounddevice
+        self.default = sounddevice.default
+        self.CallbackStop = CallbackStop
+        self.CallbackAbort = CallbackAbort
+
+    def _envolver(self, callback):
+        if callback is None:
+            return None
+
+        def envuelto(indata, frames, time_info, status):
+            try:
+                callback(indata, frames, time_info, status)
+            except CallbackStop:
+                raise self._sd.CallbackStop()
+            except CallbackAbort:
+                raise self._sd.CallbackAbort()
+        return envuelto
+
+    def InputStream(self, callback=None, **kwargs):
+        return self._sd.InputStream(callback=self._envolver(callback), **kwargs)
+
+    def rec(self, *args, **kwargs):
+        return self._sd.rec(*args, **kwargs)
+
+    def play(self, *args, **kwargs):
+        return self._sd.play(*args, **kwargs)
+
+    def wait(self):
+        return self._sd.wait()
+
+    def stop(self):
+        return self._sd.stop()
+
+    def sleep(self, msec):
+        return self._sd.sleep(msec)
+
+
+# === Selección del backend ===
+def crear_backend(nombre=None, **kwargs):
+    nombre = (nombre or os.environ.get("AUDIO_BACKEND", "portaudio")).lower()
+    if nombre == "portaudio":
+        return BackendPortAudio()
+    if os.environ.get("AUDIO_VELOCIDAD"):
+        v = os.environ["AUDIO_VELOCIDAD"]
+        kwargs.setdefault("velocidad", None if v == "max" else float(v))
+    if nombre == "archivo":
+        kwargs.setdefault("entrada", os.environ.get("AUDIO_ENTRADA"))
+        kwargs.setdefault("salida", os.environ.get("AUDIO_SALIDA"))
+        return BackendArchivo(**kwargs)
+    if nombre == "nulo":
+        return BackendNulo(**kwargs)
+    if nombre == "loopback":
+        return BackendLoopback(**kwargs)
+    raise ValueError(f"Backend de audio desconocido: {nombre}")
+
+
+class _BackendActivo:
+    # Proxy que ven los módulos como `sd`; se crea el backend al primer uso.
+    # La precarga (otro hilo) y un botón temprano pueden pedirlo a la vez:
+    # el lock asegura un solo backend (con portaudio, un solo sounddevice)
+    CallbackStop = CallbackStop
+    CallbackAbort = CallbackAbort
+
+    def __init__(self):
+        self._backend = None
+        self._lock = threading.Lock()
+
+    def _asegurar(self):
+        backend = self._backend
+        if backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._backend = crear_backend()
+                backend = self._backend
+        return backend
+
+    def __getattr__(self, nombre):
+        return getattr(self._asegurar(), nombre)
+
+
+sd = _BackendActivo()
+
+
+def establecer_backend(backend):
+    if isinstance(backend, str):
+        backend = crear_backend(backend)
+    with sd._lock:
+        sd._backend = backend
+    return backend
+
+
+def backend_activo():
+    return sd._backend
+
+
+def preparar_backend():
+    # Crea el backend ya (con portaudio, importa sounddevice) en lugar de
+    # esperar al primer uso; lo usa la precarga de las GUIs
+    return sd._asegurar()
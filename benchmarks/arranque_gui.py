@@ -0,0 +1,127 @@
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# === Presupuesto de arranque de las GUIs ===
+# Para cada punto de entrada mide, en intérpretes nuevos:
+#   - el tiempo de importar el módulo (-X importtime, acumulado) y sus
+#     dependencias más caras; importar no debe cargar matplotlib, scipy, PIL
+#     ni sounddevice (ver arranque.py)
+#   - el tiempo hasta la primera ventana: desde lanzar el proceso hasta el
+#     primer <Map> de la raíz (ARRANQUE_JSON + ARRANQUE_SALIR). Necesita
+#     pantalla; sin DISPLAY se omite salvo con --exigir-ventana
+# Falla (código 1) si algún valor supera su presupuesto.
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GUIS = {"modulador": "CE_taller_P2_modulacion", "demodulador": "demod_gui02"}
+LINEA = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def _entorno(**extra):
+    entorno = dict(os.environ, PYTHONPATH=RAIZ, PYTHONDONTWRITEBYTECODE="1", **extra)
+    entorno.pop("TRAZA", None)
+    return entorno
+
+
+def tiempo_import(modulo):
+    # Devuelve (ms acumulados, [(ms, dependencia directa)], pesados cargados)
+    codigo = f"import {modulo}, arranque; print(','.join(arranque.cargados()))"
+    r = subprocess.run([sys.executable, "-X", "importtime", "-c", codigo], cwd=RAIZ,
+                       capture_output=True, text=True, env=_entorno())
+    if r.returncode != 0:
+        raise RuntimeError(r.stderr[-2000:])
+    total, hijos = None, []
+    for linea in r.stderr.splitlines():
+        m = LINEA.match(linea)
+        if not m:
+            continue
+        nivel = len(m.group(3))
+        if nivel == 1 and m.group(4) == modulo:
+            total = int(m.group(2)) / 1000
+        elif nivel == 3:
+            hijos.append((int(m.group(2)) / 1000, m.group(4)))
+    pesados = [p for p in r.stdout.strip().split(",") if p]
+    return total, sorted(hijos, reverse=True), pesados
+
+
+def hay_pantalla():
+    return sys.platform in ("win32", "darwin") or bool(os.environ.get("DISPLAY"))
+
+
+def tiempo_ventana(script, limite_s=30):
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "arranque.json")
+        t0 = time.time()
+        r = subprocess.run([sys.executable, script], cwd=RAIZ, capture_output=True, text=True,
+                           timeout=limite_s,
+                           env=_entorno(ARRANQUE_JSON=ruta, ARRANQUE_SALIR="1",
+                                        AUDIO_BACKEND="nulo", MODULADOR_GRAFICAS="no"))
+        if not os.path.exists(ruta):
+            raise RuntimeError(f"{script} no llegó a mostrar la ventana:\n{r.stderr[-2000:]}")
+        with open(ruta, encoding="utf-8") as f:
+            medicion = json.load(f)
+    return medicion["epoca"] - t0, medicion["pesados_antes"]
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--guis", nargs="+", choices=sorted(GUIS), default=sorted(GUIS))
+    p.add_argument("--repeticiones", type=int, default=5)
+    p.add_argument("--max-import-ms", type=float, default=300.0)
+    p.add_argument("--max-ventana-s", type=float, default=1.5)
+    p.add_argument("--exigir-ventana", action="store_true",
+                   help="Fallar si no hay pantalla para medir la primera ventana")
+    p.add_argument("--json", default=None)
+    args = p.parse_args(argv)
+
+    ok = True
+    resultados = {}
+    for gui in args.guis:
+        modulo = GUIS[gui]
+        corridas = [tiempo_import(modulo) for _ in range(args.repeticiones)]
+        import_ms = float(np.median([c[0] for c in corridas]))
+        hijos, pesados = corridas[0][1], corridas[0][2]
+        res = {"modulo": modulo, "import_ms": import_ms, "pesados_al_importar": pesados,
+               "dependencias_ms": dict((n, ms) for ms, n in hijos[:8])}
+
+        falla_import = import_ms > args.max_import_ms or pesados
+        ok &= not falla_import
+        print(f"{'❌' if falla_import else '✅'} {gui}: import {import_ms:.0f} ms "
+              f"(presupuesto {args.max_import_ms:.0f})"
+              + (f"  ⚠️ carga al importar: {', '.join(pesados)}" if pesados else ""))
+        print("     " + ", ".join(f"{n} {ms:.0f}" for ms, n in hijos[:5]))
+
+        if hay_pantalla():
+            ventanas = [tiempo_ventana(modulo + ".py") for _ in range(args.repeticiones)]
+            ventana_s = float(np.median([v[0] for v in ventanas]))
+            pesados_antes = ventanas[0][1]
+            res.update({"primera_ventana_s": ventana_s, "pesados_antes_de_ventana": pesados_antes})
+            falla = ventana_s > args.max_ventana_s or pesados_antes
+            ok &= not falla
+            print(f"{'❌' if falla else '✅'} {gui}: primera ventana {ventana_s:.2f} s "
+                  f"(presupuesto {args.max_ventana_s:.2f})"
+                  + (f"  ⚠️ antes de la ventana: {', '.join(pesados_antes)}" if pesados_antes else ""))
+        else:
+            res["primera_ventana_s"] = None
+            ok &= not args.exigir_ventana
+            print(f"{'❌' if args.exigir_ventana else '⏭️'} {gui}: sin pantalla (DISPLAY), "
+                  f"no se mide la primera ventana")
+        resultados[gui] = res
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"presupuestos": {"import_ms": args.max_import_ms,
+                                        "ventana_s": args.max_ventana_s},
+                       "guis": resultados}, f, indent=2, ensure_ascii=False)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
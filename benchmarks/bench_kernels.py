@@ -0,0 +1,65 @@
+import tracemalloc
+
+import dsp_core
+
+# === Rendimiento de los kernels de modulación ===
+# Cada kernel de dsp_core sobre señales sintéticas de 1 s a 30 min, a 44.1,
+# 48 y 120 kHz, en float32 y float64, con longitudes exactas y primas.
+# Además del tiempo, extra_info guarda muestras/s y el pico de memoria
+# (tracemalloc) de una llamada.
+#
+#   pytest benchmarks                                   # 1, 10 y 60 s
+#   pytest benchmarks --largas --max-gb 16              # + 10 y 30 min
+#   pytest benchmarks --benchmark-autosave              # guardar línea base
+#   pytest benchmarks --benchmark-disable               # prueba de humo
+#
+# pytest.ini compara siempre contra la última línea base guardada y falla si
+# la media sube más de 10 % (--benchmark-compare-fail=mean:10%). Con tiempo
+# medio = n / throughput, equivale a fallar cuando el throughput cae más de
+# ~9 %. Sin línea base guardada sólo se avisa.
+
+
+def _rondas(n):
+    # Suficientes rondas para una media estable sin que 30 min tarden horas
+    return max(3, min(20, int(2e7 // max(n, 1))))
+
+
+def _medir(benchmark, caso, funcion, *args):
+    # Una llamada previa para que el pico no incluya la importación diferida
+    # de scipy.signal ni cachés de planes de FFT
+    funcion(*args)
+    tracemalloc.start()
+    funcion(*args)
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    benchmark.pedantic(funcion, args=args, rounds=_rondas(caso.n), iterations=1,
+                       warmup_rounds=0)
+    benchmark.extra_info.update({
+        "muestras": caso.n,
+        "fs": caso.fs,
+        "dtype": caso.dtype.name,
+        "longitud": caso.longitud,
+        "pico_mb": pico / 1e6,
+        "bytes_pico_por_muestra": pico / caso.n,
+    })
+    # Con --benchmark-disable (prueba de humo) no hay estadísticas
+    if benchmark.stats is not None:
+        benchmark.extra_info["muestras_por_s"] = caso.n / benchmark.stats.stats.mean
+
+
+def test_generar_tono(benchmark, caso_tono):
+    _medir(benchmark, caso_tono, dsp_core.generar_tono, dsp_core.TONO_INICIO,
+           caso_tono.n / caso_tono.fs, caso_tono.fs)
+
+
+def test_modulacion_ssb(benchmark, caso):
+    _medir(benchmark, caso, dsp_core.modulacion_ssb, caso.senal(), "USB", caso.fs)
+
+
+def test_modulacion_ssb_fc(benchmark, caso):
+    _medir(benchmark, caso, dsp_core.modulacion_ssb_fc, caso.senal(), "LSB", caso.fs)
+
+
+def test_modulacion_isb(benchmark, caso):
+    _medir(benchmark, caso, dsp_core.modulacion_isb, caso.senal(0), caso.senal(1), caso.fs)
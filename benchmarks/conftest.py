@@ -0,0 +1,115 @@
+import glob
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# === Casos de la suite de kernels ===
+# Cada caso es (duración, fs, dtype, longitud). "prima" usa el primo más
+# cercano por debajo de la longitud exacta: el peor caso para las FFT de
+# hilbert(). Por defecto 1, 10 y 60 s; con --largas se suman 10 y 30 min
+# (los casos cuyo pico estimado supera --max-gb se saltan).
+#
+# Compuerta de regresión: si hay una línea base guardada en el almacén de
+# pytest-benchmark (--benchmark-autosave), cada corrida se compara contra la
+# última y falla cuando un caso empeora más que --compuerta (defecto
+# mean:10%). --compuerta= (vacío) la desactiva; --benchmark-compare y
+# --benchmark-compare-fail explícitos mandan sobre ella.
+
+FRECUENCIAS = (44100, 48000, 120000)
+TIPOS = ("float32", "float64")
+LONGITUDES = ("exacta", "prima")
+# Bytes por muestra en el pico de modulacion_isb: dos entradas, dos
+# portadoras, las analíticas complejas y los temporales
+BYTES_PICO_POR_MUESTRA = 96
+
+
+def pytest_addoption(parser):
+    grupo = parser.getgroup("kernels")
+    grupo.addoption("--duraciones", default="1,10,60",
+                    help="Duraciones en segundos, separadas por coma")
+    grupo.addoption("--largas", action="store_true",
+                    help="Agregar 10 y 30 minutos")
+    grupo.addoption("--max-gb", type=float, default=8.0,
+                    help="Saltar casos cuyo pico estimado supere este valor")
+    grupo.addoption("--compuerta", default="mean:10%",
+                    help="Empeoramiento máximo contra la última línea base guardada "
+                         "(formato de --benchmark-compare-fail; vacío: sin compuerta)")
+
+
+def _hay_linea_base(almacen):
+    # Sólo almacenes en disco (file://); para otros, usar los flags explícitos
+    if not almacen.startswith("file://"):
+        return False
+    return bool(glob.glob(os.path.join(almacen[len("file://"):], "*", "*.json")))
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    # Antes de que pytest-benchmark (trylast) arme su sesión
+    compuerta = config.getoption("--compuerta", default=None)
+    if not compuerta or config.getoption("benchmark_disable", default=False):
+        return
+    if not _hay_linea_base(config.getoption("benchmark_storage", default="")):
+        return
+    from pytest_benchmark.utils import parse_compare_fail
+    if not config.option.benchmark_compare:
+        config.option.benchmark_compare = True
+    if not config.option.benchmark_compare_fail:
+        config.option.benchmark_compare_fail = [parse_compare_fail(compuerta)]
+
+
+def primo_anterior(n):
+    def es_primo(k):
+        if k < 2 or k % 2 == 0:
+            return k == 2
+        return all(k % d for d in range(3, int(k ** 0.5) + 1, 2))
+    while not es_primo(n):
+        n -= 1
+    return n
+
+
+class Caso:
+    def __init__(self, duracion, fs, dtype, longitud):
+        self.duracion = duracion
+        self.fs = fs
+        self.dtype = np.dtype(dtype)
+        self.longitud = longitud
+        n = int(round(duracion * fs))
+        self.n = primo_anterior(n) if longitud == "prima" else n
+
+    def senal(self, semilla=0):
+        # Ruido de banda de voz aproximado: el contenido no cambia el costo
+        rng = np.random.default_rng(semilla)
+        return (0.3 * rng.standard_normal(self.n)).astype(self.dtype)
+
+    def __repr__(self):
+        return f"{self.duracion:g}s-{self.fs // 1000:g}k-{self.dtype.name}-{self.longitud}"
+
+
+def pytest_generate_tests(metafunc):
+    # "caso" recorre los dos dtypes; "caso_tono" sólo float64, porque
+    # generar_tono no recibe una señal de entrada
+    nombres = [n for n in ("caso", "caso_tono") if n in metafunc.fixturenames]
+    if not nombres:
+        return
+    config = metafunc.config
+    duraciones = [float(d) for d in config.getoption("--duraciones").split(",") if d]
+    if config.getoption("--largas"):
+        duraciones += [600, 1800]
+    tipos = TIPOS if nombres[0] == "caso" else ("float64",)
+    casos = []
+    for duracion in duraciones:
+        for fs in FRECUENCIAS:
+            for dtype in tipos:
+                for longitud in LONGITUDES:
+                    caso = Caso(duracion, fs, dtype, longitud)
+                    gb = caso.n * BYTES_PICO_POR_MUESTRA / 1e9
+                    marcas = ()
+                    if gb > config.getoption("--max-gb"):
+                        marcas = pytest.mark.skip(reason=f"pico estimado {gb:.1f} GB")
+                    casos.append(pytest.param(caso, id=repr(caso), marks=marcas))
+    metafunc.parametrize(nombres[0], casos)
@@ -0,0 +1,308 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# === Cadena completa sin tarjeta de sonido: botón -> audio demodulado ===
+# Transmisor (enmarcar + modulación de dsp_core), canal simulado (silencio
+# previo, ganancia, corrimiento de frecuencia, ruido blanco) y receptor
+# (ReceptorTramas bloque a bloque, como el callback de
+# CE_taller_P2_demodulacion.py, y demodular_coherente), todo en el mismo
+# proceso y más rápido que el tiempo real. Por cada etapa mide tiempo de
+# pared y de CPU; además la latencia de detección de los tonos, la latencia
+# de punta a punta y la SNR del audio recuperado contra el original.
+#
+# Con --boton el transmisor es el del modulador sin cambios:
+# CE_taller_P2_modulacion.ejecutar_modulacion, importado sin ventana, sobre
+# el backend loopback; el receptor escucha un InputStream como el script.
+
+ARCHIVO_DEFECTO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                               "audio_baja.wav")
+
+
+class Cronometro:
+    def __init__(self):
+        self.etapas = {}
+
+    def medir(self, nombre, funcion, *args, **kwargs):
+        t0, c0 = time.perf_counter(), time.process_time()
+        resultado = funcion(*args, **kwargs)
+        self.sumar(nombre, time.perf_counter() - t0, time.process_time() - c0)
+        return resultado
+
+    def sumar(self, nombre, pared, cpu):
+        etapa = self.etapas.setdefault(nombre, {"pared_ms": 0.0, "cpu_ms": 0.0, "veces": 0})
+        etapa["pared_ms"] += pared * 1000
+        etapa["cpu_ms"] += cpu * 1000
+        etapa["veces"] += 1
+
+
+def cargar_fuente(ruta, duracion=None):
+    from scipy.io.wavfile import read
+    fs, audio = read(ruta)
+    audio = audio.astype(np.float32)
+    if audio.ndim == 2:
+        audio = audio.mean(axis=1)
+    audio /= np.max(np.abs(audio))
+    if duracion:
+        audio = np.resize(audio, int(duracion * fs))
+    return fs, audio
+
+
+def canal_simulado(senal, fs, snr_db=None, ganancia=0.3, deltaf=0.0, silencio=1.0, semilla=0):
+    from scipy.signal import hilbert
+    if deltaf:
+        # Corrimiento de frecuencia del oscilador del receptor sobre la
+        # señal analítica (desplaza todo el espectro pasabanda)
+        t = np.arange(len(senal)) / fs
+        senal = np.real(hilbert(senal) * np.exp(2j * np.pi * deltaf * t))
+    relleno = np.zeros(int(silencio * fs))
+    recibida = ganancia * np.concatenate((relleno, senal, relleno))
+    if snr_db is not None:
+        rng = np.random.default_rng(semilla)
+        potencia = np.mean((ganancia * senal) ** 2)
+        recibida = recibida + rng.standard_normal(len(recibida)) * np.sqrt(potencia / 10 ** (snr_db / 10))
+    return recibida.astype(np.float32), len(relleno)
+
+
+def snr_recuperado(fuente, recuperado, retardo=None):
+    # Con el retardo conocido (el arnés sabe dónde empieza la señal modulada)
+    # o, si no, por correlación cruzada. La ganancia se ajusta por mínimos
+    # cuadrados y el resto es ruido + distorsión. La continua (la portadora
+    # de SSB-FC tras demodular) no es audible y se descarta
+    fuente = fuente - np.mean(fuente)
+    if retardo is None:
+        from scipy.signal import correlate
+        corr = correlate(recuperado - np.mean(recuperado), fuente, mode="valid", method="fft")
+        retardo = int(np.argmax(np.abs(corr))) if len(corr) else 0
+    tramo = recuperado[retardo:retardo + len(fuente)]
+    tramo = tramo - np.mean(tramo)
+    fuente = fuente[:len(tramo)]
+    ganancia = np.dot(tramo, fuente) / max(np.dot(tramo, tramo), 1e-20)
+    error = fuente - ganancia * tramo
+    return 10 * np.log10(np.sum(fuente ** 2) / max(np.sum(error ** 2), 1e-20)), retardo
+
+
+def corrida(fuente, fs, args, semilla):
+    import dsp_core
+    crono = Cronometro()
+    t_boton = time.perf_counter()
+
+    # --- Transmisor ---
+    modular = {"SC": dsp_core.modulacion_ssb, "FC": dsp_core.modulacion_ssb_fc}[args.tipo]
+    modulada = crono.medir("tx: modulación", modular, fuente, args.banda, fs)
+    trama = crono.medir("tx: enmarcar", dsp_core.enmarcar, modulada, fs)
+
+    # --- Canal ---
+    # El inicio cae en cualquier punto del bloque, como con un micrófono real.
+    # Como demodular_coherente toma t=0 en el primer bloque capturado, eso
+    # también deja una fase de portadora arbitraria (--alineado la anula)
+    silencio = args.silencio
+    if not args.alineado:
+        silencio += np.random.default_rng(semilla).uniform(0, args.bloque)
+    recibida, n_silencio = crono.medir("canal", canal_simulado, trama, fs, args.snr_canal,
+                                       args.ganancia, args.deltaf, silencio, semilla)
+    n_tono = int(fs * dsp_core.DUR_TONO)
+    muestra_inicio_real = n_silencio
+    muestra_fin_real = n_silencio + len(trama) - n_tono
+
+    # --- Receptor, bloque a bloque ---
+    blocksize = int(args.bloque * fs)
+    receptor = dsp_core.ReceptorTramas(fs, dur_max=len(trama) / fs + 1)
+    eventos = {}
+    for i in range(0, len(recibida) - blocksize + 1, blocksize):
+        etapa = "rx: espera de inicio" if receptor.estado == "esperando" else "rx: captura"
+        t0, c0 = time.perf_counter(), time.process_time()
+        evento, _, _ = receptor.procesar(recibida[i:i + blocksize])
+        crono.sumar(etapa, time.perf_counter() - t0, time.process_time() - c0)
+        if evento is not None:
+            # Muestra en la que termina el bloque que disparó el evento
+            eventos[evento] = (i + blocksize, time.perf_counter())
+        if receptor.completo():
+            break
+        if args.velocidad:
+            time.sleep(blocksize / fs / args.velocidad)
+
+    resultado = {"semilla": semilla, "detectado": "inicio" in eventos, "fin": "fin" in eventos}
+    if "inicio" not in eventos:
+        resultado["etapas"] = crono.etapas
+        return resultado
+
+    # --- Demodulación ---
+    audio = crono.medir("rx: demodulación", dsp_core.demodular_coherente,
+                        receptor.mensaje(), fs, phi=args.phi)
+    t_listo = time.perf_counter()
+
+    # La señal modulada empieza un tono después del inicio real de la trama
+    retardo = muestra_inicio_real + n_tono - receptor.muestra_inicio
+    snr, _ = crono.medir("métrica: snr", snr_recuperado, fuente, audio, max(retardo, 0))
+    resultado.update({
+        # Latencias en tiempo de audio: desde que el tono entra al receptor
+        # hasta que termina el bloque que lo detecta
+        "latencia_inicio_ms": (eventos["inicio"][0] - muestra_inicio_real) / fs * 1000,
+        "latencia_fin_ms": ((eventos["fin"][0] - muestra_fin_real) / fs * 1000
+                            if "fin" in eventos else None),
+        # Del fin de la trama en el aire al audio demodulado listo: espera
+        # del bloque que detecta el tono de fin + demodulación
+        "fin_a_audio_ms": (((eventos["fin"][0] - muestra_fin_real) / fs +
+                            (t_listo - eventos["fin"][1])) * 1000 if "fin" in eventos else None),
+        # Botón -> audio en tiempo real: cómputo del transmisor + trama en
+        # el aire (con el silencio previo) + lo anterior
+        "boton_a_audio_ms": None,
+        "arnes_pared_ms": (t_listo - t_boton) * 1000,
+        "snr_db": snr,
+        "duracion_trama_s": len(trama) / fs,
+    })
+    if resultado["fin_a_audio_ms"] is not None:
+        tx = sum(e["pared_ms"] for n, e in crono.etapas.items() if n.startswith("tx"))
+        resultado["boton_a_audio_ms"] = (tx + (n_silencio + len(trama)) / fs * 1000 +
+                                         resultado["fin_a_audio_ms"])
+    resultado["etapas"] = crono.etapas
+    return resultado
+
+
+class EstadoRegistrado:
+    # Ocupa el lugar de la etiqueta de estado del modulador
+    def __init__(self):
+        self.mensajes = []
+
+    def set(self, texto):
+        self.mensajes.append(texto)
+
+
+def corrida_boton(args, semilla, directorio):
+    import dsp_core
+    import cache_modulacion
+    import CE_taller_P2_modulacion as modulador
+    from audio_backend import BackendLoopback, establecer_backend, sd
+    from ventanas_graficas import ProcesoGraficas
+
+    # cargar_fuente normaliza igual que cargar_audio del modulador
+    fs, fuente = cargar_fuente(args.audio)
+    silencio = args.silencio
+    if not args.alineado:
+        silencio += np.random.default_rng(semilla).uniform(0, args.bloque)
+    establecer_backend(BackendLoopback(
+        samplerate=fs, velocidad=None,
+        canal=lambda senal: canal_simulado(senal, fs, args.snr_canal, args.ganancia, args.deltaf,
+                                           silencio, semilla)[0]))
+    modulador.archivo_baja = modulador.archivo_alta = args.audio
+    modulador.graficas = ProcesoGraficas("no")
+    modulador.estado_var = estado = EstadoRegistrado()
+    cache_modulacion.CACHE_DIR = directorio
+
+    crono = Cronometro()
+    receptor = dsp_core.ReceptorTramas(fs, dur_max=len(fuente) / fs + 2 * args.silencio + 2)
+    eventos = {}
+
+    def callback(indata, frames, time_info, status):
+        evento, _, _ = receptor.procesar(indata[:, 0])
+        if evento is not None:
+            eventos[evento] = time.perf_counter()
+        if receptor.completo():
+            raise sd.CallbackStop()
+
+    t_boton = time.perf_counter()
+    with sd.InputStream(callback=callback, blocksize=int(args.bloque * fs)) as stream:
+        # Vuelve cuando el receptor consumió la trama (sd.wait del loopback)
+        crono.medir("botón: ejecutar_modulacion", modulador.ejecutar_modulacion, args.tipo, args.banda)
+        while stream.active and not receptor.completo():
+            time.sleep(0.01)
+
+    errores = [m for m in estado.mensajes if m.startswith("❌")]
+    resultado = {"semilla": semilla, "detectado": "inicio" in eventos, "fin": "fin" in eventos,
+                 "estado": estado.mensajes, "errores": errores}
+    if "inicio" not in eventos or errores:
+        resultado["etapas"] = crono.etapas
+        return resultado
+
+    audio = crono.medir("rx: demodulación", dsp_core.demodular_coherente,
+                        receptor.mensaje(), fs, phi=args.phi)
+    t_listo = time.perf_counter()
+    snr, _ = crono.medir("métrica: snr", snr_recuperado, fuente, audio)
+    resultado.update({
+        "fin_a_audio_ms": (t_listo - eventos["fin"]) * 1000 if "fin" in eventos else None,
+        "arnes_pared_ms": (t_listo - t_boton) * 1000,
+        "snr_db": snr,
+        "etapas": crono.etapas,
+    })
+    return resultado
+
+
+def _mediana(corridas, clave):
+    valores = [c[clave] for c in corridas if c.get(clave) is not None]
+    return float(np.median(valores)) if valores else None
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--audio", default=ARCHIVO_DEFECTO)
+    p.add_argument("--duracion", type=float, default=None,
+                   help="Repetir/recortar la fuente a esta duración [s]")
+    p.add_argument("--tipo", choices=("SC", "FC"), default="SC")
+    p.add_argument("--banda", choices=("USB", "LSB"), default="USB")
+    p.add_argument("--snr-canal", type=float, default=30.0,
+                   help="SNR del canal en dB (sin ruido: --snr-canal inf)")
+    p.add_argument("--ganancia", type=float, default=0.3)
+    p.add_argument("--deltaf", type=float, default=0.0, help="Corrimiento de frecuencia [Hz]")
+    p.add_argument("--phi", type=float, default=0.0, help="Fase del oscilador del receptor [rad]")
+    p.add_argument("--silencio", type=float, default=1.0, help="Silencio antes y después [s]")
+    p.add_argument("--bloque", type=float, default=0.1, help="Bloque del receptor [s]")
+    p.add_argument("--alineado", action="store_true",
+                   help="Trama alineada a los bloques (fase de portadora 0)")
+    p.add_argument("--velocidad", type=float, default=None,
+                   help="Múltiplo del tiempo real (por defecto, sin pausas)")
+    p.add_argument("--boton", action="store_true",
+                   help="Transmitir con ejecutar_modulacion del modulador (backend loopback)")
+    p.add_argument("--repeticiones", type=int, default=5)
+    p.add_argument("--json", default=None, help="Guardar las corridas en este archivo")
+    args = p.parse_args(argv)
+    if args.snr_canal == float("inf"):
+        args.snr_canal = None
+
+    fs, fuente = cargar_fuente(args.audio, args.duracion)
+    if args.boton:
+        import tempfile
+        with tempfile.TemporaryDirectory() as directorio:
+            corridas = [corrida_boton(args, semilla, directorio) for semilla in range(args.repeticiones)]
+        for c in corridas:
+            for error in c["errores"]:
+                print(f"[ERROR] corrida {c['semilla']}: {error}")
+    else:
+        corridas = [corrida(fuente, fs, args, semilla) for semilla in range(args.repeticiones)]
+
+    detectadas = sum(c["detectado"] and c["fin"] for c in corridas)
+    print(f"Fuente: {os.path.basename(args.audio)} ({len(fuente) / fs:.1f} s, {fs} Hz)  "
+          f"{args.tipo}-{args.banda}  SNR canal: {args.snr_canal} dB  Δf: {args.deltaf} Hz")
+    print(f"Tramas completas: {detectadas}/{len(corridas)}")
+    for clave, etiqueta in (("latencia_inicio_ms", "Detección inicio"),
+                            ("latencia_fin_ms", "Detección fin"),
+                            ("fin_a_audio_ms", "Fin trama -> audio"),
+                            ("boton_a_audio_ms", "Botón -> audio (t. real)"),
+                            ("arnes_pared_ms", "Arnés (pared)"),
+                            ("snr_db", "SNR recuperada [dB]")):
+        valor = _mediana(corridas, clave)
+        valores = [c[clave] for c in corridas if c.get(clave) is not None]
+        rango = f"  ({min(valores):.1f} .. {max(valores):.1f})" if len(valores) > 1 else ""
+        print(f"  {etiqueta:<26} {'-' if valor is None else f'{valor:10.1f}'}{rango}")
+
+    print(f"\n  {'Etapa (mediana)':<26} {'pared ms':>10} {'CPU ms':>10} {'llamadas':>9}")
+    for nombre in corridas[0]["etapas"]:
+        filas = [c["etapas"][nombre] for c in corridas if nombre in c["etapas"]]
+        print(f"  {nombre:<26} {np.median([f['pared_ms'] for f in filas]):>10.2f} "
+              f"{np.median([f['cpu_ms'] for f in filas]):>10.2f} {filas[0]['veces']:>9}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"parametros": vars(args), "corridas": corridas}, f, indent=2,
+                      ensure_ascii=False)
+    return 0 if detectadas == len(corridas) and not any(c.get("errores") for c in corridas) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,266 @@
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from e2e_loopback import canal_simulado
+
+# === Matriz calidad / costo de la demodulación coherente ===
+# Barre familia de filtro (Butterworth, Chebyshev I, elíptico, Bessel, FIR),
+# orden, implementación (filtfilt, sosfiltfilt, sosfilt, lfilter y FIR por
+# overlap-save) y el pasabanda previo de 9-11 kHz de BK/demod_GUI.py, contra
+# errores de fase/frecuencia del oscilador y SNR del canal. Por celda: SINAD
+# del audio recuperado y tiempo de CPU de la demodulación (mezcla + filtros).
+# Al final, la frontera de Pareto de SINAD mediana contra costo.
+#
+# La SINAD es la clásica de tono de prueba: potencia total sobre potencia sin
+# la fundamental (ruido + distorsión), en el espectro del audio demodulado.
+# Una comparación muestra a muestra contra la fuente no sirve acá: en SSB un
+# Δf de unos Hz corre todo el audio en frecuencia y un error de fase lo rota
+# hacia su transformada de Hilbert; se oye bien pero la forma de onda ya no
+# coincide. Con el tono, Δf sólo lo corre de lugar y los retardos de los
+# filtros causales no importan.
+
+FAMILIAS_IIR = ("butter", "cheby1", "ellip", "bessel")
+IMPLEMENTACIONES_IIR = ("filtfilt", "sosfiltfilt", "sosfilt", "lfilter")
+ACTUAL = ("butter", 6, "filtfilt", False)  # dsp_core.demodular_coherente
+
+
+def _lista(texto, tipo=float):
+    return [tipo(v) for v in texto.split(",") if v.strip()]
+
+
+def disenar_iir(familia, orden, corte, fs, salida="ba"):
+    from scipy import signal
+    wn = corte / (fs / 2)
+    if familia == "butter":
+        return signal.butter(orden, wn, btype="low", output=salida)
+    if familia == "cheby1":
+        return signal.cheby1(orden, 0.5, wn, btype="low", output=salida)
+    if familia == "ellip":
+        return signal.ellip(orden, 0.5, 60, wn, btype="low", output=salida)
+    if familia == "bessel":
+        return signal.bessel(orden, wn, btype="low", norm="phase", output=salida)
+    raise ValueError(f"familia desconocida: {familia}")
+
+
+def filtrar_overlap_save(h, x, n_fft=None):
+    # Convolución lineal por bloques en frecuencia: todas las ventanas de
+    # n_fft (con salto L = n_fft - M + 1) se transforman en una sola rfft 2-D
+    M = len(h)
+    n_fft = n_fft or 1 << int(np.ceil(np.log2(8 * M)))
+    L = n_fft - M + 1
+    n_bloques = int(np.ceil((len(x) + M - 1) / L))
+    xp = np.concatenate((np.zeros(M - 1), x, np.zeros(n_bloques * L - len(x))))
+    ventanas = np.lib.stride_tricks.sliding_window_view(xp, n_fft)[::L][:n_bloques]
+    Y = np.fft.rfft(ventanas, axis=1) * np.fft.rfft(h, n_fft)
+    y = np.fft.irfft(Y, n_fft, axis=1)[:, M - 1:].reshape(-1)
+    # FIR de fase lineal: se descuenta el retardo de grupo (M-1)/2
+    retardo = (M - 1) // 2
+    return y[retardo:retardo + len(x)]
+
+
+class Configuracion:
+    def __init__(self, familia, orden, implementacion, pasabanda):
+        self.familia = familia
+        self.orden = orden
+        self.implementacion = implementacion
+        self.pasabanda = pasabanda
+
+    def clave(self):
+        return (self.familia, self.orden, self.implementacion, self.pasabanda)
+
+    def nombre(self):
+        orden = f"{self.orden} taps" if self.familia == "fir" else f"orden {self.orden}"
+        previo = " + BP 9-11k" if self.pasabanda else ""
+        return f"{self.familia} {orden} {self.implementacion}{previo}"
+
+    def preparar(self, fs, fc, corte):
+        # Coeficientes fuera de la medición: en los receptores se diseñan una vez
+        from scipy import signal
+        if self.familia == "fir":
+            self.h = signal.firwin(self.orden, corte, fs=fs)
+        elif self.implementacion in ("filtfilt", "lfilter"):
+            self.ba = disenar_iir(self.familia, self.orden, corte, fs, "ba")
+        else:
+            self.sos = disenar_iir(self.familia, self.orden, corte, fs, "sos")
+        if self.pasabanda:
+            # El de BK/demod_GUI.py: Butterworth 8 (16 polos), 9-11 kHz, filtfilt
+            self.ba_pb = signal.butter(8, [(fc - 1000) / (fs / 2), (fc + 1000) / (fs / 2)],
+                                       btype="band")
+        return self
+
+    def demodular(self, recibida, fs, fc, phi, deltaf):
+        from scipy import signal
+        if self.pasabanda:
+            recibida = signal.filtfilt(*self.ba_pb, recibida)
+        t = np.arange(len(recibida)) / fs
+        baseband = recibida * np.cos(2 * np.pi * (fc + deltaf) * t + phi)
+        if self.familia == "fir":
+            audio = filtrar_overlap_save(self.h, baseband)
+        elif self.implementacion == "filtfilt":
+            audio = signal.filtfilt(*self.ba, baseband)
+        elif self.implementacion == "lfilter":
+            audio = signal.lfilter(*self.ba, baseband)
+        elif self.implementacion == "sosfiltfilt":
+            audio = signal.sosfiltfilt(self.sos, baseband)
+        else:
+            audio = signal.sosfilt(self.sos, baseband)
+        pico = np.max(np.abs(audio))
+        return audio / pico if np.isfinite(pico) and pico > 0 else audio
+
+
+def configuraciones(args):
+    for familia, orden, impl, pb in itertools.product(args.familias, args.ordenes,
+                                                      args.implementaciones, args.pasabanda):
+        yield Configuracion(familia, orden, impl, pb)
+    for taps, pb in itertools.product(args.taps, args.pasabanda):
+        yield Configuracion("fir", taps, "overlap-save", pb)
+
+
+def sinad(audio, fs, descarte=0.05, min_hz=20.0, lobulo=6):
+    # Sin los bordes (transitorios de los filtros) ni la continua (la
+    # portadora de SSB-FC tras demodular). La fundamental es el pico del
+    # espectro con ventana Blackman-Harris, ±lobulo bins
+    if not np.all(np.isfinite(audio)):
+        return float("nan")
+    from scipy.signal.windows import blackmanharris
+    n = int(descarte * fs)
+    x = audio[n:len(audio) - n]
+    x = x - np.mean(x)
+    P = np.abs(np.fft.rfft(x * blackmanharris(len(x)))) ** 2
+    P = P[int(np.ceil(min_hz * len(x) / fs)):]
+    k = int(np.argmax(P))
+    total = np.sum(P)
+    resto = total - np.sum(P[max(k - lobulo, 0):k + lobulo + 1])
+    return float(10 * np.log10(total / max(resto, 1e-30)))
+
+
+def costo(config, recibida, fs, fc, repeticiones):
+    # Mediana de CPU y de pared; las corridas son de un solo hilo
+    cpu, pared = [], []
+    config.demodular(recibida, fs, fc, 0.0, 0.0)
+    for _ in range(repeticiones):
+        t0, c0 = time.perf_counter(), time.process_time()
+        config.demodular(recibida, fs, fc, 0.0, 0.0)
+        pared.append((time.perf_counter() - t0) * 1000)
+        cpu.append((time.process_time() - c0) * 1000)
+    return float(np.median(cpu)), float(np.median(pared))
+
+
+def pareto(filas):
+    # Más barata primero; entra si mejora la SINAD de todas las más baratas
+    frontera = []
+    mejor = -np.inf
+    for fila in sorted(filas, key=lambda f: (f["cpu_ms"], -np.nan_to_num(f["sinad_mediana"], nan=-np.inf))):
+        if np.isfinite(fila["sinad_mediana"]) and fila["sinad_mediana"] > mejor:
+            frontera.append(fila)
+            mejor = fila["sinad_mediana"]
+    return frontera
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--tono", type=float, default=1000.0, help="Tono de prueba [Hz]")
+    p.add_argument("--duracion", type=float, default=3.0, help="Duración de la fuente [s]")
+    p.add_argument("--tipo", choices=("SC", "FC"), default="SC")
+    p.add_argument("--banda", choices=("USB", "LSB"), default="USB")
+    p.add_argument("--corte", type=float, default=4000.0)
+    p.add_argument("--familias", type=lambda s: s.split(","), default=list(FAMILIAS_IIR))
+    p.add_argument("--ordenes", type=lambda s: _lista(s, int), default=[4, 6, 8])
+    p.add_argument("--implementaciones", type=lambda s: s.split(","),
+                   default=list(IMPLEMENTACIONES_IIR))
+    p.add_argument("--taps", type=lambda s: _lista(s, int), default=[65, 129, 257],
+                   help="Largos del FIR (overlap-save); vacío para omitirlo")
+    p.add_argument("--pasabanda", type=lambda s: [v == "si" for v in s.split(",")],
+                   default=[False, True], help="Pasabanda previo 9-11 kHz: no,si")
+    p.add_argument("--phi", type=_lista, default=[0.0, 0.3], help="Errores de fase [rad]")
+    p.add_argument("--deltaf", type=_lista, default=[0.0, 10.0], help="Errores de frecuencia [Hz]")
+    p.add_argument("--snr", type=_lista, default=[10.0, 20.0, 40.0], help="SNR del canal [dB]")
+    p.add_argument("--repeticiones", type=int, default=5)
+    p.add_argument("--json", default=None)
+    args = p.parse_args(argv)
+
+    import dsp_core
+    fs, fc = dsp_core.FS, dsp_core.FC
+    fuente = 0.9 * np.sin(2 * np.pi * args.tono * np.arange(int(args.duracion * fs)) / fs)
+    modular = {"SC": dsp_core.modulacion_ssb, "FC": dsp_core.modulacion_ssb_fc}[args.tipo]
+    modulada = modular(fuente, args.banda, fs)
+
+    condiciones = list(itertools.product(args.phi, args.deltaf, args.snr))
+    recibidas = {snr: canal_simulado(modulada, fs, snr, ganancia=1.0, silencio=0.0, semilla=0)[0]
+                 .astype(np.float64) for snr in args.snr}
+
+    configs = [c.preparar(fs, fc, args.corte) for c in configuraciones(args)]
+    print(f"Tono de {args.tono:g} Hz ({args.duracion:g} s)  "
+          f"{args.tipo}-{args.banda}  {len(configs)} filtros x {len(condiciones)} condiciones")
+
+    filas = []
+    for config in configs:
+        cpu_ms, pared_ms = costo(config, recibidas[args.snr[0]], fs, fc, args.repeticiones)
+        celdas = []
+        for phi, deltaf, snr in condiciones:
+            audio = config.demodular(recibidas[snr], fs, fc, phi, deltaf)
+            celdas.append({"phi": phi, "deltaf": deltaf, "snr_canal": snr,
+                           "sinad_db": sinad(audio, fs)})
+        valores = np.array([c["sinad_db"] for c in celdas])
+        fila = {
+            "filtro": config.nombre(), "familia": config.familia, "orden": config.orden,
+            "implementacion": config.implementacion, "pasabanda": config.pasabanda,
+            "actual": config.clave() == ACTUAL,
+            "cpu_ms": cpu_ms, "pared_ms": pared_ms,
+            "ms_por_s": cpu_ms / (len(fuente) / fs),
+            "sinad_mediana": float(np.median(valores)) if np.all(np.isfinite(valores)) else float("nan"),
+            "sinad_min": float(np.min(valores)) if np.all(np.isfinite(valores)) else float("nan"),
+            "sinad_por_snr": {snr: float(np.median([c["sinad_db"] for c in celdas if c["snr_canal"] == snr]))
+                              for snr in args.snr},
+            "celdas": celdas,
+        }
+        filas.append(fila)
+
+    columnas_snr = "".join(f"{f'@{snr:g}dB':>8}" for snr in args.snr)
+    encabezado = f"  {'Filtro':<38} {'CPU ms':>8} {'ms/s':>7} {'SINAD':>7} {'mín':>7}{columnas_snr}"
+
+    def imprimir(fila, marca=""):
+        por_snr = "".join(f"{v:8.1f}" for v in fila["sinad_por_snr"].values())
+        print(f"{marca:1} {fila['filtro']:<38} {fila['cpu_ms']:8.2f} {fila['ms_por_s']:7.2f} "
+              f"{fila['sinad_mediana']:7.1f} {fila['sinad_min']:7.1f}{por_snr}")
+
+    frontera = pareto(filas)
+    en_frontera = {id(f) for f in frontera}
+    print("\nMatriz (SINAD en dB, mediana sobre fase/frecuencia/SNR; * = Pareto, > = actual)")
+    print(encabezado)
+    for fila in sorted(filas, key=lambda f: f["cpu_ms"]):
+        imprimir(fila, ">" if fila["actual"] else "*" if id(fila) in en_frontera else "")
+
+    print("\nFrontera de Pareto (SINAD mediana contra CPU)")
+    print(encabezado)
+    for fila in frontera:
+        imprimir(fila, ">" if fila["actual"] else "")
+    actual = next((f for f in filas if f["actual"]), None)
+    if actual is not None:
+        mejor = next((f for f in frontera if f["sinad_mediana"] >= actual["sinad_mediana"]), None)
+        if mejor is not None and mejor is not actual:
+            print(f"\nActual ({actual['filtro']}): {actual['sinad_mediana']:.1f} dB en "
+                  f"{actual['cpu_ms']:.2f} ms. En la frontera, {mejor['filtro']} da "
+                  f"{mejor['sinad_mediana']:.1f} dB en {mejor['cpu_ms']:.2f} ms.")
+
+    inestables = [f["filtro"] for f in filas if not np.isfinite(f["sinad_mediana"])]
+    if inestables:
+        print(f"\n⚠️ Inestables (salida no finita): {', '.join(inestables)}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"parametros": vars(args), "filas": filas, "pareto": [f["filtro"] for f in frontera]},
+                      f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,178 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# === Memoria pico de las cadenas con señales largas ===
+# Cada (cadena, duración) corre en un intérprete nuevo, así el pico de RSS
+# (ru_maxrss) es sólo suyo. La entrada se arma antes de medir y la memoria se
+# informa como múltiplo de su tamaño:
+#   receptor  -> demod_gui02.procesar_captura, lo que hace su hilo tras la
+#                captura: bloques float32 de 0.1 s -> concatenate ->
+#                demodular_coherente -> .wav int16 -> pirámide min/max
+#   modulador -> audio float32 de cargar_audio -> modulacion_ssb -> enmarcar
+#   isb       -> dos audios -> modulacion_isb -> enmarcar
+# Se mide el pico de tracemalloc (numpy le informa sus reservas) y el de RSS
+# por encima del RSS previo. Falla (código 1) si alguno supera el múltiplo
+# permitido. Los casos cuyo pico estimado no entra en --max-gb se omiten.
+
+FS = 44100
+# Múltiplos de la entrada permitidos (medidos + margen). La entrada del
+# receptor es float32 y todo lo que sigue es float64: cada temporal de largo
+# completo suma 2x
+MULTIPLO_MAX = {"receptor": 15.0, "modulador": 15.0, "isb": 9.0}
+
+
+def _rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+
+def _rss_pico_mb():
+    import resource
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kB en Linux, bytes en macOS
+    return pico / 1e6 if sys.platform == "darwin" else pico / 1e3
+
+
+def _memoria_disponible_gb():
+    try:
+        with open("/proc/meminfo") as f:
+            for linea in f:
+                if linea.startswith("MemAvailable:"):
+                    return int(linea.split()[1]) / 1e6
+    except OSError:
+        pass
+    return 8.0
+
+
+def _ruido(rng, n):
+    # float32 directo, sin un float64 intermedio que suba el pico de RSS
+    x = rng.standard_normal(n, dtype=np.float32)
+    x *= 0.3
+    return x
+
+
+def preparar(cadena, minutos):
+    rng = np.random.default_rng(0)
+    n = int(minutos * 60 * FS)
+    if cadena == "receptor":
+        bloque = int(0.1 * FS)
+        return [_ruido(rng, bloque) for _ in range(n // bloque)]
+    if cadena == "modulador":
+        return [_ruido(rng, n)]
+    return [_ruido(rng, n), _ruido(rng, n)]
+
+
+def correr(cadena, entrada, directorio):
+    import dsp_core
+    if cadena == "receptor":
+        # La función del hilo de trabajo, no una copia: escribe en el cwd
+        from demod_gui02 import procesar_captura
+        anterior = os.getcwd()
+        os.chdir(directorio)
+        try:
+            return procesar_captura(entrada, FS, dsp_core.FC)
+        finally:
+            os.chdir(anterior)
+    if cadena == "modulador":
+        return dsp_core.enmarcar(dsp_core.modulacion_ssb(entrada[0], "USB", FS), FS)
+    return dsp_core.enmarcar(dsp_core.modulacion_isb(entrada[0], entrada[1], FS), FS)
+
+
+def hijo(cadena, minutos):
+    import tracemalloc
+    with tempfile.TemporaryDirectory() as directorio:
+        # Calentamiento: imports perezosos y cachés de scipy fuera de la medición
+        correr(cadena, preparar(cadena, 1 / 60), directorio)
+        entrada = preparar(cadena, minutos)
+        entrada_mb = sum(x.nbytes for x in entrada) / 1e6
+        rss_antes = _rss_mb()
+        rss_pico_antes = _rss_pico_mb()
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        salida = correr(cadena, entrada, directorio)
+        duracion = time.perf_counter() - t0
+        _, pico_traza = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del salida
+    return {
+        "cadena": cadena, "minutos": minutos, "entrada_mb": entrada_mb,
+        "tracemalloc_mb": pico_traza / 1e6,
+        "rss_extra_mb": max(_rss_pico_mb() - max(rss_antes, 0), 0.0),
+        "rss_pico_previo_mb": rss_pico_antes,
+        "segundos": duracion,
+    }
+
+
+def medir(cadena, minutos):
+    r = subprocess.run([sys.executable, os.path.abspath(__file__), "--hijo", cadena, str(minutos)],
+                       capture_output=True, text=True)
+    if r.returncode != 0:
+        return {"cadena": cadena, "minutos": minutos, "error": r.stderr.strip()[-500:]}
+    return json.loads(r.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--cadenas", nargs="+", choices=sorted(MULTIPLO_MAX),
+                   default=["receptor", "modulador", "isb"])
+    p.add_argument("--minutos", type=float, nargs="+", default=[1, 10, 60])
+    p.add_argument("--max-multiplo", type=float, default=None,
+                   help="Múltiplo permitido para todas las cadenas (por defecto, MULTIPLO_MAX)")
+    p.add_argument("--max-gb", type=float, default=None,
+                   help="Omitir casos cuyo pico estimado supere esto (defecto: 80 %% de la libre)")
+    p.add_argument("--json", default=None)
+    p.add_argument("--hijo", nargs=2, metavar=("CADENA", "MINUTOS"), help=argparse.SUPPRESS)
+    args = p.parse_args(argv)
+
+    if args.hijo:
+        print(json.dumps(hijo(args.hijo[0], float(args.hijo[1]))))
+        return 0
+
+    max_gb = args.max_gb or 0.8 * _memoria_disponible_gb()
+    ok = True
+    resultados = []
+    print(f"{'cadena':<10} {'min':>5} {'entrada MB':>11} {'tracemalloc MB':>15} {'x':>6} "
+          f"{'RSS extra MB':>13} {'x':>6} {'límite':>7} {'s':>7}")
+    for cadena in args.cadenas:
+        limite = args.max_multiplo or MULTIPLO_MAX[cadena]
+        for minutos in args.minutos:
+            entradas = 1 if cadena != "isb" else 2
+            estimado_gb = minutos * 60 * FS * 4 * entradas * (MULTIPLO_MAX[cadena] + 1) / 1e9
+            if estimado_gb > max_gb:
+                print(f"{cadena:<10} {minutos:>5g}  ⏭️ omitido: pico estimado {estimado_gb:.1f} GB "
+                      f"> {max_gb:.1f} GB")
+                resultados.append({"cadena": cadena, "minutos": minutos, "omitido": True,
+                                   "estimado_gb": estimado_gb})
+                continue
+            r = medir(cadena, minutos)
+            resultados.append(r)
+            if "error" in r:
+                ok = False
+                print(f"{cadena:<10} {minutos:>5g}  ❌ {r['error']}")
+                continue
+            x_traza = r["tracemalloc_mb"] / r["entrada_mb"]
+            x_rss = r["rss_extra_mb"] / r["entrada_mb"]
+            r.update({"multiplo_tracemalloc": x_traza, "multiplo_rss": x_rss, "limite": limite})
+            falla = max(x_traza, x_rss) > limite
+            ok &= not falla
+            print(f"{cadena:<10} {minutos:>5g} {r['entrada_mb']:>11.1f} {r['tracemalloc_mb']:>15.1f} "
+                  f"{x_traza:>6.1f} {r['rss_extra_mb']:>13.1f} {x_rss:>6.1f} {limite:>7.1f} "
+                  f"{r['segundos']:>7.2f} {'❌' if falla else '✅'}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"max_gb": max_gb, "resultados": resultados}, f, indent=2, ensure_ascii=False)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,257 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from e2e_loopback import ARCHIVO_DEFECTO, cargar_fuente
+
+# === Curvas ROC de la detección de tonos (Monte Carlo vectorizado) ===
+# Genera miles de bloques de una vez como arreglo 2-D (filas = bloques):
+# tono presente o ausente, con fase al azar, ruido blanco a varias SNR,
+# corrimiento de frecuencia e interferencia en banda de voz. Cada lote se
+# evalúa con dsp_core.energias_tono (una sola FFT por lote, la misma
+# decisión que detectar_tono) y barriendo el umbral salen Pd y Pfa por
+# condición. Detectores: inicio (7000 Hz, UMBRAL_INICIO) y fin (5000 Hz,
+# UMBRAL_FIN).
+#
+# Interferencias, con potencia relativa al tono dada por --sir:
+#   ninguna -> sólo ruido
+#   voz     -> tramos al azar del audio de prueba (gente hablando cerca del
+#              micrófono)
+#   mensaje -> ese audio modulado en LSB (6-10 kHz): otra transmisión, o la
+#              propia trama mientras el detector de fin la escucha
+#
+# La SNR es potencia del tono sobre potencia del ruido en toda la banda
+# (0 a fs/2), no en el bin: con bloques de 0.1 s la FFT suma ~30 dB.
+#
+# El umbral sugerido sale de la cota superior de Pfa al 95 % (Clopper-
+# Pearson), no de la Pfa observada: sin falsas alarmas en n bloques la cota
+# es ~3/n, así que la clase ausente usa por defecto n >= 3/Pfa objetivo.
+#
+# Las listas van separadas por comas y, si empiezan con un valor negativo,
+# con "=" (argparse toma "-30,-20" suelto por una opción):
+#   python benchmarks/roc_tonos.py --snr=-30,-25,-20 --desvios=-15,0,15
+
+DETECTORES = {"inicio": ("TONO_INICIO", "UMBRAL_INICIO"), "fin": ("TONO_FIN", "UMBRAL_FIN")}
+INTERFERENCIAS = ("ninguna", "voz", "mensaje")
+
+
+def _lista(texto):
+    return [float(v) for v in texto.split(",") if v.strip()]
+
+
+def fuentes_interferencia(fs, ruta):
+    import dsp_core
+    _, voz = cargar_fuente(ruta)
+    voz = voz - np.mean(voz)
+    mensaje = dsp_core.modulacion_ssb(voz, "LSB", fs)
+    # Potencia unitaria: --sir fija la escala
+    return {"voz": voz / np.sqrt(np.mean(voz ** 2)),
+            "mensaje": mensaje / np.sqrt(np.mean(mensaje ** 2))}
+
+
+def generar_lote(rng, n, N, fs, tono, presente, snr_db, desvio, interferencia, sir_db):
+    # n filas de N muestras. Tono de amplitud 1 (potencia 0.5)
+    t = np.arange(N) / fs
+    fase = rng.uniform(0, 2 * np.pi, (n, 1))
+    sigma = np.sqrt(0.5 / 10 ** (np.asarray(snr_db, dtype=float).reshape(-1, 1) / 10))
+    lote = rng.standard_normal((n, N)) * sigma
+    if presente is not None:
+        lote += presente[:, None] * np.sin(2 * np.pi * (tono + desvio) * t + fase)
+    if interferencia is not None:
+        # Tramos al azar de la fuente, juntados con un índice 2-D
+        inicios = rng.integers(0, len(interferencia) - N, n)
+        lote += interferencia[inicios[:, None] + np.arange(N)] * np.sqrt(0.5 / 10 ** (sir_db / 10))
+    return lote
+
+
+def pfa_superior(falsas, n, confianza=0.95):
+    # Cota superior exacta (Clopper-Pearson) de una proporción binomial
+    from scipy.stats import beta
+    falsas = np.asarray(falsas)
+    cota = beta.ppf(confianza, falsas + 1, np.maximum(n - falsas, 1))
+    return np.where(falsas >= n, 1.0, cota)
+
+
+def evaluar(energia_tono, energia_promedio, umbrales):
+    # (filas, umbrales): la decisión de detectar_tono para cada umbral
+    return energia_tono[:, None] > energia_promedio[:, None] * umbrales[None, :]
+
+
+def comparar_con_bucle(rng, N, fs, tono, filas=400):
+    # La decisión por lote debe coincidir con detectar_tono bloque a bloque;
+    # de paso, el rendimiento de cada forma
+    import dsp_core
+    lote = generar_lote(rng, filas, N, fs, tono, rng.uniform(0, 0.05, filas), 10.0, 0.0, None, 0.0)
+    t0 = time.perf_counter()
+    en_bucle = np.array([dsp_core.detectar_tono(b, tono, fs)[0] for b in lote])
+    t_bucle = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    e, m = dsp_core.energias_tono(lote, tono, fs)
+    t_lote = time.perf_counter() - t0
+    return int(np.sum(evaluar(e, m, np.array([10.0]))[:, 0] != en_bucle)), filas / t_bucle, filas / t_lote
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--audio", default=ARCHIVO_DEFECTO, help="Fuente de la interferencia de voz")
+    p.add_argument("--bloque", type=float, default=0.1, help="Largo del bloque [s]")
+    p.add_argument("--bloques", type=int, default=1000, help="Bloques por condición con tono")
+    p.add_argument("--bloques-ausente", type=int, default=None,
+                   help="Bloques sin tono por interferencia (defecto: el mayor entre --bloques y "
+                        "3/--pfa-objetivo)")
+    p.add_argument("--snr", type=_lista, default=[-35, -30, -25, -20, -15, -10, 0],
+                   help="SNR del tono en toda la banda [dB], ej. --snr=-30,-20 (con \"=\" si "
+                        "empieza en negativo)")
+    p.add_argument("--desvios", type=_lista, default=[0, 15, 30, 45],
+                   help="Corrimiento del tono [Hz] (la ventana es ±MARGEN_TONO), ej. --desvios=-15,0,15")
+    p.add_argument("--sir", type=float, default=-20.0,
+                   help="Tono sobre interferencia [dB] (negativo: la interferencia es más fuerte)")
+    p.add_argument("--umbrales", type=int, default=60, help="Puntos de la curva ROC")
+    p.add_argument("--pfa-objetivo", type=float, default=1e-3)
+    p.add_argument("--semilla", type=int, default=0)
+    p.add_argument("--csv", default=None, help="Curvas ROC completas")
+    p.add_argument("--json", default=None)
+    p.add_argument("--png", default=None, help="Gráfica de las curvas ROC")
+    args = p.parse_args(argv)
+
+    import dsp_core
+    fs = dsp_core.FS
+    N = int(args.bloque * fs)
+    rng = np.random.default_rng(args.semilla)
+    umbrales = np.unique(np.concatenate((np.logspace(0, 2.5, args.umbrales),
+                                         [dsp_core.UMBRAL_INICIO, dsp_core.UMBRAL_FIN])))
+    fuentes = fuentes_interferencia(fs, args.audio)
+    minimo_ausente = int(np.ceil(3 / args.pfa_objetivo))
+    n_ausente = args.bloques_ausente or max(args.bloques, minimo_ausente)
+    if n_ausente < minimo_ausente:
+        print(f"⚠️ Con {n_ausente} bloques sin tono no se puede mostrar Pfa ≤ {args.pfa_objetivo:g} "
+              f"(hacen falta ≥ {minimo_ausente})")
+    snr = np.repeat(args.snr, args.bloques)
+
+    curvas = []
+    muestras = 0
+    t_total = 0.0
+    for detector, (nombre_tono, nombre_umbral) in DETECTORES.items():
+        tono = getattr(dsp_core, nombre_tono)
+        for interferencia in INTERFERENCIAS:
+            fuente = fuentes.get(interferencia)
+            # Sin tono: una sola clase por interferencia (con el ruido de la
+            # SNR más alta, el peor caso relativo de la interferencia)
+            ausente = generar_lote(rng, n_ausente, N, fs, tono, None, max(args.snr), 0.0,
+                                   fuente, args.sir)
+            t0 = time.perf_counter()
+            e, m = dsp_core.energias_tono(ausente, tono, fs)
+            t_total += time.perf_counter() - t0
+            muestras += len(ausente)
+            pfa = evaluar(e, m, umbrales).mean(axis=0)
+            del ausente
+            for desvio in args.desvios:
+                presente = generar_lote(rng, len(snr), N, fs, tono, np.ones(len(snr)), snr, desvio,
+                                        fuente, args.sir)
+                t0 = time.perf_counter()
+                e, m = dsp_core.energias_tono(presente, tono, fs)
+                t_total += time.perf_counter() - t0
+                muestras += len(presente)
+                decision = evaluar(e, m, umbrales)
+                del presente
+                for valor in args.snr:
+                    pd = decision[snr == valor].mean(axis=0)
+                    curvas.append({"detector": detector, "interferencia": interferencia,
+                                   "desvio_hz": desvio, "snr_db": valor,
+                                   "umbrales": umbrales, "pd": pd, "pfa": pfa})
+
+    errores, por_s_bucle, por_s_lote = comparar_con_bucle(rng, N, fs, dsp_core.TONO_INICIO)
+    print(f"Bloques de {args.bloque * 1000:.0f} ms, {args.bloques} por condición con tono, "
+          f"{n_ausente} sin tono por interferencia, SIR {args.sir:g} dB")
+    print(f"Rendimiento: lote {muestras / t_total:,.0f} bloques/s "
+          f"(bucle con detectar_tono: {por_s_bucle:,.0f} bloques/s, x{por_s_lote / por_s_bucle:.0f}); "
+          f"decisiones distintas lote/bucle: {errores}")
+
+    # Resumen al umbral actual y umbral mínimo cuya cota superior de Pfa
+    # (95 %) cumple el objetivo con la peor interferencia
+    resumen = {}
+    for detector, (_, nombre_umbral) in DETECTORES.items():
+        actual = getattr(dsp_core, nombre_umbral)
+        i_actual = int(np.searchsorted(umbrales, actual))
+        propias = [c for c in curvas if c["detector"] == detector]
+        pfa_peor = np.max([c["pfa"] for c in propias], axis=0)
+        pfa_cota = pfa_superior(np.round(pfa_peor * n_ausente), n_ausente)
+        cumplen = np.nonzero(pfa_cota <= args.pfa_objetivo)[0]
+        i_sugerido = int(cumplen[0]) if len(cumplen) else None
+        if i_sugerido is not None:
+            sugerencia = (f"umbral {umbrales[i_sugerido]:.2f} (Pfa observada {pfa_peor[i_sugerido]:.4f}, "
+                          f"cota 95 % {pfa_cota[i_sugerido]:.2g}, n={n_ausente})")
+        else:
+            sugerencia = f"no se puede afirmar con n={n_ausente} (cota 95 % mínima {pfa_cota.min():.2g})"
+        print(f"\n[{detector}] umbral actual {actual:g}: Pfa "
+              + ", ".join(f"{i}: {next(c['pfa'][i_actual] for c in propias if c['interferencia'] == i):.4f}"
+                          for i in INTERFERENCIAS)
+              + f" | para Pfa ≤ {args.pfa_objetivo:g}: {sugerencia}")
+        print(f"  {'Pd':<22}" + "".join(f"{f'{v:g} dB':>9}" for v in args.snr))
+        for interferencia in INTERFERENCIAS:
+            for desvio in args.desvios:
+                filas = [c for c in propias if c["interferencia"] == interferencia and c["desvio_hz"] == desvio]
+                filas_umbral = [(i_actual, f"{actual:g}")]
+                if i_sugerido is not None:
+                    filas_umbral.append((i_sugerido, f"{umbrales[i_sugerido]:.1f}"))
+                for i, etiqueta in filas_umbral:
+                    print(f"  {interferencia:<8} {desvio:>3g} Hz u={etiqueta:<5}"
+                          + "".join(f"{c['pd'][i]:9.3f}" for c in filas))
+        resumen[detector] = {"umbral_actual": actual,
+                             "umbral_sugerido": None if i_sugerido is None else float(umbrales[i_sugerido]),
+                             "pfa_peor_actual": float(pfa_peor[i_actual]),
+                             "pfa_cota_actual": float(pfa_cota[i_actual]),
+                             "bloques_ausente": n_ausente}
+
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["detector", "interferencia", "desvio_hz", "snr_db", "umbral", "pd", "pfa"])
+            for c in curvas:
+                for u, pd, pfa in zip(c["umbrales"], c["pd"], c["pfa"]):
+                    w.writerow([c["detector"], c["interferencia"], c["desvio_hz"], c["snr_db"],
+                                f"{u:.4f}", f"{pd:.5f}", f"{pfa:.5f}"])
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"parametros": vars(args), "resumen": resumen,
+                       "bloques_por_s": muestras / t_total, "bloques_por_s_bucle": por_s_bucle,
+                       "curvas": [{**c, "umbrales": c["umbrales"].tolist(), "pd": c["pd"].tolist(),
+                                   "pfa": c["pfa"].tolist()} for c in curvas]},
+                      f, indent=2, ensure_ascii=False)
+    if args.png:
+        graficar(curvas, args.png)
+    return 0
+
+
+def graficar(curvas, ruta):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    fig, ejes = plt.subplots(len(DETECTORES), len(INTERFERENCIAS), figsize=(15, 8),
+                             sharex=True, sharey=True, squeeze=False)
+    for fila, detector in zip(ejes, DETECTORES):
+        for ax, interferencia in zip(fila, INTERFERENCIAS):
+            for c in curvas:
+                if c["detector"] == detector and c["interferencia"] == interferencia and c["desvio_hz"] == 0:
+                    ax.semilogx(np.maximum(c["pfa"], 1e-4), c["pd"], label=f"{c['snr_db']:g} dB")
+            ax.set_title(f"{detector} - {interferencia}")
+            ax.grid(True, which="both", alpha=0.3)
+    for ax in ejes[-1]:
+        ax.set_xlabel("Pfa")
+    for fila in ejes:
+        fila[0].set_ylabel("Pd")
+    ejes[0][-1].legend(fontsize=8)
+    fig.tight_layout()
+    fig.savefig(ruta, dpi=100)
+    print(f"🖼️ Curvas ROC -> {ruta}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
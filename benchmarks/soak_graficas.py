@@ -0,0 +1,110 @@
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# === Prueba de resistencia de las gráficas de DemodGUI ===
+# Actualiza cientos de cuadros (espectro + señal demodulada) y verifica que
+# la memoria se mantenga constante y que cada actualización cueste pocos ms.
+# Con --tk usa la DemodGUI real (requiere pantalla); si no, el mismo
+# GraficaViva sobre un canvas Agg.
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except OSError:
+        return float("nan")
+
+
+def crear_graficas_agg():
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from graficas_vivas import GraficaViva
+    graficas = []
+    for modo in ("espectro", "tiempo"):
+        fig = Figure(figsize=(5, 2), dpi=100)
+        ax = fig.add_subplot(111)
+        canvas = FigureCanvasAgg(fig)
+        graficas.append(GraficaViva(ax, canvas, modo=modo))
+        canvas.draw()
+    return (lambda f, S: graficas[0].actualizar(f, S),
+            lambda t, a: graficas[1].actualizar(t, a),
+            lambda: None, graficas)
+
+
+def crear_graficas_tk():
+    import tkinter as tk
+    import demod_gui02
+    root = tk.Tk()
+    root.geometry("1000x700")
+    gui = demod_gui02.DemodGUI(root)
+    root.update()
+    def procesar_eventos():
+        gui.bus.vaciar()
+        root.update()
+    return gui.actualizar_espectro, gui.actualizar_senal, procesar_eventos, gui.graficas
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--cuadros", type=int, default=500)
+    p.add_argument("--tk", action="store_true")
+    p.add_argument("--max-crecimiento-mb", type=float, default=5.0)
+    p.add_argument("--max-ms", type=float, default=20.0,
+                   help="Límite de la mediana por actualización; los redibujos "
+                        "por cambio de escala se ven en el p95")
+    args = p.parse_args(argv)
+
+    espectro, senal, procesar_eventos, graficas = (crear_graficas_tk() if args.tk
+                                                   else crear_graficas_agg())
+    fs = 44100
+    rng = np.random.default_rng(0)
+    f = np.fft.rfftfreq(fs, 1 / fs)
+
+    tiempos = []
+    memoria = []
+    tracemalloc.start()
+    for i in range(args.cuadros):
+        # Espectro de 1 s acumulado y mensajes de 3 a 8 s normalizados,
+        # como los que produce iniciar_proceso_con_acumulador
+        S = np.abs(rng.standard_normal(len(f))) * rng.uniform(1, 2)
+        n = int(fs * rng.uniform(3, 8))
+        t = np.arange(n) / fs
+        audio = np.sin(2 * np.pi * 440 * t)
+
+        t0 = time.perf_counter()
+        espectro(f, S)
+        senal(t, audio)
+        procesar_eventos()
+        tiempos.append((time.perf_counter() - t0) * 1000 / 2)
+        if i % 10 == 0:
+            memoria.append((tracemalloc.get_traced_memory()[0] / 1e6, rss_mb()))
+    tracemalloc.stop()
+
+    tiempos = np.array(tiempos)
+    # Se descarta el arranque (cachés de fuentes, primeras reservas)
+    base = memoria[len(memoria) // 5]
+    final = memoria[-1]
+    crecimiento = final[0] - base[0]
+    p50, p95 = np.percentile(tiempos, [50, 95])
+    print(f"Cuadros:        {args.cuadros}")
+    print(f"Por actualiz.:  p50 {p50:.2f} ms  p95 {p95:.2f} ms  máx {tiempos.max():.2f} ms")
+    print(f"Redibujados:    {sum(g.redibujados for g in graficas)}  "
+          f"blits: {sum(g.blits for g in graficas)}")
+    print(f"tracemalloc:    {base[0]:.2f} MB -> {final[0]:.2f} MB ({crecimiento:+.2f} MB)")
+    print(f"RSS:            {base[1]:.1f} MB -> {final[1]:.1f} MB")
+
+    ok = crecimiento <= args.max_crecimiento_mb and p50 <= args.max_ms
+    print("✅ OK" if ok else "❌ Fuera de presupuesto")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,85 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# === Zoom sobre grabaciones largas con la pirámide min/max ===
+# Para grabaciones de varios minutos mide el armado de la pirámide y el costo
+# de cada zoom/desplazamiento (pedir el nivel + redibujar el eje) sobre el
+# mismo GraficaViva de DemodGUI en un canvas Agg. El presupuesto es por
+# interacción y no debe crecer con la duración.
+
+
+def grabacion_sintetica(minutos, fs, rng):
+    # int16 como el .wav guardado; se repite un trozo de 10 s para no
+    # generar minutos de ruido muestra a muestra
+    t = np.arange(10 * fs) / fs
+    trozo = 0.5 * np.sin(2 * np.pi * 440 * t) * np.sin(2 * np.pi * 0.3 * t)
+    trozo += 0.05 * rng.standard_normal(len(t))
+    trozo = (np.clip(trozo, -1, 1) * 32767).astype(np.int16)
+    return np.resize(trozo, int(minutos * 60 * fs))
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("--minutos", type=float, nargs="+", default=[1, 10, 60])
+    p.add_argument("--fs", type=int, default=44100)
+    p.add_argument("--zooms", type=int, default=200)
+    p.add_argument("--max-ms", type=float, default=50.0,
+                   help="Límite del p95 por zoom (nivel + redibujo)")
+    args = p.parse_args(argv)
+
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from graficas_vivas import GraficaViva
+    from piramide_lod import PiramideMinMax
+
+    rng = np.random.default_rng(0)
+    ok = True
+    print(f"{'min':>5} {'armado s':>9} {'niveles':>8} {'MB':>7} {'nivel ms':>9} "
+          f"{'p50 ms':>7} {'p95 ms':>7} {'máx ms':>7} {'puntos':>7}")
+    for minutos in args.minutos:
+        senal = grabacion_sintetica(minutos, args.fs, rng)
+        t0 = time.perf_counter()
+        piramide = PiramideMinMax(senal, args.fs, escala=1 / 32767)
+        armado = time.perf_counter() - t0
+        mb = sum(a.nbytes + b.nbytes for a, b in piramide.niveles) / 1e6
+
+        fig = Figure(figsize=(10, 2), dpi=100)
+        canvas = FigureCanvasAgg(fig)
+        grafica = GraficaViva(fig.add_subplot(111), canvas, modo="tiempo")
+        grafica.mostrar_piramide(piramide)
+
+        duracion = piramide.duracion()
+        tiempos = []
+        consultas = []
+        puntos = 0
+        for _ in range(args.zooms):
+            # Vistas de 10 ms a la grabación completa, en escala logarítmica
+            ancho = duracion * 10 ** rng.uniform(np.log10(0.01 / duracion), 0)
+            inicio = rng.uniform(0, duracion - ancho)
+            t0 = time.perf_counter()
+            grafica.ax.set_xlim(inicio, inicio + ancho)
+            t1 = time.perf_counter()
+            canvas.draw()
+            tiempos.append((time.perf_counter() - t0) * 1000)
+            consultas.append((t1 - t0) * 1000)
+            puntos = max(puntos, len(grafica.linea.get_xdata()))
+
+        p50, p95 = np.percentile(tiempos, [50, 95])
+        print(f"{minutos:>5g} {armado:>9.2f} {len(piramide.niveles):>8} {mb:>7.1f} "
+              f"{np.percentile(consultas, 95):>9.2f} {p50:>7.2f} {p95:>7.2f} "
+              f"{max(tiempos):>7.2f} {puntos:>7}")
+        ok &= p95 <= args.max_ms
+        del senal, piramide
+
+    print("✅ OK" if ok else "❌ Fuera de presupuesto")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
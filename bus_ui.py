@@ -0,0 +1,105 @@
+import queue
+import time
+
+# === Bus de mensajes hacia la GUI ===
+# Tk no es seguro entre hilos: los hilos de trabajo no deben llamar a
+# StringVar.set(), root.update() ni dibujar. En su lugar publican eventos
+# en una cola; el hilo de Tk la vacía con root.after() a ritmo fijo. Los
+# tipos marcados como "coalescer" (estado, gráficas) entregan sólo el
+# último evento de cada tanda, así la GUI no se atrasa aunque el DSP
+# publique progreso muy rápido.
+
+
+class BusUI:
+    def __init__(self, root, intervalo_ms=50, vigia=None):
+        self.root = root
+        self.vigia = vigia
+        self.intervalo_ms = intervalo_ms
+        self.cola = queue.SimpleQueue()
+        self.manejadores = {}
+        self.coalescer = set()
+        self.publicados = 0
+        self.entregados = 0
+        self.coalescidos = 0
+        self.latencia_max_ms = 0.0
+        self.drenado_max_ms = 0.0
+        self._activo = True
+        self.root.after(self.intervalo_ms, self._tick)
+
+    def suscribir(self, tipo, manejador, coalescer=False):
+        self.manejadores.setdefault(tipo, []).append(manejador)
+        if coalescer:
+            self.coalescer.add(tipo)
+
+    def publicar(self, tipo, *args):
+        # Se puede llamar desde cualquier hilo
+        self.publicados += 1
+        self.cola.put((time.perf_counter(), tipo, args))
+
+    def vaciar(self):
+        # Entrega lo pendiente ya mismo; sólo desde el hilo de Tk
+        t0 = time.perf_counter()
+        eventos = []
+        ultimo = {}
+        while True:
+            try:
+                evento = self.cola.get_nowait()
+            except queue.Empty:
+                break
+            tipo = evento[1]
+            if tipo in self.coalescer and tipo in ultimo:
+                eventos[ultimo[tipo]] = None
+                self.coalescidos += 1
+            ultimo[tipo] = len(eventos)
+            eventos.append(evento)
+
+        for evento in eventos:
+            if evento is None:
+                continue
+            t_pub, tipo, args = evento
+            self.latencia_max_ms = max(self.latencia_max_ms, (time.perf_counter() - t_pub) * 1000)
+            for manejador in self.manejadores.get(tipo, []):
+                try:
+                    if self.vigia is not None:
+                        with self.vigia.operacion(f"bus:{tipo}"):
+                            manejador(*args)
+                    else:
+                        manejador(*args)
+                except Exception as e:
+                    print(f"[ERROR] Bus UI ({tipo}):", e)
+            self.entregados += 1
+
+        self.drenado_max_ms = max(self.drenado_max_ms, (time.perf_counter() - t0) * 1000)
+
+    def _tick(self):
+        self.vaciar()
+        if self._activo:
+            self.root.after(self.intervalo_ms, self._tick)
+
+    def detener(self):
+        self._activo = False
+
+    def estadisticas(self):
+        return {
+            "publicados": self.publicados,
+            "entregados": self.entregados,
+            "coalescidos": self.coalescidos,
+            "latencia_max_ms": self.latencia_max_ms,
+            "drenado_max_ms": self.drenado_max_ms,
+        }
+
+
+class VariableBus:
+    # Reemplazo de un tk.StringVar para los hilos: set() publica en el bus y
+    # el valor se aplica a la variable real desde el hilo de Tk
+    def __init__(self, bus, variable, tipo="estado"):
+        self.bus = bus
+        self.variable = variable
+        self.tipo = tipo
+        bus.suscribir(tipo, variable.set, coalescer=True)
+
+    def set(self, valor):
+        self.bus.publicar(self.tipo, valor)
+
+    def get(self):
+        return self.variable.get()
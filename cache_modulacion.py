@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+# === Caché en disco de señales moduladas ===
+# La clave es un hash de las muestras de entrada y de todos los parámetros
+# de modulación. La salida (tono inicio + modulada + tono fin) se guarda como
+# .npy crudo y se devuelve mapeada en memoria (mmap), así que repetir una
+# transmisión cuesta sólo abrir el archivo.
+
+CACHE_DIR = os.environ.get("CACHE_MODULACION_DIR", ".cache_modulacion")
+CACHE_MAX_BYTES = int(os.environ.get("CACHE_MODULACION_MAX_MB", "512")) * 1024 * 1024
+VERSION_CACHE = 1  # Subir si cambia el algoritmo de modulación
+ARCHIVO_STATS = "estadisticas.json"
+
+
+def clave_cache(senales, parametros):
+    h = hashlib.sha256()
+    h.update(f"v{VERSION_CACHE}".encode())
+    for senal in senales:
+        senal = np.ascontiguousarray(senal)
+        h.update(str(senal.dtype).encode())
+        h.update(str(senal.shape).encode())
+        h.update(senal.tobytes())
+    h.update(json.dumps(parametros, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+def _ruta(clave, directorio=None):
+    return os.path.join(directorio or CACHE_DIR, clave + ".npy")
+
+
+def _leer_stats(directorio):
+    try:
+        with open(os.path.join(directorio, ARCHIVO_STATS)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"aciertos": 0, "fallos": 0, "desalojos": 0}
+
+
+def _sumar_stats(directorio, campo, n=1):
+    stats = _leer_stats(directorio)
+    stats[campo] = stats.get(campo, 0) + n
+    tmp = os.path.join(directorio, ARCHIVO_STATS + f".{os.getpid()}.tmp")
+    try:
+        os.makedirs(directorio, exist_ok=True)
+        with open(tmp, "w") as f:
+            json.dump(stats, f)
+        os.replace(tmp, os.path.join(directorio, ARCHIVO_STATS))
+    except OSError:
+        pass
+
+
+def obtener(clave, directorio=None):
+    directorio = directorio or CACHE_DIR
+    ruta = _ruta(clave, directorio)
+    if not os.path.exists(ruta):
+        _sumar_stats(directorio, "fallos")
+        return None
+    try:
+        datos = np.load(ruta, mmap_mode='r')
+    except (OSError, ValueError):
+        # Entrada corrupta (p. ej. escritura interrumpida): se descarta
+        os.remove(ruta)
+        _sumar_stats(directorio, "fallos")
+        return None
+    # El mtime marca el último uso para el desalojo LRU
+    os.utime(ruta, None)
+    _sumar_stats(directorio, "aciertos")
+    return datos
+
+
+def guardar(clave, senal, directorio=None, max_bytes=None):
+    directorio = directorio or CACHE_DIR
+    os.makedirs(directorio, exist_ok=True)
+    ruta = _ruta(clave, directorio)
+    tmp = ruta + f".{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, np.ascontiguousarray(senal))
+    os.replace(tmp, ruta)
+    recortar(directorio, max_bytes)
+    return ruta
+
+
+def _entradas(directorio):
+    entradas = []
+    if not os.path.isdir(directorio):
+        return entradas
+    for nombre in os.listdir(directorio):
+        if not nombre.endswith(".npy"):
+            continue
+        ruta = os.path.join(directorio, nombre)
+        try:
+            st = os.stat(ruta)
+        except OSError:
+            continue
+        entradas.append((st.st_mtime, st.st_size, ruta))
+    return entradas
+
+
+def recortar(directorio=None, max_bytes=None):
+    # Desalojo LRU: se borran las entradas usadas hace más tiempo hasta
+    # quedar por debajo del límite
+    directorio = directorio or CACHE_DIR
+    max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    entradas = sorted(_entradas(directorio))
+    total = sum(tam for _, tam, _ in entradas)
+    borradas = 0
+    for _, tam, ruta in entradas:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(ruta)
+        except OSError:
+            continue
+        total -= tam
+        borradas += 1
+    if borradas:
+        _sumar_stats(directorio, "desalojos", borradas)
+    return borradas
+
+
+def obtener_o_calcular(senales, parametros, calcular, directorio=None):
+    clave = clave_cache(senales, parametros)
+    datos = obtener(clave, directorio)
+    if datos is not None:
+        return datos, True
+    datos = calcular()
+    guardar(clave, datos, directorio)
+    return datos, False
+
+
+def estadisticas(directorio=None):
+    directorio = directorio or CACHE_DIR
+    entradas = _entradas(directorio)
+    stats = _leer_stats(directorio)
+    consultas = stats.get("aciertos", 0) + stats.get("fallos", 0)
+    return {
+        "directorio": os.path.abspath(directorio),
+        "entradas": len(entradas),
+        "bytes": sum(tam for _, tam, _ in entradas),
+        "max_bytes": CACHE_MAX_BYTES,
+        "aciertos": stats.get("aciertos", 0),
+        "fallos": stats.get("fallos", 0),
+        "desalojos": stats.get("desalojos", 0),
+        "tasa_aciertos": stats.get("aciertos", 0) / consultas if consultas else 0.0,
+        "mas_antigua": min((m for m, _, _ in entradas), default=None),
+        "mas_reciente": max((m for m, _, _ in entradas), default=None),
+    }
+
+
+def limpiar(directorio=None):
+    directorio = directorio or CACHE_DIR
+    for _, _, ruta in _entradas(directorio):
+        os.remove(ruta)
+    stats = os.path.join(directorio, ARCHIVO_STATS)
+    if os.path.exists(stats):
+        os.remove(stats)
+
+
+def _imprimir_estadisticas(stats):
+    def fecha(ts):
+        return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts)) if ts else "-"
+    print(f"📁 Directorio:   {stats['directorio']}")
+    print(f"📦 Entradas:     {stats['entradas']}")
+    print(f"💾 Tamaño:       {stats['bytes'] / 1e6:.1f} MB de {stats['max_bytes'] / 1e6:.1f} MB")
+    print(f"✅ Aciertos:     {stats['aciertos']}")
+    print(f"❌ Fallos:       {stats['fallos']}")
+    print(f"🧹 Desalojos:    {stats['desalojos']}")
+    print(f"📈 Tasa acierto: {100 * stats['tasa_aciertos']:.1f} %")
+    print(f"🕑 Más antigua:  {fecha(stats['mas_antigua'])}")
+    print(f"🕑 Más reciente: {fecha(stats['mas_reciente'])}")
+
+
+if __name__ == '__main__':
+    comando = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if comando == "stats":
+        _imprimir_estadisticas(estadisticas())
+    elif comando == "limpiar":
+        limpiar()
+        print("🧹 Caché vaciada.")
+    elif comando == "recortar":
+        print(f"🧹 {recortar()} entradas desalojadas.")
+    else:
+        print("Uso: python cache_modulacion.py [stats|limpiar|recortar]")
+        sys.exit(1)
@@ -0,0 +1,79 @@
+import numpy as np
+from scipy.signal import butter, filtfilt, firwin, resample_poly
+
+# === Captura en banda base compleja (IQ) decimada ===
+# Tras mezclar con la portadora sólo interesa la banda de ±4 kHz, así que
+# guardar la señal pasabanda real a 44.1 kHz desperdicia espacio. Aquí se
+# mezcla a banda base compleja, se decima con un filtro polifásico y se
+# guarda IQ complex64 junto con los parámetros del mezclador, para poder
+# re-demodular después con otro phi/deltaf o eligiendo banda lateral.
+
+DECIMACION = 5      # 44100 Hz -> 8820 Hz
+CORTE_IQ = 4200     # Hz, borde de la banda útil antes de decimar
+TAPS_POR_FASE = 32
+
+
+def filtro_decimador(fs, decimacion=DECIMACION, corte=CORTE_IQ):
+    return firwin(TAPS_POR_FASE * decimacion + 1, corte, fs=fs)
+
+
+def mezclar_a_banda_base(senal, fs, fc, decimacion=DECIMACION, corte=CORTE_IQ):
+    senal = np.asarray(senal, dtype=np.float32)
+    n = np.arange(len(senal))
+    # Oscilador complejo en float64 por precisión de fase; se baja a complex64
+    oscilador = np.exp(-2j * np.pi * fc / fs * n).astype(np.complex64)
+    mezclada = senal * oscilador
+    h = filtro_decimador(fs, decimacion, corte)
+    # resample_poly implementa el filtrado + decimación en forma polifásica
+    iq = resample_poly(mezclada, 1, decimacion, window=h)
+    return iq.astype(np.complex64), fs / decimacion
+
+
+def guardar_iq(nombre_archivo, iq, fs_iq, fs, fc, decimacion=DECIMACION, corte=CORTE_IQ):
+    np.savez(nombre_archivo,
+             iq=np.asarray(iq, dtype=np.complex64),
+             fs_iq=fs_iq, fs=fs, fc=fc,
+             decimacion=decimacion, corte=corte)
+
+
+def cargar_iq(nombre_archivo):
+    with np.load(nombre_archivo) as datos:
+        iq = datos["iq"]
+        parametros = {k: datos[k].item() for k in datos.files if k != "iq"}
+    return iq, parametros
+
+
+def _banda_lateral(iq, positiva):
+    # Separa las frecuencias positivas (USB) o negativas (LSB) de la banda base
+    N = len(iq)
+    espectro = np.fft.fft(iq)
+    f = np.fft.fftfreq(N)
+    espectro[(f < 0) if positiva else (f > 0)] = 0
+    return np.fft.ifft(espectro)
+
+
+def demodular_iq(iq, fs_iq, phi=0, deltaf=0, modo="coherente", corte=4000, orden=6):
+    t = np.arange(len(iq)) / fs_iq
+    # Mismo oscilador local con error que el receptor en vivo:
+    # cos(2*pi*(fc + deltaf)*t + phi) sobre la señal pasabanda
+    iq = iq * np.exp(-1j * (2 * np.pi * deltaf * t + phi))
+
+    if modo == "envolvente":
+        audio = np.abs(iq)
+        audio = audio - np.mean(audio)
+    else:
+        if modo == "USB":
+            iq = _banda_lateral(iq, positiva=True)
+        elif modo == "LSB":
+            iq = _banda_lateral(iq, positiva=False)
+        elif modo != "coherente":
+            raise ValueError("modo debe ser 'coherente', 'USB', 'LSB' o 'envolvente'")
+        audio = np.real(iq)
+
+    if corte < fs_iq / 2:
+        b, a = butter(orden, corte / (fs_iq / 2), btype='low')
+        audio = filtfilt(b, a, audio)
+    pico = np.max(np.abs(audio))
+    if pico > 0:
+        audio = audio / pico
+    return audio
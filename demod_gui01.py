@@ -4,7 +4,7 @@ import threading
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import sounddevice as sd
+from audio_backend import sd
 from scipy.signal import butter, filtfilt
 from scipy.io.wavfile import write
 import os
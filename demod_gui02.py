@@ -2,29 +2,20 @@ import tkinter as tk
 from tkinter import ttk
 import threading
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import sounddevice as sd
-from scipy.signal import butter, filtfilt
-from scipy.io.wavfile import write
+from audio_backend import sd, preparar_backend
 import os
+import sys
 import time
-
-def butter_lowpass(cutoff, fs, order=6):
-    nyq = fs / 2
-    b, a = butter(order, cutoff / nyq, btype='low')
-    return b, a
-
-def detectar_tono(bloque, tono, fs, margen=30, umbral=10):
-    N = len(bloque)
-    f = np.fft.rfftfreq(N, 1/fs)
-    S = np.abs(np.fft.rfft(bloque * np.hanning(N)))
-    idx = np.where((f >= tono - margen) & (f <= tono + margen))[0]
-    if len(idx) == 0:
-        return False, f, S
-    energia_tono = np.max(S[idx])
-    energia_promedio = np.mean(S)
-    return energia_tono > energia_promedio * umbral, f, S
+from contextlib import nullcontext
+from bus_ui import BusUI, VariableBus
+from medidor_nivel import MedidorNivel, texto_nivel
+from graficas_vivas import GraficaViva, BufferCascada, CascadaViva
+from piramide_lod import PiramideMinMax, ruta_lod
+from vigia_tk import VigiaLag
+from dsp_core import detectar_tono, demodular_coherente
+from tiempos_callback import InstrumentoCallback, anotar, texto_resumen
+import traza
+import arranque
 
 def siguiente_nombre():
     base = "grabacion_"
@@ -33,6 +24,32 @@ def siguiente_nombre():
         i += 1
     return f"{base}{i:03d}"
 
+def procesar_captura(bloques, fs, fc, vigia=None):
+    # Lo que sigue a la captura, en el hilo de trabajo: concatenar,
+    # demodular, guardar el .wav y su pirámide min/max. Vacía `bloques` al
+    # concatenar para no tener el mensaje dos veces en memoria (lo mide
+    # benchmarks/memoria_pico.py). Devuelve (wavname, audio, piramide)
+    operacion = vigia.operacion if vigia is not None else (lambda nombre: nullcontext())
+    # El vigía sólo registra la duración: no corre en el hilo de Tk
+    with operacion("demodular"):
+        with traza.tramo("concatenate", bloques=len(bloques)):
+            mensaje = np.concatenate(bloques)
+        bloques.clear()
+        with traza.tramo("demodular_coherente", mensaje=mensaje):
+            audio = demodular_coherente(mensaje, fs, fc)
+        del mensaje
+
+    from scipy.io.wavfile import write
+    with operacion("guardar"):
+        wavname = siguiente_nombre() + ".wav"
+        with traza.tramo("write", audio=audio):
+            write(wavname, fs, (audio * 32767).astype(np.int16))
+        # Pirámide min/max junto al .wav: el zoom no vuelve a recorrer el audio
+        with traza.tramo("piramide", audio=audio):
+            piramide = PiramideMinMax(audio, fs)
+            piramide.guardar(ruta_lod(wavname))
+    return wavname, audio, piramide
+
 def iniciar_proceso_con_acumulador(gui):
     fs = 44100
     fc = 10000
@@ -41,6 +58,9 @@ def iniciar_proceso_con_acumulador(gui):
     umbral_inicio = 10
     umbral_fin = 5
     acumulador = []
+    bloques_ventana = int(np.ceil(fs / blocksize))  # 1 s de ventana deslizante
+    # Nivel y SNR en banda a 10 Hz hacia la GUI y niveles.csv
+    medidor = MedidorNivel(fs, fc, al_reportar=gui.actualizar_nivel, archivo_log="niveles.csv")
 
     sd.default.samplerate = fs
     sd.default.channels = 1
@@ -55,71 +75,66 @@ def iniciar_proceso_con_acumulador(gui):
     def callback_inicial(indata, frames, time_info, status):
         nonlocal inicio_detectado, espectro_guardado, mensaje, acumulador
         bloque = indata[:, 0]
+        medidor.procesar(bloque)
         acumulador.append(bloque.copy())
+        if len(acumulador) > bloques_ventana:
+            acumulador.pop(0)
 
         if not espectro_guardado and len(acumulador) * blocksize >= fs:
             bloque_largo = np.concatenate(acumulador)
             detectado, f, S = detectar_tono(bloque_largo, 7000, fs, margen=30, umbral=umbral_inicio)
+            # El mismo espectro de la detección alimenta la cascada
+            gui.cascada.agregar(f, S)
             if detectado:
                 inicio_detectado = True
                 mensaje.append(bloque_largo.copy())
                 gui.estado.set("✅ Tono de inicio detectado. Grabando...")
-
-                fig = plt.Figure(figsize=(5, 2), dpi=100)
-                ax = fig.add_subplot(111)
-                ax.plot(f, S)
-                ax.set_title("Espectro acumulado al detectar tono")
-                ax.set_xlabel("Frecuencia [Hz]")
-                ax.set_ylabel("Magnitud")
-                ax.grid(True)
-                gui.mostrar_grafica(fig, 0)
+                gui.actualizar_espectro(f, S)
                 espectro_guardado = True
         elif inicio_detectado:
             mensaje.append(bloque.copy())
 
-    with sd.InputStream(callback=callback_inicial, blocksize=blocksize):
-        while not inicio_detectado:
-            time.sleep(0.05)
-
     def callback_mensaje(indata, frames, time_info, status):
         nonlocal mensaje
         bloque = indata[:, 0]
-        detectado_fin, _, _ = detectar_tono(bloque, 5000, fs, margen=30, umbral=umbral_fin)
+        detectado_fin, f, S = detectar_tono(bloque, 5000, fs, margen=30, umbral=umbral_fin)
+        gui.cascada.agregar(f, S)
+        medidor.procesar(bloque, f, S)
         if not detectado_fin:
             mensaje.append(bloque.copy())
         else:
             gui.estado.set("✅ Tono de fin detectado. Procesando...")
             raise sd.CallbackStop()
 
-    with sd.InputStream(callback=callback_mensaje, blocksize=blocksize):
-        try:
-            sd.sleep(int(dur_max_mensaje * 1000))
-        except sd.CallbackStop:
-            pass
-
-    mensaje = np.concatenate(mensaje)
-    t = np.arange(len(mensaje)) / fs
-    portadora = np.cos(2 * np.pi * fc * t)
-    baseband = mensaje * portadora
-    b, a = butter_lowpass(4000, fs)
-    audio = filtfilt(b, a, baseband)
-    audio /= np.max(np.abs(audio))
-
-    fig2 = plt.Figure(figsize=(5, 2), dpi=100)
-    ax2 = fig2.add_subplot(111)
-    ax2.plot(t, audio)
-    ax2.set_title("Señal demodulada (tiempo)")
-    ax2.set_xlabel("Tiempo [s]")
-    ax2.set_ylabel("Amplitud")
-    ax2.grid(True)
-    gui.mostrar_grafica(fig2, 1)
-
-    nombre_base = siguiente_nombre()
-    wavname = nombre_base + ".wav"
-    write(wavname, fs, (audio * 32767).astype(np.int16))
+    # niveles.csv se cierra aunque la captura falle o se interrumpa
+    try:
+        gui.instrumento.nuevo_stream()
+        with traza.tramo("espera_inicio"), \
+                sd.InputStream(callback=gui.instrumento.envolver(callback_inicial), blocksize=blocksize) as stream:
+            # Con los backends simulados la entrada se puede terminar sin tono
+            while not inicio_detectado and stream.active:
+                time.sleep(0.05)
+        if not inicio_detectado:
+            gui.estado.set("⌛ La entrada terminó sin tono de inicio.")
+            return
+
+        gui.instrumento.nuevo_stream()
+        with traza.tramo("captura"), \
+                sd.InputStream(callback=gui.instrumento.envolver(callback_mensaje), blocksize=blocksize):
+            try:
+                sd.sleep(int(dur_max_mensaje * 1000))
+            except sd.CallbackStop:
+                pass
+    finally:
+        medidor.cerrar()
+
+    wavname, audio, piramide = procesar_captura(mensaje, fs, fc, gui.vigia)
+    with traza.tramo("graficar"):
+        gui.actualizar_senal_lod(piramide)
     gui.estado.set(f"🎧 Reproduciendo y guardado como {wavname}")
-    sd.play(audio, fs)
-    sd.wait()
+    with gui.vigia.operacion("reproducir"), traza.tramo("reproducir", audio=audio):
+        sd.play(audio, fs)
+        sd.wait()
     gui.estado.set("🔁 Proceso completado. Listo para reiniciar.")
 
 class DemodGUI:
@@ -127,41 +142,131 @@ class DemodGUI:
         self.master = master
         master.title("Demodulador AM - GUI Autónoma")
 
-        self.estado = tk.StringVar()
-        self.estado.set("⏳ Esperando inicio...")
+        # Atraso del bucle de Tk por operación (VIGIA_TK_JSON=ruta.json)
+        self.vigia = VigiaLag(master, nombre="demodulador")
 
-        ttk.Label(master, textvariable=self.estado, font=("Arial", 12)).pack(pady=10)
-        ttk.Button(master, text="▶ Iniciar Demodulación", command=self.iniciar).pack(pady=10)
+        # El hilo de demodulación publica en el bus; Tk lo vacía cada 50 ms
+        self.bus = BusUI(master, vigia=self.vigia)
+        self.estado_var = tk.StringVar(value="⏳ Esperando inicio...")
+        self.estado = VariableBus(self.bus, self.estado_var)
+
+        ttk.Label(master, textvariable=self.estado_var, font=("Arial", 12)).pack(pady=10)
+
+        # Medidor de nivel de entrada (se actualiza a 10 Hz durante la captura)
+        self.nivel_var = tk.StringVar(value="🎚️ Nivel: -")
+        ttk.Label(master, textvariable=self.nivel_var, font=("Arial", 10)).pack()
+        self.barra_nivel = ttk.Progressbar(master, length=300, maximum=60)
+        self.barra_nivel.pack(pady=2)
+        self.bus.suscribir("nivel", self._mostrar_nivel, coalescer=True)
+
+        # Tiempos de los callbacks de captura: resumen cada 5 s en la GUI y
+        # en callbacks.log, histogramas a JSON al salir
+        self.callbacks_var = tk.StringVar(value="⏱️ Callbacks: -")
+        ttk.Label(master, textvariable=self.callbacks_var, font=("Arial", 9)).pack()
+        self.instrumento = InstrumentoCallback("demod_gui", 44100, al_resumir=self._resumen_callbacks,
+                                               archivo_volcado="callbacks_demod_gui.json")
+        self.bus.suscribir("callbacks", lambda r: self.callbacks_var.set(texto_resumen(r)),
+                           coalescer=True)
+        ttk.Button(master, text="▶ Iniciar Demodulación", command=self.vigia.envolver("iniciar", self.iniciar)).pack(pady=10)
 
         self.frames = [
             ttk.LabelFrame(master, text="Espectro acumulado"),
             ttk.LabelFrame(master, text="Señal Demodulada")
         ]
+        self.frame_cascada = ttk.LabelFrame(master, text="Cascada")
+        self.frame_cascada.pack(fill="both", expand=True, padx=10, pady=5)
         for frame in self.frames:
             frame.pack(fill="both", expand=True, padx=10, pady=5)
 
-        self.canvas = [None, None]
+        # Cascada: el hilo de audio escribe columnas, la GUI las muestra a 10 FPS
+        self.cascada = BufferCascada(fmax=44100 / 2)
+        self.canvas = []
+        self.graficas = []
+        self.cascada_viva = None
+
+        # La ventana aparece sin matplotlib ni scipy: se importan en segundo
+        # plano y las figuras se arman al terminar (o al iniciar, si antes)
+        self.bus.suscribir("precarga", lambda tiempos: self._crear_graficas())
+        arranque.al_mostrar(master, "demod_gui",
+                            precarga=("matplotlib.figure", "matplotlib.backends.backend_tkagg",
+                                      "scipy.signal", "scipy.io.wavfile", preparar_backend),
+                            al_terminar=lambda tiempos: self.bus.publicar("precarga", tiempos))
+
+    def _crear_graficas(self):
+        if self.cascada_viva is not None:
+            return
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+
+        # Las figuras se crean una sola vez; cada cuadro sólo cambia los datos
+        ejes = [
+            ("Espectro acumulado al detectar tono", "Frecuencia [Hz]", "Magnitud", "espectro"),
+            ("Señal demodulada (tiempo)", "Tiempo [s]", "Amplitud", "tiempo"),
+        ]
+        for frame, (titulo, xlabel, ylabel, modo) in zip(self.frames, ejes):
+            fig = Figure(figsize=(5, 2), dpi=100)
+            ax = fig.add_subplot(111)
+            canvas = FigureCanvasTkAgg(fig, master=frame)
+            if modo == "tiempo":
+                # Zoom y desplazamiento sobre la señal demodulada
+                NavigationToolbar2Tk(canvas, frame).pack(side="bottom", fill="x")
+            canvas.get_tk_widget().pack(fill="both", expand=True)
+            self.graficas.append(GraficaViva(ax, canvas, titulo, xlabel, ylabel, modo=modo))
+            canvas.draw()
+            self.canvas.append(canvas)
+        self.bus.suscribir("espectro", self.graficas[0].actualizar, coalescer=True)
+        self.bus.suscribir("senal", self.graficas[1].actualizar, coalescer=True)
+        self.bus.suscribir("senal_lod", self.graficas[1].mostrar_piramide, coalescer=True)
+
+        fig = Figure(figsize=(5, 2), dpi=100)
+        canvas = FigureCanvasTkAgg(fig, master=self.frame_cascada)
+        canvas.get_tk_widget().pack(fill="both", expand=True)
+        self.cascada_viva = CascadaViva(fig.add_subplot(111), canvas, self.cascada)
+        canvas.draw()
+        self._refrescar_cascada()
 
     def iniciar(self):
+        self._crear_graficas()
         self.limpiar_graficas()
-        threading.Thread(target=iniciar_proceso_con_acumulador, args=(self,), daemon=True).start()
+        # --perfil: cProfile del hilo de trabajo en la primera trama
+        threading.Thread(target=traza.perfilada(iniciar_proceso_con_acumulador), args=(self,),
+                         name="demodulacion", daemon=True).start()
 
-    def mostrar_grafica(self, fig, idx):
-        if self.canvas[idx]:
-            self.canvas[idx].get_tk_widget().destroy()
-        canvas = FigureCanvasTkAgg(fig, master=self.frames[idx])
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True)
-        self.canvas[idx] = canvas
+    def _refrescar_cascada(self):
+        with self.vigia.operacion("cascada"), traza.tramo("cascada"):
+            self.cascada_viva.refrescar()
+        self.master.after(100, self._refrescar_cascada)
+
+    def _resumen_callbacks(self, resumen):
+        # Hilo del instrumento: escribe el log y pasa el resumen por el bus
+        anotar(resumen)
+        self.bus.publicar("callbacks", resumen)
+
+    def actualizar_nivel(self, lectura):
+        self.bus.publicar("nivel", lectura)
+
+    def _mostrar_nivel(self, lectura):
+        self.nivel_var.set(texto_nivel(lectura))
+        # Barra de -60 a 0 dBFS
+        self.barra_nivel["value"] = min(max(lectura["rms_dbfs"] + 60, 0), 60)
+
+    def actualizar_espectro(self, f, S):
+        self.bus.publicar("espectro", f, S)
+
+    def actualizar_senal(self, t, audio):
+        self.bus.publicar("senal", t, audio)
+
+    def actualizar_senal_lod(self, piramide):
+        self.bus.publicar("senal_lod", piramide)
 
     def limpiar_graficas(self):
-        for idx in range(2):
-            if self.canvas[idx]:
-                self.canvas[idx].get_tk_widget().destroy()
-                self.canvas[idx] = None
+        for grafica in self.graficas:
+            grafica.limpiar()
 
 if __name__ == '__main__':
-    
+    # --traza[=ruta]: trazas por etapa (Perfetto); --perfil[=ruta]: cProfile de una trama
+    traza.configurar(sys.argv, "demod_gui")
+
     root = tk.Tk()
     root.geometry("1000x700")  # ancho x alto en píxeles
 
@@ -0,0 +1,206 @@
+import numpy as np
+
+import traza
+
+# === Núcleo DSP del taller ===
+# Modulación, tonos de trama, detección de tonos y demodulación coherente sin
+# efectos al importar: no abre ventanas, no toca audio ni importa Tk, PIL o
+# matplotlib. Lo usan las GUIs, los receptores de consola, los procesos del
+# pool y los benchmarks. scipy.signal (lo más lento de importar) se carga
+# recién en la primera función que lo necesita.
+
+# === Parámetros de la trama ===
+FS = 44100
+FC = 10000
+DUR_TONO = 0.4
+TONO_INICIO = 7000
+TONO_FIN = 5000
+AMPLITUD_TONO = 0.7
+
+# === Parámetros del receptor ===
+CORTE = 4000
+ORDEN = 6
+MARGEN_TONO = 30
+UMBRAL_INICIO = 10
+UMBRAL_FIN = 5
+
+
+# === Transmisor ===
+def generar_tono(freq, duracion, fs):
+    t = np.arange(int(fs * duracion)) / fs
+    return AMPLITUD_TONO * np.sin(2 * np.pi * freq * t)
+
+
+def _portadoras(n, fs, fc):
+    with traza.tramo("portadoras", muestras=n):
+        t = np.arange(n) / fs
+        return np.cos(2*np.pi*fc*t), np.sin(2*np.pi*fc*t)
+
+
+def _banda_lateral(audio, tipo, carrier_cos, carrier_sin):
+    from scipy.signal import hilbert
+    with traza.tramo("hilbert", audio=audio):
+        analytic = np.imag(hilbert(audio))
+    with traza.tramo("mezcla_ssb", banda=tipo, muestras=len(audio)):
+        if tipo == "USB":
+            return np.real(audio * carrier_cos - analytic * carrier_sin)
+        else:
+            return np.real(audio * carrier_cos + analytic * carrier_sin)
+
+
+def modulacion_ssb(audio, tipo, fs=FS, fc=FC):
+    carrier_cos, carrier_sin = _portadoras(len(audio), fs, fc)
+    return _banda_lateral(audio, tipo, carrier_cos, carrier_sin)
+
+
+def modulacion_ssb_fc(audio, tipo, fs=FS, fc=FC):
+    # SSB con portadora: la de SSB-SC más 2·cos(2π fc t)
+    carrier_cos, carrier_sin = _portadoras(len(audio), fs, fc)
+    return 2 * carrier_cos + _banda_lateral(audio, tipo, carrier_cos, carrier_sin)
+
+
+def modulacion_isb(audio_L, audio_R, fs=FS, fc=FC):
+    # L en la banda superior, R en la inferior, con las mismas portadoras
+    carrier_cos, carrier_sin = _portadoras(len(audio_L), fs, fc)
+    return (_banda_lateral(audio_L, "USB", carrier_cos, carrier_sin) +
+            _banda_lateral(audio_R, "LSB", carrier_cos, carrier_sin))
+
+
+def enmarcar(senal, fs, dur_tono=DUR_TONO, tono_inicio=TONO_INICIO, tono_fin=TONO_FIN):
+    # Trama completa: tono de inicio + señal modulada + tono de fin
+    tono_i = generar_tono(tono_inicio, dur_tono, fs)
+    tono_f = generar_tono(tono_fin, dur_tono, fs)
+    with traza.tramo("concatenate", senal=senal):
+        return np.concatenate((tono_i, senal, tono_f))
+
+
+# === Receptor ===
+def butter_lowpass(cutoff, fs, order=ORDEN):
+    from scipy.signal import butter
+    nyq = fs / 2
+    b, a = butter(order, cutoff / nyq, btype='low')
+    return b, a
+
+
+def _espectro_tono(bloques, fs):
+    N = bloques.shape[-1]
+    f = np.fft.rfftfreq(N, 1/fs)
+    S = np.abs(np.fft.rfft(bloques * np.hanning(N), axis=-1))
+    return f, S
+
+
+def _energias_tono(f, S, tono, margen):
+    # Pico en tono ± margen y promedio de todo el espectro (None si ningún
+    # bin cae en la ventana)
+    idx = np.where((f >= tono - margen) & (f <= tono + margen))[0]
+    if len(idx) == 0:
+        return None, np.mean(S, axis=-1)
+    return np.max(S[..., idx], axis=-1), np.mean(S, axis=-1)
+
+
+def detectar_tono(bloque, tono, fs, margen=MARGEN_TONO, umbral=UMBRAL_INICIO):
+    f, S = _espectro_tono(bloque, fs)
+    energia_tono, energia_promedio = _energias_tono(f, S, tono, margen)
+    if energia_tono is None:
+        return False, f, S
+    return energia_tono > energia_promedio * umbral, f, S
+
+
+def energias_tono(bloques, tono, fs, margen=MARGEN_TONO):
+    # detectar_tono sobre un lote (filas, N) en una sola FFT: devuelve el pico
+    # en la ventana del tono y el promedio por fila. La decisión de cada fila
+    # es energia_tono > energia_promedio * umbral, igual que detectar_tono
+    f, S = _espectro_tono(np.asarray(bloques), fs)
+    energia_tono, energia_promedio = _energias_tono(f, S, tono, margen)
+    if energia_tono is None:
+        energia_tono = np.zeros_like(energia_promedio)
+    return energia_tono, energia_promedio
+
+
+def demodular_coherente(mensaje, fs, fc=FC, phi=0, deltaf=0, corte=CORTE, orden=ORDEN):
+    # Mezcla con cos(2π(fc+Δf)t + φ), pasabajos Butterworth de fase cero
+    # y normalización a pico 1
+    from scipy.signal import filtfilt
+    with traza.tramo("mezcla_coherente", mensaje=mensaje):
+        t = np.arange(len(mensaje)) / fs
+        portadora = np.cos(2 * np.pi * (fc + deltaf) * t + phi)
+        baseband = mensaje * portadora
+    b, a = butter_lowpass(corte, fs, orden)
+    with traza.tramo("filtfilt", orden=orden, muestras=len(baseband)):
+        audio = filtfilt(b, a, baseband)
+    with traza.tramo("normalizar"):
+        return audio / np.max(np.abs(audio))
+
+
+class ReceptorTramas:
+    # Máquina de estados que recibe la trama bloque a bloque:
+    # "esperando" (tono de inicio) -> "capturando" (hasta el tono de fin o
+    # dur_max) -> "completo". No toca audio: la alimenta el callback de la
+    # tarjeta o, en los benchmarks, un arreglo recortado en bloques.
+    def __init__(self, fs, tono_inicio=TONO_INICIO, tono_fin=TONO_FIN, umbral_inicio=UMBRAL_INICIO,
+                 umbral_fin=UMBRAL_FIN, dur_max=10, margen=MARGEN_TONO):
+        self.fs = fs
+        self.tono_inicio = tono_inicio
+        self.tono_fin = tono_fin
+        self.umbral_inicio = umbral_inicio
+        self.umbral_fin = umbral_fin
+        self.max_muestras = int(dur_max * fs)
+        self.margen = margen
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.estado = "esperando"
+        self.bloques = []
+        self.capturadas = 0
+        # Posiciones en muestras desde el primer bloque recibido
+        self.recibidas = 0
+        self.muestra_inicio = None
+        self.muestra_fin = None
+        self.espectro_inicio = None
+
+    def procesar(self, bloque):
+        # Devuelve (evento, f, S): evento es None, "inicio", "fin" o
+        # "limite"; f y S son el espectro del bloque, para reutilizarlo
+        with traza.tramo("detectar_tono", estado=self.estado, muestras=len(bloque)):
+            evento, f, S = self._procesar(bloque)
+        if evento is not None:
+            traza.instante(evento, muestra=self.recibidas)
+        return evento, f, S
+
+    def _procesar(self, bloque):
+        evento = None
+        f = S = None
+        if self.estado == "esperando":
+            detectado, f, S = detectar_tono(bloque, self.tono_inicio, self.fs,
+                                            margen=self.margen, umbral=self.umbral_inicio)
+            if detectado:
+                self.estado = "capturando"
+                self.muestra_inicio = self.recibidas
+                self.espectro_inicio = (f, S)
+                self._guardar(bloque)
+                evento = "inicio"
+        elif self.estado == "capturando":
+            detectado_fin, f, S = detectar_tono(bloque, self.tono_fin, self.fs,
+                                                margen=self.margen, umbral=self.umbral_fin)
+            if detectado_fin:
+                self.estado = "completo"
+                self.muestra_fin = self.recibidas
+                evento = "fin"
+            else:
+                self._guardar(bloque)
+                if self.capturadas >= self.max_muestras:
+                    self.estado = "completo"
+                    self.muestra_fin = self.recibidas + len(bloque)
+                    evento = "limite"
+        self.recibidas += len(bloque)
+        return evento, f, S
+
+    def _guardar(self, bloque):
+        self.bloques.append(np.array(bloque, copy=True))
+        self.capturadas += len(bloque)
+
+    def completo(self):
+        return self.estado == "completo"
+
+    def mensaje(self):
+        return np.concatenate(self.bloques) if self.bloques else np.zeros(0)
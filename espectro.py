@@ -0,0 +1,60 @@
+from functools import lru_cache
+
+import numpy as np
+import scipy.fft
+from scipy.signal import get_window
+
+# === Motor de espectro (PSD por Welch) ===
+# En lugar de una FFT de toda la señal (ruidosa y cada vez más cara), se
+# promedian periodogramas de segmentos con ventana. Con `max_segmentos`
+# el costo queda acotado: en señales muy largas se toman segmentos
+# repartidos uniformemente en vez de todos.
+
+NPERSEG = 4096
+MAX_SEGMENTOS = 256
+
+
+@lru_cache(maxsize=16)
+def _ventana(nombre, n):
+    w = get_window(nombre, n).astype(np.float64)
+    w.flags.writeable = False
+    return w, np.sum(w ** 2)
+
+
+def _segmentos(senal, nperseg, solapamiento, max_segmentos):
+    paso = max(int(nperseg * (1 - solapamiento)), 1)
+    inicios = np.arange(0, len(senal) - nperseg + 1, paso)
+    if len(inicios) > max_segmentos:
+        inicios = inicios[np.linspace(0, len(inicios) - 1, max_segmentos).astype(int)]
+    return senal[inicios[:, None] + np.arange(nperseg)]
+
+
+def psd_welch(senal, fs, nperseg=NPERSEG, solapamiento=0.5, ventana='hann',
+              max_segmentos=MAX_SEGMENTOS, workers=None):
+    senal = np.asarray(senal)
+    nperseg = min(nperseg, len(senal))
+    w, potencia_ventana = _ventana(ventana, nperseg)
+    bloques = _segmentos(senal, nperseg, solapamiento, max_segmentos)
+    # Se quita la media de cada segmento (como scipy.signal.welch)
+    bloques = (bloques - bloques.mean(axis=1, keepdims=True)) * w
+
+    if np.iscomplexobj(senal):
+        X = scipy.fft.fft(bloques, axis=-1, workers=workers)
+        psd = np.mean(np.abs(X) ** 2, axis=0) / (fs * potencia_ventana)
+        freqs = scipy.fft.fftfreq(nperseg, 1 / fs)
+        orden = np.argsort(freqs)
+        return freqs[orden], psd[orden]
+
+    X = scipy.fft.rfft(bloques, axis=-1, workers=workers)
+    psd = np.mean(np.abs(X) ** 2, axis=0) / (fs * potencia_ventana)
+    # Espectro de un lado: se duplica todo menos DC (y Nyquist si N es par)
+    psd[1:-1 if nperseg % 2 == 0 else None] *= 2
+    return scipy.fft.rfftfreq(nperseg, 1 / fs), psd
+
+
+def psd_db(senal, fs, fmax=None, **kwargs):
+    freqs, psd = psd_welch(senal, fs, **kwargs)
+    if fmax is not None:
+        dentro = (freqs >= 0) & (freqs <= fmax)
+        freqs, psd = freqs[dentro], psd[dentro]
+    return freqs, 10 * np.log10(psd + 1e-20)
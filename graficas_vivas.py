@@ -0,0 +1,167 @@
+import threading
+
+import numpy as np
+
+from render_decimado import envolvente_min_max, espectro_agrupado, pixeles_eje
+
+# === Gráficas persistentes que se actualizan en el lugar ===
+# La figura, los ejes y la línea se crean una sola vez. Cada cuadro nuevo
+# sólo cambia los datos de la línea: si los límites no cambian se repinta
+# la línea sobre el fondo guardado (blitting); si cambian, se redibuja todo
+# una vez y se vuelve a guardar el fondo.
+
+
+class GraficaViva:
+    def __init__(self, ax, canvas, titulo="", xlabel="", ylabel="", modo="tiempo", **estilo):
+        self.ax = ax
+        self.canvas = canvas
+        self.modo = modo
+        ax.set_title(titulo)
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+        ax.grid(True)
+        # animated=True: la línea no entra en el fondo, se pinta a mano
+        self.linea, = ax.plot([], [], animated=True, **estilo)
+        self.fondo = None
+        self.redibujados = 0
+        self.blits = 0
+        self.piramide = None
+        canvas.mpl_connect('draw_event', self._al_dibujar)
+        ax.callbacks.connect('xlim_changed', self._al_cambiar_xlim)
+
+    def _al_dibujar(self, evento):
+        self.fondo = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.linea)
+
+    def _ajustar_limites(self, x, y):
+        if len(x) == 0:
+            return False
+        cambio = False
+        # Sólo se reescala si los datos se salen o quedan muy chicos,
+        # para no redibujar todo (ejes, etiquetas) en cada cuadro
+        x0, x1 = float(x[0]), float(x[-1])
+        lo, hi = self.ax.get_xlim()
+        if x1 > x0 and (x0 < lo or x1 > hi or (hi - lo) > 4 * (x1 - x0)):
+            holgura = 0.0 if self.modo == "espectro" else 0.25 * (x1 - x0)
+            self.ax.set_xlim(x0, x1 + holgura)
+            cambio = True
+        ymin, ymax = float(np.min(y)), float(np.max(y))
+        lo, hi = self.ax.get_ylim()
+        rango = max(ymax - ymin, 1e-12)
+        if ymin < lo or ymax > hi or (hi - lo) > 4 * rango:
+            # Holgura del 25 % para que un pico algo mayor no fuerce otro redibujo
+            margen = 0.25 * rango
+            self.ax.set_ylim(ymin - margen, ymax + margen)
+            cambio = True
+        return cambio
+
+    def actualizar(self, x, y):
+        self.piramide = None
+        px = pixeles_eje(self.ax)
+        if self.modo == "espectro":
+            x, y = espectro_agrupado(x, y, px)
+        else:
+            x, y = envolvente_min_max(y, x, px)
+        self.linea.set_data(x, y)
+        if self._ajustar_limites(x, y) or self.fondo is None:
+            self.canvas.draw()
+            self.redibujados += 1
+        else:
+            self.canvas.restore_region(self.fondo)
+            self.ax.draw_artist(self.linea)
+            self.canvas.blit(self.ax.bbox)
+            self.blits += 1
+
+    def mostrar_piramide(self, piramide):
+        # Grabaciones largas: al hacer zoom o desplazar sólo se pide a la
+        # pirámide el nivel que corresponde al ancho visible
+        self.piramide = piramide
+        ymin, ymax = piramide.rango()
+        margen = 0.05 * max(ymax - ymin, 1e-12)
+        self.ax.set_ylim(ymin - margen, ymax + margen)
+        self.ax.set_xlim(0, piramide.duracion())
+        self.canvas.draw()
+        self.redibujados += 1
+
+    def _al_cambiar_xlim(self, ax):
+        if self.piramide is not None:
+            t0, t1 = ax.get_xlim()
+            self.linea.set_data(*self.piramide.ventana(t0, t1, pixeles_eje(ax)))
+
+    def limpiar(self):
+        self.piramide = None
+        self.linea.set_data([], [])
+        self.canvas.draw()
+
+
+# === Cascada (espectrograma que se desplaza) ===
+# El receptor ya calcula un espectro por bloque para detectar los tonos;
+# cada uno se convierte en una columna del buffer circular. La pantalla
+# sólo copia el buffer a la imagen, sin FFT adicionales.
+
+class BufferCascada:
+    def __init__(self, filas=256, columnas=300, fmax=22050, piso_db=-120.0):
+        self.filas = filas
+        self.columnas = columnas
+        self.fmax = fmax
+        self.datos = np.full((filas, columnas), piso_db, dtype=np.float32)
+        self.escritas = 0
+        self._bordes = {}
+        self._lock = threading.Lock()
+
+    def _indices(self, f):
+        # Bordes de cada fila en bins del espectro, cacheados por longitud
+        clave = (len(f), float(f[-1]))
+        if clave not in self._bordes:
+            bordes = np.searchsorted(f, np.linspace(0, self.fmax, self.filas + 1))
+            self._bordes[clave] = np.minimum(bordes[:-1], len(f) - 1)
+        return self._bordes[clave]
+
+    def agregar(self, f, S):
+        # S es |rfft(bloque * hanning)|: se escala a amplitud de un seno
+        # (ganancia de la ventana N/4) para que bloques de distinto largo
+        # queden en la misma escala de dB
+        N = 2 * (len(S) - 1)
+        columna = np.maximum.reduceat(np.asarray(S), self._indices(f)) * 4 / max(N, 1)
+        columna = 20 * np.log10(columna + 1e-12)
+        with self._lock:
+            self.datos[:, self.escritas % self.columnas] = columna
+            self.escritas += 1
+
+    def imagen(self):
+        with self._lock:
+            # La columna más reciente queda a la derecha
+            return np.roll(self.datos, -(self.escritas % self.columnas), axis=1), self.escritas
+
+
+class CascadaViva:
+    def __init__(self, ax, canvas, buffer, duracion_columna=0.1, rango_db=(-100, 0)):
+        self.ax = ax
+        self.canvas = canvas
+        self.buffer = buffer
+        self._mostradas = -1
+        historia = buffer.columnas * duracion_columna
+        self.imagen = ax.imshow(buffer.datos, aspect='auto', origin='lower', animated=True,
+                                extent=(-historia, 0, 0, buffer.fmax),
+                                vmin=rango_db[0], vmax=rango_db[1], cmap='viridis',
+                                interpolation='nearest')
+        ax.set_title("Cascada (espectrograma en vivo)")
+        ax.set_xlabel("Tiempo [s]")
+        ax.set_ylabel("Frecuencia [Hz]")
+        self.fondo = None
+        canvas.mpl_connect('draw_event', self._al_dibujar)
+
+    def _al_dibujar(self, evento):
+        self.fondo = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.imagen)
+
+    def refrescar(self):
+        datos, escritas = self.buffer.imagen()
+        if escritas == self._mostradas or self.fondo is None:
+            return False
+        self._mostradas = escritas
+        self.imagen.set_data(datos)
+        self.canvas.restore_region(self.fondo)
+        self.ax.draw_artist(self.imagen)
+        self.canvas.blit(self.ax.bbox)
+        return True
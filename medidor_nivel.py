@@ -0,0 +1,115 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+# === Medidor de nivel y SNR en banda ===
+# Se alimenta desde el callback de captura, bloque a bloque. Calcula RMS y
+# pico (dBFS) y la potencia dentro de la banda útil (fc ± ancho) frente a la
+# de fuera de banda. Si el receptor ya tiene el espectro del bloque (el de
+# detectar_tono) se reutiliza; si no, se calcula una rfft del bloque.
+# Cada `intervalo` segundos (10 Hz) entrega la lectura a `al_reportar`
+# y, si se indica, la agrega a un log CSV.
+
+
+def _db(x):
+    return 10 * np.log10(x + 1e-20)
+
+
+class MedidorNivel:
+    def __init__(self, fs, fc=10000, ancho=4000, intervalo=0.1, al_reportar=None,
+                 archivo_log=None, f_min=100):
+        self.fs = fs
+        self.fc = fc
+        self.ancho = ancho
+        self.intervalo = intervalo
+        self.al_reportar = al_reportar
+        self.archivo_log = archivo_log
+        self.f_min = f_min
+        self._mascaras = {}
+        self._lock = threading.Lock()
+        self._reiniciar()
+        self._t_reporte = time.perf_counter()
+        self.ultima = None
+        self._log = None
+        if archivo_log is not None:
+            # Con buffer de línea: una escritura corta cada 100 ms
+            nuevo = not os.path.exists(archivo_log)
+            self._log = open(archivo_log, "a", buffering=1)
+            if nuevo:
+                self._log.write("t,rms_dbfs,pico_dbfs,en_banda_db,fuera_banda_db,snr_db\n")
+
+    def _reiniciar(self):
+        self._suma_cuadrados = 0.0
+        self._muestras = 0
+        self._pico = 0.0
+        self._p_en = 0.0
+        self._p_fuera = 0.0
+        self._bins_en = 0
+        self._bins_fuera = 0
+
+    def _mascara(self, f):
+        clave = (len(f), float(f[-1]))
+        if clave not in self._mascaras:
+            en = (f >= self.fc - self.ancho) & (f <= self.fc + self.ancho)
+            fuera = ~en & (f >= self.f_min)
+            self._mascaras[clave] = (en, fuera)
+        return self._mascaras[clave]
+
+    def procesar(self, bloque, f=None, S=None):
+        if S is None:
+            f = np.fft.rfftfreq(len(bloque), 1 / self.fs)
+            S = np.abs(np.fft.rfft(bloque))
+        en, fuera = self._mascara(f)
+        potencia = S * S
+        with self._lock:
+            self._suma_cuadrados += float(np.dot(bloque, bloque))
+            self._muestras += len(bloque)
+            self._pico = max(self._pico, float(np.max(np.abs(bloque))))
+            self._p_en += float(potencia[en].sum())
+            self._p_fuera += float(potencia[fuera].sum())
+            self._bins_en += int(en.sum())
+            self._bins_fuera += int(fuera.sum())
+
+        ahora = time.perf_counter()
+        if ahora - self._t_reporte >= self.intervalo:
+            self._t_reporte = ahora
+            self.reportar()
+
+    def reportar(self):
+        with self._lock:
+            if self._muestras == 0:
+                return None
+            rms = np.sqrt(self._suma_cuadrados / self._muestras)
+            # Densidades por bin: la SNR compara la banda útil con el piso
+            # de ruido estimado fuera de ella
+            densidad_en = self._p_en / max(self._bins_en, 1)
+            densidad_fuera = self._p_fuera / max(self._bins_fuera, 1)
+            lectura = {
+                "t": time.time(),
+                "rms_dbfs": float(20 * np.log10(rms + 1e-12)),
+                "pico_dbfs": float(20 * np.log10(self._pico + 1e-12)),
+                "en_banda_db": float(_db(densidad_en)),
+                "fuera_banda_db": float(_db(densidad_fuera)),
+                "snr_db": float(_db(densidad_en) - _db(densidad_fuera)),
+            }
+            self._reiniciar()
+        self.ultima = lectura
+        if self._log is not None:
+            self._log.write(",".join(f"{lectura[k]:.3f}" for k in
+                                     ("t", "rms_dbfs", "pico_dbfs", "en_banda_db",
+                                      "fuera_banda_db", "snr_db")) + "\n")
+        if self.al_reportar is not None:
+            self.al_reportar(lectura)
+        return lectura
+
+    def cerrar(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+
+def texto_nivel(lectura):
+    return (f"🎚️ RMS {lectura['rms_dbfs']:.1f} dBFS | pico {lectura['pico_dbfs']:.1f} dBFS "
+            f"| SNR banda {lectura['snr_db']:.1f} dB")
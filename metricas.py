@@ -0,0 +1,190 @@
+import math
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import traza
+
+# === Métricas del receptor en formato Prometheus ===
+# Registro mínimo (contadores, medidores e histogramas con etiquetas) sin
+# dependencias. Se expone por HTTP (GET /metrics, sólo en 127.0.0.1) o se
+# reescribe cada tantos segundos un archivo .prom para el textfile
+# collector de node_exporter. Los colectores son funciones que se evalúan
+# al exportar: sirven para leer valores que ya lleva otro objeto (el
+# instrumento de callbacks, el medidor de nivel, la cola de gráficas).
+#
+#   --metricas[=puerto]          servidor HTTP (por defecto 9109)
+#   --metricas-archivo[=ruta]    archivo (por defecto receptor.prom)
+#
+# Con cualquiera de los dos, cada tramo de traza.py (etapas del receptor)
+# se acumula en el histograma <prefijo>_etapa_segundos{etapa="..."}.
+
+PUERTO = 9109
+INTERVALO_ARCHIVO = 5.0
+BORDES_S = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _clave(etiquetas):
+    # Ordenadas: las mismas etiquetas en otro orden son la misma serie
+    return tuple(sorted(etiquetas.items()))
+
+
+def _etiquetas(etiquetas):
+    if not etiquetas:
+        return ""
+    return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in etiquetas) + "}"
+
+
+def _numero(valor):
+    if valor is None or (isinstance(valor, float) and math.isnan(valor)):
+        return "NaN"
+    if valor == math.inf:
+        return "+Inf"
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Metricas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tipos = {}
+        self._ayudas = {}
+        self._bordes = {}
+        self._valores = {}       # nombre -> {etiquetas: valor}
+        self._histogramas = {}   # nombre -> {etiquetas: [conteos, suma, total]}
+        self._colectores = []
+
+    def describir(self, nombre, tipo, ayuda, bordes=BORDES_S):
+        self._tipos[nombre] = tipo
+        self._ayudas[nombre] = ayuda
+        if tipo == "histogram":
+            self._bordes[nombre] = tuple(bordes)
+
+    def sumar(self, nombre, valor=1, **etiquetas):
+        clave = _clave(etiquetas)
+        with self._lock:
+            serie = self._valores.setdefault(nombre, {})
+            serie[clave] = serie.get(clave, 0) + valor
+
+    def fijar(self, nombre, valor, **etiquetas):
+        with self._lock:
+            self._valores.setdefault(nombre, {})[_clave(etiquetas)] = valor
+
+    def observar(self, nombre, valor, **etiquetas):
+        bordes = self._bordes.get(nombre, BORDES_S)
+        clave = _clave(etiquetas)
+        with self._lock:
+            h = self._histogramas.setdefault(nombre, {}).get(clave)
+            if h is None:
+                h = self._histogramas[nombre][clave] = [[0] * len(bordes), 0.0, 0]
+            for i, borde in enumerate(bordes):
+                if valor <= borde:
+                    h[0][i] += 1
+                    break
+            h[1] += valor
+            h[2] += 1
+
+    def colector(self, funcion):
+        # funcion() -> [(nombre, valor, {etiquetas})], al exportar
+        self._colectores.append(funcion)
+
+    def texto(self):
+        muestras = {}
+        for funcion in self._colectores:
+            try:
+                for nombre, valor, etiquetas in funcion():
+                    muestras.setdefault(nombre, {})[_clave(etiquetas)] = valor
+            except Exception as e:
+                print("[ERROR] Colector de métricas:", e)
+        with self._lock:
+            for nombre, serie in self._valores.items():
+                muestras.setdefault(nombre, {}).update(serie)
+            histogramas = {n: {k: (list(c), s, t) for k, (c, s, t) in serie.items()}
+                           for n, serie in self._histogramas.items()}
+
+        lineas = []
+        for nombre in sorted(set(muestras) | set(histogramas)):
+            if nombre in self._ayudas:
+                lineas.append(f"# HELP {nombre} {self._ayudas[nombre]}")
+            tipo = self._tipos.get(nombre, "histogram" if nombre in histogramas else "gauge")
+            lineas.append(f"# TYPE {nombre} {tipo}")
+            for clave, valor in muestras.get(nombre, {}).items():
+                lineas.append(f"{nombre}{_etiquetas(clave)} {_numero(valor)}")
+            bordes = self._bordes.get(nombre, BORDES_S)
+            for clave, (conteos, suma, total) in histogramas.get(nombre, {}).items():
+                acumulado = 0
+                for borde, conteo in zip(bordes, conteos):
+                    acumulado += conteo
+                    lineas.append(f"{nombre}_bucket{_etiquetas(clave + (('le', _numero(float(borde))),))} {acumulado}")
+                lineas.append(f"{nombre}_bucket{_etiquetas(clave + (('le', '+Inf'),))} {total}")
+                lineas.append(f"{nombre}_sum{_etiquetas(clave)} {_numero(suma)}")
+                lineas.append(f"{nombre}_count{_etiquetas(clave)} {total}")
+        return "\n".join(lineas) + "\n"
+
+    def escribir_archivo(self, ruta):
+        # Escritura atómica: el collector nunca lee un archivo a medias
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            f.write(self.texto())
+        os.replace(temporal, ruta)
+
+    def reescribir(self, ruta, intervalo=INTERVALO_ARCHIVO):
+        def bucle():
+            while True:
+                try:
+                    self.escribir_archivo(ruta)
+                except OSError as e:
+                    print("[ERROR] Archivo de métricas:", e)
+                time.sleep(intervalo)
+        threading.Thread(target=bucle, name="metricas-archivo", daemon=True).start()
+
+    def servir(self, puerto=PUERTO, host="127.0.0.1"):
+        registro = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                cuerpo = registro.texto().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def log_message(self, *args):
+                pass
+
+        servidor = ThreadingHTTPServer((host, puerto), Manejador)
+        servidor.daemon_threads = True
+        threading.Thread(target=servidor.serve_forever, name="metricas-http", daemon=True).start()
+        return servidor
+
+
+REGISTRO = Metricas()
+
+
+def configurar(argv, prefijo, registro=REGISTRO):
+    # Devuelve True si quedó expuesto por HTTP o por archivo
+    expuesto = False
+    for arg in argv:
+        if arg == "--metricas" or arg.startswith("--metricas="):
+            puerto = int(arg.partition("=")[2] or PUERTO)
+            registro.servir(puerto)
+            print(f"📈 Métricas en http://127.0.0.1:{puerto}/metrics")
+            expuesto = True
+        elif arg == "--metricas-archivo" or arg.startswith("--metricas-archivo="):
+            ruta = arg.partition("=")[2] or f"{prefijo}.prom"
+            registro.reescribir(ruta)
+            print(f"📈 Métricas en {ruta} (cada {INTERVALO_ARCHIVO:g} s)")
+            expuesto = True
+    if expuesto:
+        nombre = f"{prefijo}_etapa_segundos"
+        registro.describir(nombre, "histogram", "Duración de cada etapa (tramos de traza.py)")
+        traza.escuchar(lambda etapa, segundos: registro.observar(nombre, segundos, etapa=etapa))
+    return expuesto
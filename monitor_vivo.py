@@ -0,0 +1,168 @@
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from audio_backend import sd
+
+# === Monitor de micrófono en vivo ===
+# La captura y el dibujo van por separado: el callback de audio sólo copia
+# el bloque a un buffer circular y cuenta; un timer de la GUI redibuja a
+# FPS fijos con blitting de las dos líneas (tiempo y espectro). Si dibujar
+# tarda, se pierden cuadros de pantalla, nunca bloques de audio.
+# Reemplaza a BK/visua_mic.py y BK/monitor.py (dibujaban dentro del
+# callback), que quedan como referencia.
+
+
+class BufferCircular:
+    def __init__(self, bloques, blocksize):
+        self.datos = np.zeros((bloques, blocksize), dtype=np.float32)
+        self.escritos = 0   # Número de secuencia del último bloque escrito
+        self._lock = threading.Lock()
+
+    def escribir(self, bloque):
+        with self._lock:
+            self.datos[self.escritos % len(self.datos)] = bloque
+            self.escritos += 1
+
+    def ultimo(self):
+        with self._lock:
+            if self.escritos == 0:
+                return 0, None
+            return self.escritos, self.datos[(self.escritos - 1) % len(self.datos)].copy()
+
+
+class MonitorVivo:
+    def __init__(self, fs=44100, duracion_bloque=0.1, fps=15, bloques_buffer=32):
+        self.fs = fs
+        self.blocksize = int(fs * duracion_bloque)
+        self.fps = fps
+        self.buffer = BufferCircular(bloques_buffer, self.blocksize)
+        self.ventana = np.hanning(self.blocksize).astype(np.float32)
+        self.f = np.fft.rfftfreq(self.blocksize, 1 / fs)
+
+        # Contadores (captura)
+        self.overflows = 0
+        self.max_callback_ms = 0.0
+        # Contadores (pantalla)
+        self.cuadros = 0
+        self.cuadros_perdidos = 0
+        self.bloques_no_mostrados = 0
+        self._ultimo_mostrado = 0
+        self._fondo = None
+        self._t_ultimo_cuadro = None
+        self._t_reporte = time.perf_counter()
+        self._cpu_reporte = time.process_time()
+
+    # --- Captura: lo mínimo posible dentro del callback ---
+    def callback(self, indata, frames, time_info, status):
+        t0 = time.perf_counter()
+        if status and getattr(status, "input_overflow", False):
+            self.overflows += 1
+        self.buffer.escribir(indata[:, 0])
+        self.max_callback_ms = max(self.max_callback_ms, (time.perf_counter() - t0) * 1000)
+
+    # --- Pantalla ---
+    def crear_figura(self):
+        import matplotlib.pyplot as plt
+        self.plt = plt
+        self.fig, (self.ax_tiempo, self.ax_freq) = plt.subplots(2, 1, figsize=(10, 6))
+
+        self.linea_tiempo, = self.ax_tiempo.plot(np.arange(self.blocksize), np.zeros(self.blocksize),
+                                                 lw=1, animated=True)
+        self.ax_tiempo.set_title("Señal de micrófono (tiempo)")
+        self.ax_tiempo.set_xlabel("Muestras")
+        self.ax_tiempo.set_ylabel("Amplitud")
+        self.ax_tiempo.set_ylim(-1, 1)
+        self.ax_tiempo.set_xlim(0, self.blocksize)
+        self.ax_tiempo.grid()
+
+        self.linea_freq, = self.ax_freq.plot(self.f, np.full(len(self.f), -100.0), lw=1, animated=True)
+        self.ax_freq.set_title("Espectro (frecuencia en dB)")
+        self.ax_freq.set_xlabel("Frecuencia [Hz]")
+        self.ax_freq.set_ylabel("Magnitud [dB]")
+        self.ax_freq.set_ylim(-100, 0)
+        self.ax_freq.set_xlim(0, self.fs / 2)
+        self.ax_freq.grid()
+        self.fig.tight_layout()
+
+        self.fig.canvas.mpl_connect('draw_event', self._al_dibujar)
+        self.timer = self.fig.canvas.new_timer(interval=int(1000 / self.fps))
+        self.timer.add_callback(self._refrescar)
+        return self.fig
+
+    def _al_dibujar(self, evento):
+        self._fondo = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self.ax_tiempo.draw_artist(self.linea_tiempo)
+        self.ax_freq.draw_artist(self.linea_freq)
+
+    def _refrescar(self):
+        ahora = time.perf_counter()
+        periodo = 1 / self.fps
+        if self._t_ultimo_cuadro is not None:
+            # Ticks del timer que no llegaron a tiempo por dibujo lento
+            self.cuadros_perdidos += max(int((ahora - self._t_ultimo_cuadro) / periodo) - 1, 0)
+        self._t_ultimo_cuadro = ahora
+
+        seq, bloque = self.buffer.ultimo()
+        if bloque is None or seq == self._ultimo_mostrado or self._fondo is None:
+            return
+        self.bloques_no_mostrados += seq - self._ultimo_mostrado - 1
+        self._ultimo_mostrado = seq
+
+        espectro = np.fft.rfft(bloque * self.ventana)
+        magnitud = 20 * np.log10(np.abs(espectro) + 1e-12)
+        self.linea_tiempo.set_ydata(bloque)
+        self.linea_freq.set_ydata(magnitud)
+
+        canvas = self.fig.canvas
+        canvas.restore_region(self._fondo)
+        self.ax_tiempo.draw_artist(self.linea_tiempo)
+        self.ax_freq.draw_artist(self.linea_freq)
+        canvas.blit(self.ax_tiempo.bbox)
+        canvas.blit(self.ax_freq.bbox)
+        canvas.flush_events()
+        self.cuadros += 1
+
+        if ahora - self._t_reporte >= 1.0:
+            self._reportar(ahora)
+
+    def _reportar(self, ahora):
+        cpu = time.process_time()
+        uso = 100 * (cpu - self._cpu_reporte) / (ahora - self._t_reporte)
+        print(f"📊 bloques {self.buffer.escritos} | cuadros {self.cuadros} "
+              f"| perdidos {self.cuadros_perdidos} | bloques sin mostrar {self.bloques_no_mostrados} "
+              f"| overflows {self.overflows} | callback máx {self.max_callback_ms:.2f} ms "
+              f"| CPU {uso:.0f} %")
+        self._t_reporte = ahora
+        self._cpu_reporte = cpu
+
+    def ejecutar(self):
+        self.crear_figura()
+        self._t_reporte = time.perf_counter()
+        self._cpu_reporte = time.process_time()
+        with sd.InputStream(callback=self.callback, channels=1, samplerate=self.fs,
+                            blocksize=self.blocksize):
+            print(f"🎙 Monitor en vivo a {self.fps} FPS... Cerrá la ventana o Ctrl+C para salir.")
+            self.timer.start()
+            try:
+                self.plt.show()
+            except KeyboardInterrupt:
+                pass
+        self.timer.stop()
+        self._reportar(time.perf_counter())
+        print("🛑 Visualización detenida.")
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Monitor de micrófono en vivo (tiempo + espectro).")
+    p.add_argument("--fs", type=int, default=44100)
+    p.add_argument("--bloque", type=float, default=0.1, help="Duración del bloque [s]")
+    p.add_argument("--fps", type=float, default=15, help="Cuadros por segundo de la pantalla")
+    args = p.parse_args(argv)
+    MonitorVivo(fs=args.fs, duracion_bloque=args.bloque, fps=args.fps).ejecutar()
+
+
+if __name__ == '__main__':
+    main()
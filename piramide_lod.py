@@ -0,0 +1,158 @@
+import os
+import sys
+
+import numpy as np
+
+from render_decimado import envolvente_min_max
+
+# === Pirámide min/max para hacer zoom en grabaciones largas ===
+# Se arma una sola vez por grabación: el nivel k guarda el mínimo y el máximo
+# de cada bloque de BLOQUE_BASE * FACTOR**(k-1) muestras. Para dibujar una
+# vista [t0, t1] se elige el nivel más grueso que todavía tiene al menos un
+# bloque por píxel, así el costo depende de los píxeles y no de la duración.
+# Vistas más cortas que BLOQUE_BASE * píxeles se reducen desde las muestras.
+# Los niveles se guardan junto al .wav como <nombre>_lod.npz (~N/6 bytes).
+
+BLOQUE_BASE = 64
+FACTOR = 4
+MIN_BLOQUES = 512
+TROZO = 1 << 20
+
+
+def ruta_lod(ruta_wav):
+    return os.path.splitext(ruta_wav)[0] + "_lod.npz"
+
+
+def _reducir(minimos, maximos, factor):
+    # Se rellena la cola repitiendo el último valor para completar el bloque
+    relleno = -len(minimos) % factor
+    if relleno:
+        minimos = np.concatenate((minimos, np.full(relleno, minimos[-1])))
+        maximos = np.concatenate((maximos, np.full(relleno, maximos[-1])))
+    return (minimos.reshape(-1, factor).min(axis=1),
+            maximos.reshape(-1, factor).max(axis=1))
+
+
+def _primer_nivel(senal, bloque):
+    # Por trozos: con un .wav en mmap no se copia la grabación entera
+    paso = TROZO * bloque
+    partes = [_reducir(senal[i:i + paso], senal[i:i + paso], bloque)
+              for i in range(0, len(senal), paso)]
+    return (np.concatenate([p[0] for p in partes]).astype(np.float32),
+            np.concatenate([p[1] for p in partes]).astype(np.float32))
+
+
+class PiramideMinMax:
+    # `escala` pasa muestras enteras (wav int16 en mmap) a [-1, 1] al dibujar
+    def __init__(self, senal, fs, niveles=None, factor=FACTOR, escala=1.0,
+                 bloque_base=BLOQUE_BASE):
+        self.senal = senal
+        self.fs = fs
+        self.factor = factor
+        self.bloque_base = bloque_base
+        self.escala = escala
+        self.n = len(senal)
+        if niveles is None:
+            niveles = []
+            if self.n > MIN_BLOQUES * bloque_base:
+                niveles.append(_primer_nivel(senal, bloque_base))
+                # Cada nivel se arma a partir del anterior: O(N) en total
+                while len(niveles[-1][0]) > MIN_BLOQUES * factor:
+                    niveles.append(_reducir(*niveles[-1], factor))
+        self.niveles = niveles
+
+    def bloque(self, k):
+        # Muestras por bloque del nivel k (niveles[k - 1]); el nivel 0 es la señal
+        return self.bloque_base * self.factor ** (k - 1) if k > 0 else 1
+
+    def guardar(self, ruta):
+        datos = {"fs": self.fs, "factor": self.factor, "n": self.n, "escala": self.escala,
+                 "bloque_base": self.bloque_base}
+        for k, (minimos, maximos) in enumerate(self.niveles, start=1):
+            datos[f"min_{k}"] = minimos
+            datos[f"max_{k}"] = maximos
+        np.savez(ruta, **datos)
+
+    @classmethod
+    def cargar(cls, ruta, senal):
+        with np.load(ruta) as datos:
+            if int(datos["n"]) != len(senal):
+                raise ValueError("La pirámide no corresponde a la señal")
+            niveles = []
+            k = 1
+            while f"min_{k}" in datos:
+                niveles.append((datos[f"min_{k}"], datos[f"max_{k}"]))
+                k += 1
+            return cls(senal, int(datos["fs"]), niveles, int(datos["factor"]),
+                       float(datos["escala"]), int(datos["bloque_base"]))
+
+    def duracion(self):
+        return self.n / self.fs
+
+    def rango(self):
+        if self.niveles:
+            minimos, maximos = self.niveles[-1]
+            return float(minimos.min()) * self.escala, float(maximos.max()) * self.escala
+        return float(np.min(self.senal)) * self.escala, float(np.max(self.senal)) * self.escala
+
+    def ventana(self, t0, t1, pixeles):
+        i0 = min(max(int(np.floor(t0 * self.fs)), 0), self.n)
+        i1 = min(max(int(np.ceil(t1 * self.fs)) + 1, i0), self.n)
+        muestras = i1 - i0
+        if muestras == 0:
+            return np.empty(0), np.empty(0)
+
+        # Nivel más grueso que todavía deja al menos un bloque por píxel
+        k = 0
+        while k < len(self.niveles) and muestras / self.bloque(k + 1) >= pixeles:
+            k += 1
+        if k == 0:
+            x = (i0 + np.arange(muestras)) / self.fs
+            x, y = envolvente_min_max(self.senal[i0:i1], x, pixeles)
+            return x, y * self.escala
+
+        bloque = self.bloque(k)
+        j0 = i0 // bloque
+        j1 = -(-i1 // bloque)
+        minimos, maximos = self.niveles[k - 1]
+        minimos, maximos = minimos[j0:j1], maximos[j0:j1]
+        # Quedan entre pixeles y factor * pixeles bloques: se agrupan hasta
+        # no pasar del ancho del eje
+        por_pixel = -(-len(minimos) // pixeles)
+        if por_pixel > 1:
+            minimos, maximos = _reducir(minimos, maximos, por_pixel)
+        inicios = (j0 + np.arange(len(minimos)) * por_pixel) * bloque
+        x = np.empty(2 * len(minimos))
+        x[0::2] = inicios / self.fs
+        x[1::2] = np.minimum(inicios + por_pixel * bloque, self.n) / self.fs
+        y = np.empty(2 * len(minimos), dtype=np.float32)
+        y[0::2] = minimos
+        y[1::2] = maximos
+        return x, y * self.escala
+
+
+def cargar_o_construir(ruta_wav):
+    # Se reconstruye si falta o si el .wav es más nuevo que la pirámide
+    from scipy.io import wavfile
+    fs, senal = wavfile.read(ruta_wav, mmap=True)
+    if senal.ndim > 1:
+        senal = senal[:, 0]
+    escala = 1.0
+    if np.issubdtype(senal.dtype, np.integer):
+        escala = 1.0 / np.iinfo(senal.dtype).max
+    lod = ruta_lod(ruta_wav)
+    if os.path.exists(lod) and os.path.getmtime(lod) >= os.path.getmtime(ruta_wav):
+        try:
+            return PiramideMinMax.cargar(lod, senal)
+        except (ValueError, KeyError, OSError):
+            pass
+    piramide = PiramideMinMax(senal, fs, escala=escala)
+    piramide.guardar(lod)
+    return piramide
+
+
+if __name__ == '__main__':
+    # Arma las pirámides de grabaciones ya existentes
+    for ruta in sys.argv[1:]:
+        p = cargar_o_construir(ruta)
+        print(f"📐 {ruta}: {len(p.niveles)} niveles -> {ruta_lod(ruta)}")
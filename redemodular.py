@@ -0,0 +1,194 @@
+import argparse
+import io
+import json
+import os
+import sys
+import tarfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from scipy.io.wavfile import read, write
+
+import captura_iq
+
+# === Re-demodulación offline y en paralelo ===
+# Toma un directorio (o un .zip/.tar) con tramas capturadas — pasabanda en
+# _pasabanda.wav/.npy o IQ en _iq.npz — y las vuelve a demodular con otra
+# configuración del receptor, repartiendo las tramas entre procesos.
+# Los resultados se escriben a medida que cada proceso termina.
+#
+# Ejemplo:
+#   python redemodular.py capturas/ --phi 0.3 --deltaf 5 --banda USB -j 4
+
+SUFIJOS = ("_pasabanda.wav", "_pasabanda.npy", "_iq.npz")
+
+
+def _ruta_relativa(miembro):
+    # Ruta del miembro dentro del archivo, sin "", "." ni "..": la salida
+    # repite sus subdirectorios y nunca queda fuera de -o
+    partes = [p for p in miembro.replace("\\", "/").split("/") if p not in ("", ".", "..")]
+    return os.path.join(*partes)
+
+
+def listar_tramas(origen, sufijos=SUFIJOS):
+    sufijos = tuple(sufijos)
+    if os.path.isdir(origen):
+        nombres = sorted(n for n in os.listdir(origen) if n.endswith(sufijos))
+        return [(origen, None, n) for n in nombres]
+    if zipfile.is_zipfile(origen):
+        with zipfile.ZipFile(origen) as z:
+            nombres = z.namelist()
+    elif tarfile.is_tarfile(origen):
+        with tarfile.open(origen) as t:
+            nombres = [m.name for m in t.getmembers() if m.isfile()]
+    else:
+        raise ValueError(f"No es un directorio ni un archivo .zip/.tar: {origen}")
+    # Con la ruta completa, dos capturas de igual nombre en distintas
+    # carpetas (p. ej. de dos días) no escriben la misma salida
+    return [(origen, n, _ruta_relativa(n)) for n in sorted(nombres)
+            if n.endswith(sufijos)]
+
+
+def _leer_bytes(origen, miembro):
+    if zipfile.is_zipfile(origen):
+        with zipfile.ZipFile(origen) as z:
+            return z.read(miembro)
+    with tarfile.open(origen) as t:
+        return t.extractfile(miembro).read()
+
+
+def cargar_trama(origen, miembro, nombre, fs_defecto):
+    # Devuelve (datos, fs, es_iq, parametros_iq)
+    if miembro is None:
+        fuente = os.path.join(origen, nombre)
+    else:
+        fuente = io.BytesIO(_leer_bytes(origen, miembro))
+
+    if nombre.endswith(".npz"):
+        iq, parametros = captura_iq.cargar_iq(fuente)
+        return iq, parametros["fs_iq"], True, parametros
+    if nombre.endswith(".npy"):
+        return np.load(fuente).astype(np.float32), fs_defecto, False, None
+
+    fs, datos = read(fuente)
+    if np.issubdtype(datos.dtype, np.integer):
+        datos = datos / float(np.iinfo(datos.dtype).max)
+    datos = datos.astype(np.float32)
+    if datos.ndim == 2:
+        datos = datos.mean(axis=1)
+    return datos, fs, False, None
+
+
+def procesar_trama(origen, miembro, nombre, config):
+    t0 = time.perf_counter()
+    cpu0 = time.process_time()
+    datos, fs, es_iq, parametros = cargar_trama(origen, miembro, nombre, config["fs"])
+    t_carga = time.perf_counter() - t0
+
+    if es_iq:
+        iq, fs_iq = datos, fs
+        fc = parametros["fc"]
+    else:
+        fc = config["fc"]
+        iq, fs_iq = captura_iq.mezclar_a_banda_base(datos, fs, fc, config["decimacion"])
+
+    modo = "envolvente" if config["detector"] == "envolvente" else config["banda"]
+    audio = captura_iq.demodular_iq(iq, fs_iq, phi=config["phi"], deltaf=config["deltaf"],
+                                    modo=modo, corte=config["corte"], orden=config["orden"])
+
+    base = os.path.splitext(nombre)[0]
+    salida = os.path.join(config["salida"], base + "_demod.wav")
+    os.makedirs(os.path.dirname(salida), exist_ok=True)
+    write(salida, int(fs_iq), (audio * 32767).astype(np.int16))
+
+    duracion = len(iq) / fs_iq
+    t_total = time.perf_counter() - t0
+    return {
+        "trama": nombre if miembro is None else f"{origen}:{miembro}",
+        "salida": salida,
+        "tipo": "iq" if es_iq else "pasabanda",
+        "fs_entrada": float(fs),
+        "fs_salida": float(fs_iq),
+        "fc": float(fc),
+        "duracion_s": duracion,
+        "tiempo_carga_s": t_carga,
+        "tiempo_total_s": t_total,
+        "cpu_s": time.process_time() - cpu0,
+        "factor_tiempo_real": duracion / t_total if t_total > 0 else None,
+        "rms": float(np.sqrt(np.mean(audio ** 2))),
+        "pid": os.getpid(),
+    }
+
+
+def redemodular(origen, config, procesos=None, archivo_metricas=None):
+    tramas = listar_tramas(origen, config.get("sufijos", SUFIJOS))
+    # Procesos en paralelo no pueden compartir un archivo de salida
+    vistos = set()
+    for _, miembro, nombre in tramas:
+        if nombre in vistos:
+            raise ValueError(f"Dos tramas darían la misma salida: {miembro or nombre}")
+        vistos.add(nombre)
+    os.makedirs(config["salida"], exist_ok=True)
+    archivo_metricas = archivo_metricas or os.path.join(config["salida"], "metricas.jsonl")
+
+    t0 = time.perf_counter()
+    resultados = []
+    errores = 0
+    with open(archivo_metricas, "w") as metricas, \
+            ProcessPoolExecutor(max_workers=procesos) as pool:
+        metricas.write(json.dumps({"config": config, "origen": origen}) + "\n")
+        futuros = {pool.submit(procesar_trama, o, m, n, config): n for o, m, n in tramas}
+        for i, futuro in enumerate(as_completed(futuros), 1):
+            nombre = futuros[futuro]
+            try:
+                r = futuro.result()
+            except Exception as e:
+                errores += 1
+                r = {"trama": nombre, "error": str(e)}
+                print(f"❌ [{i}/{len(tramas)}] {nombre}: {e}")
+            else:
+                resultados.append(r)
+                print(f"✅ [{i}/{len(tramas)}] {nombre} -> {r['salida']} "
+                      f"({r['duracion_s']:.1f} s en {r['tiempo_total_s'] * 1000:.0f} ms)")
+            # Una línea por trama, escrita en cuanto termina
+            metricas.write(json.dumps(r) + "\n")
+            metricas.flush()
+
+    total = time.perf_counter() - t0
+    audio_total = sum(r["duracion_s"] for r in resultados)
+    print(f"🏁 {len(resultados)} tramas ({audio_total:.1f} s de audio) en {total:.2f} s, "
+          f"{errores} errores. Métricas en '{archivo_metricas}'")
+    return resultados
+
+
+def _argumentos(argv=None):
+    p = argparse.ArgumentParser(description="Re-demodula en paralelo tramas capturadas.")
+    p.add_argument("origen", help="Directorio, .zip o .tar con tramas capturadas")
+    p.add_argument("-o", "--salida", default="redemodulado", help="Directorio de salida")
+    p.add_argument("-j", "--procesos", type=int, default=None, help="Procesos (defecto: CPUs)")
+    p.add_argument("--fc", type=float, default=10000, help="Portadora [Hz]")
+    p.add_argument("--fs", type=float, default=44100, help="fs de las tramas .npy [Hz]")
+    p.add_argument("--phi", type=float, default=0.0, help="Error de fase [rad]")
+    p.add_argument("--deltaf", type=float, default=0.0, help="Error de frecuencia [Hz]")
+    p.add_argument("--corte", type=float, default=4000, help="Corte del paso bajo [Hz]")
+    p.add_argument("--orden", type=int, default=6, help="Orden del Butterworth")
+    p.add_argument("--banda", choices=["coherente", "USB", "LSB"], default="coherente",
+                   help="Banda lateral a recuperar ('coherente' = ambas)")
+    p.add_argument("--detector", choices=["coherente", "envolvente"], default="coherente")
+    p.add_argument("--decimacion", type=int, default=captura_iq.DECIMACION,
+                   help="Decimación aplicada a tramas pasabanda")
+    p.add_argument("--sufijos", nargs="+", default=list(SUFIJOS),
+                   help="Sufijos de archivo que se consideran tramas")
+    return p.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = _argumentos()
+    config = {k: v for k, v in vars(args).items() if k not in ("origen", "procesos")}
+    try:
+        redemodular(args.origen, config, procesos=args.procesos)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
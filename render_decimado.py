@@ -0,0 +1,65 @@
+import numpy as np
+
+# === Reducción de trazas para graficar ===
+# Un eje de ~1000 píxeles no puede mostrar 220k muestras: para cada píxel
+# basta con el mínimo y el máximo de las muestras que caen en él. El trazo
+# resultante es visualmente idéntico y su costo no depende de la longitud.
+
+PIXELES_DEFECTO = 1200
+
+
+def envolvente_min_max(y, x=None, pixeles=PIXELES_DEFECTO):
+    y = np.asarray(y)
+    N = len(y)
+    if x is None:
+        x = np.arange(N)
+    if N <= 2 * pixeles:
+        return np.asarray(x), y
+    # Se descarta la cola que no completa un píxel y se agrega al último
+    por_pixel = N // pixeles
+    util = por_pixel * pixeles
+    bloques = y[:util].reshape(pixeles, por_pixel)
+    minimos = bloques.min(axis=1)
+    maximos = bloques.max(axis=1)
+    if util < N:
+        minimos[-1] = min(minimos[-1], y[util:].min())
+        maximos[-1] = max(maximos[-1], y[util:].max())
+    # Se intercalan min y max en el orden en que aparecen para que la línea
+    # recorra el mismo camino que la señal original
+    argmin = bloques.argmin(axis=1)
+    argmax = bloques.argmax(axis=1)
+    primero_min = argmin <= argmax
+    y_red = np.empty(2 * pixeles, dtype=y.dtype)
+    y_red[0::2] = np.where(primero_min, minimos, maximos)
+    y_red[1::2] = np.where(primero_min, maximos, minimos)
+    x = np.asarray(x)
+    x_inicio = x[:util:por_pixel]
+    x_fin = x[por_pixel - 1:util:por_pixel]
+    x_red = np.empty(2 * pixeles, dtype=np.result_type(x.dtype, np.float64))
+    x_red[0::2] = x_inicio
+    x_red[1::2] = x_fin
+    return x_red, y_red
+
+
+def espectro_agrupado(freqs, espectro, pixeles=PIXELES_DEFECTO):
+    # Para el espectro interesa no perder picos (tonos): se toma el máximo
+    # de cada grupo de bins
+    freqs = np.asarray(freqs)
+    espectro = np.asarray(espectro)
+    N = len(espectro)
+    if N <= pixeles:
+        return freqs, espectro
+    por_pixel = int(np.ceil(N / pixeles))
+    relleno = por_pixel * int(np.ceil(N / por_pixel)) - N
+    if relleno:
+        espectro = np.concatenate((espectro, np.full(relleno, espectro[-1])))
+        freqs = np.concatenate((freqs, np.full(relleno, freqs[-1])))
+    grupos = espectro.reshape(-1, por_pixel)
+    return freqs.reshape(-1, por_pixel).mean(axis=1), grupos.max(axis=1)
+
+
+def pixeles_eje(ax, defecto=PIXELES_DEFECTO):
+    try:
+        return max(int(ax.get_window_extent().width), 100)
+    except Exception:
+        return defecto
@@ -0,0 +1,118 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# === Pool de procesos para renderizar gráficas en segundo plano ===
+# El receptor no debe esperar a matplotlib: los arreglos se copian a memoria
+# compartida y un proceso del pool dibuja y guarda el PNG mientras el
+# receptor vuelve a escuchar.
+#
+# Los procesos salen de un forkserver (spawn donde no lo hay), nunca de un
+# fork del receptor: con el hilo de PortAudio y los del instrumento
+# corriendo, un fork puede heredar sus locks tomados y colgarse. Se crean
+# todos al construir el pool, antes de abrir el primer InputStream.
+
+
+def a_memoria_compartida(arreglo):
+    arreglo = np.ascontiguousarray(arreglo)
+    shm = shared_memory.SharedMemory(create=True, size=max(arreglo.nbytes, 1))
+    np.ndarray(arreglo.shape, dtype=arreglo.dtype, buffer=shm.buf)[...] = arreglo
+    return shm, (shm.name, arreglo.shape, arreglo.dtype.str)
+
+
+def desde_memoria_compartida(desc):
+    nombre, forma, dtype = desc
+    shm = shared_memory.SharedMemory(name=nombre)
+    return shm, np.ndarray(forma, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def _renderizar_linea(nombre_png, desc_y, desc_x, fs, titulo, xlabel, ylabel):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    shm_y, y = desde_memoria_compartida(desc_y)
+    shm_x = None
+    try:
+        if desc_x is not None:
+            shm_x, x = desde_memoria_compartida(desc_x)
+        else:
+            x = np.arange(len(y)) / fs
+        fig = plt.figure()
+        plt.plot(x, y)
+        plt.title(titulo)
+        plt.xlabel(xlabel)
+        plt.ylabel(ylabel)
+        plt.grid()
+        plt.savefig(nombre_png)
+        plt.close(fig)
+        # Soltar las vistas antes de cerrar los segmentos compartidos
+        del x, y
+    finally:
+        shm_y.close()
+        if shm_x is not None:
+            shm_x.close()
+    return nombre_png
+
+
+def _precargar():
+    # En cada proceso nuevo: matplotlib ya importado para la primera gráfica
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot
+
+
+def _contexto():
+    metodos = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in metodos else "spawn")
+
+
+class PoolGraficas:
+    def __init__(self, procesos=2):
+        self.executor = ProcessPoolExecutor(max_workers=procesos, mp_context=_contexto())
+        # Una tarea por proceso: el executor los crea ya, no en el primer
+        # submit (que llega con el stream de audio abierto)
+        for _ in range(procesos):
+            self.executor.submit(_precargar)
+        self._lock = threading.Lock()
+        self._pendientes = 0
+        self.completadas = 0
+        self.errores = 0
+
+    def graficar_linea(self, nombre_png, y, x=None, fs=None, titulo="", xlabel="", ylabel=""):
+        segmentos = []
+        shm_y, desc_y = a_memoria_compartida(y)
+        segmentos.append(shm_y)
+        desc_x = None
+        if x is not None:
+            shm_x, desc_x = a_memoria_compartida(x)
+            segmentos.append(shm_x)
+
+        with self._lock:
+            self._pendientes += 1
+        futuro = self.executor.submit(_renderizar_linea, nombre_png, desc_y, desc_x,
+                                      fs, titulo, xlabel, ylabel)
+        futuro.add_done_callback(lambda f: self._terminado(f, segmentos))
+        return futuro
+
+    def _terminado(self, futuro, segmentos):
+        for shm in segmentos:
+            shm.close()
+            shm.unlink()
+        with self._lock:
+            self._pendientes -= 1
+            if futuro.exception() is not None:
+                self.errores += 1
+                print(f"[ERROR] Render: {futuro.exception()}")
+            else:
+                self.completadas += 1
+
+    def pendientes(self):
+        with self._lock:
+            return self._pendientes
+
+    def cerrar(self, esperar=True):
+        self.executor.shutdown(wait=esperar)
@@ -0,0 +1,176 @@
+import atexit
+import json
+import threading
+import time
+
+# === Instrumentación de los callbacks de audio ===
+# Envuelve el callback de un InputStream: mide su duración con
+# perf_counter_ns frente al presupuesto del bloque (frames / fs), el tiempo
+# entre llamadas (jitter respecto del período esperado) y cuenta los
+# overflow/underflow que informa `status`. Las duraciones van a histogramas
+# tipo HDR: registrar es O(1) y sin reservas de memoria, apto para el hilo de
+# audio. Un hilo aparte entrega un resumen periódico y al salir se vuelcan
+# los histogramas a JSON.
+
+SUB_BITS = 4
+SUB = 1 << SUB_BITS  # sub-cubetas por octava: ~6 % de resolución
+OCTAVAS = 40         # la última cubeta llega a 2^(OCTAVAS+SUB_BITS) ns = 2^44 ns (~4.9 h);
+                     # lo que pase de ahí se cuenta en ella
+
+
+class HistogramaHDR:
+    def __init__(self):
+        self.conteos = [0] * (SUB * (OCTAVAS + 1))
+        self.total = 0
+        self.suma = 0
+        self.minimo = None
+        self.maximo = 0
+
+    @staticmethod
+    def _indice(valor):
+        # Exacto por debajo de 2·SUB; arriba, SUB cubetas por octava
+        if valor < 2 * SUB:
+            return valor
+        e = valor.bit_length() - SUB_BITS - 1
+        return SUB * (e + 1) + (valor >> e) - SUB
+
+    @staticmethod
+    def _rango(indice):
+        if indice < 2 * SUB:
+            return indice, indice
+        e = indice // SUB - 1
+        m = indice % SUB + SUB
+        return m << e, ((m + 1) << e) - 1
+
+    def registrar(self, valor):
+        valor = max(int(valor), 0)
+        self.conteos[min(self._indice(valor), len(self.conteos) - 1)] += 1
+        self.total += 1
+        self.suma += valor
+        if self.minimo is None or valor < self.minimo:
+            self.minimo = valor
+        if valor > self.maximo:
+            self.maximo = valor
+
+    def percentil(self, q):
+        if self.total == 0:
+            return 0
+        objetivo = q * self.total
+        acumulado = 0
+        for i, c in enumerate(self.conteos):
+            acumulado += c
+            if c and acumulado >= objetivo:
+                bajo, alto = self._rango(i)
+                return min((bajo + alto) // 2, self.maximo)
+        return self.maximo
+
+    def a_dict(self):
+        # Sólo las cubetas con datos: [desde_ns, hasta_ns, conteo]
+        cubetas = [[*self._rango(i), c] for i, c in enumerate(self.conteos) if c]
+        return {"total": self.total, "min_ns": self.minimo or 0, "max_ns": self.maximo,
+                "media_ns": self.suma // max(self.total, 1), "cubetas": cubetas}
+
+
+class InstrumentoCallback:
+    def __init__(self, nombre, fs, intervalo_resumen=5.0, al_resumir=None, archivo_volcado=None):
+        self.nombre = nombre
+        self.fs = fs
+        self.intervalo_resumen = intervalo_resumen
+        self.al_resumir = al_resumir
+        self.archivo_volcado = archivo_volcado
+        self.duracion = HistogramaHDR()
+        self.jitter = HistogramaHDR()
+        self.llamadas = 0
+        self.excedidos = 0
+        self.overflows = 0
+        self.underflows = 0
+        self.intervalo_max_ns = 0
+        self.presupuesto_ns = 0
+        self._ultimo_ns = None
+        self._llamadas_resumen = 0
+        self._detener = threading.Event()
+        if al_resumir is not None:
+            threading.Thread(target=self._bucle_resumen, daemon=True).start()
+        if archivo_volcado is not None:
+            atexit.register(self.volcar, archivo_volcado)
+
+    def envolver(self, callback):
+        def instrumentado(indata, frames, time_info, status):
+            t0 = time.perf_counter_ns()
+            try:
+                return callback(indata, frames, time_info, status)
+            finally:
+                self._registrar(t0, time.perf_counter_ns(), frames, status)
+        return instrumentado
+
+    def _registrar(self, t0, t1, frames, status):
+        self.llamadas += 1
+        self.presupuesto_ns = frames * 1_000_000_000 // self.fs
+        duracion = t1 - t0
+        self.duracion.registrar(duracion)
+        if duracion > self.presupuesto_ns:
+            self.excedidos += 1
+        if self._ultimo_ns is not None:
+            # Entre llamadas debería pasar exactamente un bloque
+            intervalo = t0 - self._ultimo_ns
+            self.jitter.registrar(abs(intervalo - self.presupuesto_ns))
+            if intervalo > self.intervalo_max_ns:
+                self.intervalo_max_ns = intervalo
+        self._ultimo_ns = t0
+        if status:
+            self.overflows += bool(getattr(status, "input_overflow", False))
+            self.underflows += bool(getattr(status, "output_underflow", False))
+
+    def nuevo_stream(self):
+        # El hueco entre dos streams no es jitter
+        self._ultimo_ns = None
+
+    def resumen(self):
+        return {
+            "nombre": self.nombre,
+            "llamadas": self.llamadas,
+            "presupuesto_ms": self.presupuesto_ns / 1e6,
+            "duracion_p50_ms": self.duracion.percentil(0.5) / 1e6,
+            "duracion_p99_ms": self.duracion.percentil(0.99) / 1e6,
+            "duracion_max_ms": self.duracion.maximo / 1e6,
+            "excedidos": self.excedidos,
+            "jitter_p99_ms": self.jitter.percentil(0.99) / 1e6,
+            "intervalo_max_ms": self.intervalo_max_ns / 1e6,
+            "overflows": self.overflows,
+            "underflows": self.underflows,
+        }
+
+    def _bucle_resumen(self):
+        while not self._detener.wait(self.intervalo_resumen):
+            # Sin llamadas nuevas (entre tramas) no se repite el resumen
+            if self.llamadas != self._llamadas_resumen:
+                self._llamadas_resumen = self.llamadas
+                try:
+                    self.al_resumir(self.resumen())
+                except Exception as e:
+                    print("[ERROR] Resumen de callbacks:", e)
+
+    def volcar(self, ruta):
+        datos = {**self.resumen(), "duracion_ns": self.duracion.a_dict(),
+                 "jitter_ns": self.jitter.a_dict()}
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump(datos, f, indent=2)
+        return datos
+
+    def detener(self):
+        self._detener.set()
+
+
+def texto_resumen(r):
+    return (f"⏱️ Callbacks: {r['llamadas']} | p50 {r['duracion_p50_ms']:.2f} ms "
+            f"p99 {r['duracion_p99_ms']:.2f} ms máx {r['duracion_max_ms']:.2f} ms "
+            f"(presupuesto {r['presupuesto_ms']:.0f} ms, excedidos {r['excedidos']}) | "
+            f"jitter p99 {r['jitter_p99_ms']:.1f} ms | xruns {r['overflows']}/{r['underflows']}")
+
+
+def anotar(r, ruta="callbacks.log"):
+    # Agrega el resumen al log y devuelve la línea (para imprimirla o mostrarla)
+    linea = texto_resumen(r)
+    with open(ruta, "a", encoding="utf-8") as f:
+        f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} [{r['nombre']}] {linea}\n")
+    return linea
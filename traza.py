@@ -0,0 +1,212 @@
+import atexit
+import collections
+import functools
+import json
+import os
+import threading
+import time
+
+# === Trazas por etapa (formato Chrome trace / Perfetto) ===
+# Cada etapa del transmisor y del receptor se envuelve en un tramo:
+#
+#     with traza.tramo("filtfilt", muestras=len(x)):
+#         ...
+#
+# Se guarda hilo, inicio, duración y los argumentos (tamaños de arreglos).
+# Desactivado, tramo() devuelve siempre el mismo contexto vacío: cuesta una
+# llamada y un if. Se activa con TRAZA=ruta.json o con --traza[=ruta] en los
+# scripts; el JSON se abre en https://ui.perfetto.dev o chrome://tracing.
+# --perfil[=ruta] corre cProfile sobre una sola trama. Con escuchar(), cada
+# tramo terminado se informa además a una función (p. ej. las métricas del
+# receptor) aunque no se esté guardando la traza.
+#
+# El receptor de consola es un bucle sin fin: la traza guarda sólo los
+# últimos TRAZA_MAX_EVENTOS eventos (defecto 100000, ~2.5 h a 10 bloques/s)
+# y los argumentos se resumen al registrarlos, sin retener los arreglos.
+
+MAX_EVENTOS = int(os.environ.get("TRAZA_MAX_EVENTOS", 100_000))
+
+_activo = False
+_ruta = None
+_eventos = collections.deque(maxlen=MAX_EVENTOS)
+_hilos = {}
+_oyentes = []
+_origen_ns = time.perf_counter_ns()
+
+_perfil_ruta = None
+_perfil_hecho = False
+
+
+class _Nulo:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULO = _Nulo()
+
+
+class _Tramo:
+    __slots__ = ("nombre", "args", "t0")
+
+    def __init__(self, nombre, args):
+        self.nombre = nombre
+        self.args = args
+
+    def __enter__(self):
+        self.t0 = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        t1 = time.perf_counter_ns()
+        for oyente in _oyentes:
+            oyente(self.nombre, (t1 - self.t0) / 1e9)
+        if not _activo:
+            return False
+        hilo = threading.get_ident()
+        if hilo not in _hilos:
+            _hilos[hilo] = threading.current_thread().name
+        # deque.append es atómico: sirve desde el hilo de audio sin lock
+        _eventos.append(("X", self.nombre, self.t0, t1, hilo, _resumir(self.args)))
+        return False
+
+
+def tramo(nombre, **args):
+    if not _activo and not _oyentes:
+        return _NULO
+    return _Tramo(nombre, args)
+
+
+def escuchar(oyente):
+    # oyente(nombre, segundos) al cerrar cada tramo, en el hilo que lo cerró
+    _oyentes.append(oyente)
+
+
+def instante(nombre, **args):
+    # Evento puntual (p. ej. "tono de inicio detectado")
+    if _activo:
+        t = time.perf_counter_ns()
+        hilo = threading.get_ident()
+        if hilo not in _hilos:
+            _hilos[hilo] = threading.current_thread().name
+        _eventos.append(("i", nombre, t, t, hilo, _resumir(args)))
+
+
+def trazar(nombre=None):
+    def decorador(funcion):
+        etiqueta = nombre or funcion.__name__
+
+        @functools.wraps(funcion)
+        def envuelta(*a, **kw):
+            if not _activo and not _oyentes:
+                return funcion(*a, **kw)
+            with _Tramo(etiqueta, {}):
+                return funcion(*a, **kw)
+        return envuelta
+    return decorador
+
+
+def activa():
+    return _activo
+
+
+def activar(ruta="traza.json"):
+    global _activo, _ruta
+    if not _activo:
+        atexit.register(exportar)
+    _activo = True
+    _ruta = ruta
+
+
+def _valor(v):
+    # Los arreglos se resumen a forma, tipo y bytes
+    if hasattr(v, "shape") and hasattr(v, "dtype"):
+        return {"forma": list(v.shape), "dtype": str(v.dtype), "bytes": int(v.nbytes)}
+    if isinstance(v, (int, float, str, bool)) or v is None:
+        return v
+    return str(v)
+
+
+def _resumir(args):
+    return {k: _valor(v) for k, v in args.items()} if args else args
+
+
+def exportar(ruta=None):
+    ruta = ruta or _ruta
+    if ruta is None:
+        return None
+    pid = os.getpid()
+    eventos = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": hilo,
+                "args": {"name": nombre}} for hilo, nombre in list(_hilos.items())]
+    # copy() en C no suelta el GIL: no choca con el hilo de audio
+    registrados = _eventos.copy()
+    for fase, nombre, t0, t1, hilo, args in registrados:
+        evento = {"name": nombre, "ph": fase, "pid": pid, "tid": hilo,
+                  "ts": (t0 - _origen_ns) / 1000, "args": args}
+        if fase == "X":
+            evento["dur"] = (t1 - t0) / 1000
+        else:
+            evento["s"] = "t"
+        eventos.append(evento)
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": eventos, "displayTimeUnit": "ms"}, f)
+    recortada = " (recortada: sólo los últimos)" if len(registrados) == _eventos.maxlen else ""
+    print(f"🧵 Traza: {len(registrados)} eventos{recortada} -> {ruta}")
+    return ruta
+
+
+# === cProfile de una sola trama ===
+def activar_perfil(ruta="perfil.prof"):
+    global _perfil_ruta
+    _perfil_ruta = ruta
+
+
+class _Perfil:
+    def __enter__(self):
+        import cProfile
+        self.perfil = cProfile.Profile()
+        self.perfil.enable()
+        return self
+
+    def __exit__(self, *exc):
+        global _perfil_hecho
+        import pstats
+        self.perfil.disable()
+        _perfil_hecho = True
+        self.perfil.dump_stats(_perfil_ruta)
+        print(f"📊 Perfil de la trama -> {_perfil_ruta} (snakeviz / python -m pstats)")
+        pstats.Stats(self.perfil).sort_stats("cumulative").print_stats(15)
+        return False
+
+
+def perfil_trama():
+    # Sólo la primera trama después de activar el perfil
+    if _perfil_ruta is None or _perfil_hecho:
+        return _NULO
+    return _Perfil()
+
+
+def perfilada(funcion):
+    # La primera llamada (una trama) corre bajo cProfile si --perfil está activo
+    @functools.wraps(funcion)
+    def envuelta(*a, **kw):
+        with perfil_trama():
+            return funcion(*a, **kw)
+    return envuelta
+
+
+def configurar(argv, nombre):
+    # --traza[=ruta] y --perfil[=ruta]; TRAZA=ruta también activa las trazas
+    for arg in argv:
+        if arg == "--traza" or arg.startswith("--traza="):
+            activar(arg.partition("=")[2] or f"traza_{nombre}.json")
+        elif arg == "--perfil" or arg.startswith("--perfil="):
+            activar_perfil(arg.partition("=")[2] or f"perfil_{nombre}.prof")
+
+
+if os.environ.get("TRAZA"):
+    activar(os.environ["TRAZA"])
@@ -0,0 +1,220 @@
+import atexit
+import os
+import pickle
+import queue
+import subprocess
+import sys
+import threading
+
+import numpy as np
+
+from multiprocessing import resource_tracker
+
+from render_pool import a_memoria_compartida, desde_memoria_compartida
+
+# === Ventanas de gráficas en otro proceso ===
+# El modulador ya no llama a plt.show() (bloqueante) en el hilo de Tk: las
+# señales se copian a memoria compartida y un proceso aparte, con su propio
+# bucle de eventos de matplotlib, abre las ventanas. La transmisión arranca
+# de inmediato y las gráficas aparecen en paralelo.
+#
+# MODULADOR_GRAFICAS=ventana (defecto) | png (guarda en graficas/) | no
+
+
+def figura_tiempo_frecuencia(plt, senal, fs, titulo):
+    from render_decimado import envolvente_min_max, espectro_agrupado, pixeles_eje
+    from espectro import psd_db
+
+    t = np.arange(len(senal)) / fs
+    fig = plt.figure(figsize=(12, 4))
+    ax = plt.subplot(1, 2, 1)
+    # Cada traza se reduce a su envolvente min/max por píxel del eje
+    px = pixeles_eje(ax)
+    if np.iscomplexobj(senal):
+        plt.plot(*envolvente_min_max(np.real(senal), t, px), label='Real')
+        plt.plot(*envolvente_min_max(np.imag(senal), t, px), label='Imag', alpha=0.5)
+        plt.legend()
+    else:
+        plt.plot(*envolvente_min_max(senal, t, px))
+    plt.title(f'{titulo} - Tiempo')
+    plt.xlabel('Tiempo [s]')
+    plt.ylabel('Amplitud')
+    plt.grid(True)
+
+    ax = plt.subplot(1, 2, 2)
+    # PSD promediada (Welch) de un lado: ya no hace falta la señal analítica
+    # ni recortar la magnitud
+    freqs, espectro = psd_db(senal, fs, fmax=20000, workers=-1)
+    plt.plot(*espectro_agrupado(freqs, espectro, pixeles_eje(ax)))
+    plt.title(f'{titulo} - Frecuencia (0–20 kHz)')
+    plt.xlabel('Frecuencia [Hz]')
+    plt.ylabel('PSD [dB/Hz]')
+    plt.xlim([0, 20000])
+    plt.ylim([np.max(espectro) - 100, np.max(espectro) + 5])
+    plt.grid(True)
+    plt.tight_layout()
+    return fig
+
+
+def _nombre_png(directorio, titulo):
+    base = "".join(c if c.isalnum() or c in "-_" else "_" for c in titulo)
+    i = 1
+    while os.path.exists(os.path.join(directorio, f"{base}_{i:03d}.png")):
+        i += 1
+    return os.path.join(directorio, f"{base}_{i:03d}.png")
+
+
+def _leer_mensajes(entrada, cola):
+    # Hilo lector: los mensajes llegan pickleados por stdin
+    while True:
+        try:
+            cola.put(pickle.load(entrada))
+        except (EOFError, pickle.UnpicklingError, OSError):
+            cola.put(None)
+            return
+
+
+def _bucle_graficas(cola, modo, directorio):
+    import matplotlib
+    if modo == "png":
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    if modo != "png":
+        plt.ion()
+
+    while True:
+        try:
+            # Con ventanas abiertas hay que seguir atendiendo sus eventos
+            mensaje = cola.get(timeout=0.05) if plt.get_fignums() else cola.get()
+        except queue.Empty:
+            plt.pause(0.05)
+            continue
+        if mensaje is None:
+            break
+
+        desc, fs, titulo = mensaje
+        shm, vista = desde_memoria_compartida(desc)
+        senal = vista.copy()
+        del vista
+        shm.close()
+        shm.unlink()
+
+        try:
+            fig = figura_tiempo_frecuencia(plt, senal, fs, titulo)
+            if modo == "png":
+                os.makedirs(directorio, exist_ok=True)
+                fig.savefig(_nombre_png(directorio, titulo))
+                plt.close(fig)
+            else:
+                fig.show()
+                plt.pause(0.001)
+        except Exception as e:
+            print(f"[ERROR] Gráfica '{titulo}':", e)
+
+    if modo != "png" and plt.get_fignums():
+        # Al cerrar el modulador, las ventanas abiertas quedan hasta que
+        # el usuario las cierre
+        plt.ioff()
+        plt.show()
+
+
+class ProcesoGraficas:
+    def __init__(self, modo=None, directorio="graficas"):
+        self.modo = modo or os.environ.get("MODULADOR_GRAFICAS", "ventana")
+        self.directorio = directorio
+        self.proceso = None
+        self._lock = threading.Lock()
+        self.enviadas = 0
+        self.descartadas = 0
+        self._atexit = False
+
+    def _arrancar(self):
+        # Intérprete nuevo: el hijo no hereda Tk ni re-ejecuta el script
+        # del modulador (que arma la GUI al importarse)
+        self.proceso = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), self.modo, self.directorio],
+            stdin=subprocess.PIPE)
+        if not self._atexit:
+            atexit.register(self.cerrar)
+            self._atexit = True
+
+    def _asegurar_con_lock(self):
+        if self.proceso is None or self.proceso.poll() is not None:
+            self._arrancar()
+
+    def _asegurar(self):
+        with self._lock:
+            self._asegurar_con_lock()
+
+    def precalentar(self):
+        # Abre el proceso antes de la primera gráfica: el hijo importa
+        # matplotlib mientras el usuario todavía no pidió nada
+        if self.modo != "no":
+            self._asegurar()
+
+    def _enviar(self, mensaje):
+        # Un solo lock para revisar/arrancar y escribir: otro hilo no puede
+        # dejar self.proceso en None entre medio
+        with self._lock:
+            self._asegurar_con_lock()
+            try:
+                pickle.dump(mensaje, self.proceso.stdin)
+                self.proceso.stdin.flush()
+            except ValueError:
+                # stdin ya cerrado por cerrar(): el proceso sigue mostrando
+                # lo que tiene, no se lo mata
+                raise
+            except OSError:
+                # El proceso murió: el próximo intento arranca otro
+                self.proceso.kill()
+                self.proceso = None
+                raise
+
+    def graficar(self, senal, fs, titulo):
+        # Una gráfica de diagnóstico nunca frena la transmisión: si el
+        # proceso de gráficas murió se reintenta una vez con uno nuevo y, si
+        # tampoco, la gráfica se descarta
+        if self.modo == "no":
+            return
+        shm, desc = a_memoria_compartida(np.asarray(senal))
+        shm.close()
+        error = None
+        for intento in range(2):
+            try:
+                self._enviar((desc, fs, titulo))
+                error = None
+                break
+            except OSError as e:
+                error = e
+            except ValueError as e:
+                # Ya cerrado: reintentar no sirve
+                error = e
+                break
+        if error is not None:
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+            self.descartadas += 1
+            print(f"[ERROR] Gráfica '{titulo}' descartada:", error)
+            return
+        # Ya enviada, el proceso de gráficas copia los datos y libera el
+        # segmento: aquí sólo se deja de registrar para que no se borre al
+        # salir (el tracker, sólo en POSIX, lo anotó con la barra inicial)
+        if os.name == "posix":
+            resource_tracker.unregister("/" + shm.name, "shared_memory")
+        self.enviadas += 1
+
+    def cerrar(self):
+        with self._lock:
+            if self.proceso is not None and self.proceso.poll() is None:
+                try:
+                    self.proceso.stdin.close()
+                except OSError:
+                    pass
+
+
+if __name__ == '__main__':
+    cola = queue.Queue()
+    threading.Thread(target=_leer_mensajes, args=(sys.stdin.buffer, cola), daemon=True).start()
+    _bucle_graficas(cola, sys.argv[1], sys.argv[2])
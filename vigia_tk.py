@@ -0,0 +1,166 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# === Vigía del bucle de eventos de Tk ===
+# Un sondeo con root.after() cada `intervalo_ms` mide cuánto tarde llega
+# respecto de lo programado: ese atraso es el tiempo que la GUI estuvo sin
+# responder. Los atrasos se acumulan en un histograma (escala 1-2-5) y cada
+# bloqueo mayor a `umbral_ms` se atribuye a la operación que estaba en curso
+# (marcada con operacion() o envolver()). Con VIGIA_TK_JSON=ruta.json el
+# resumen se exporta al salir.
+
+BORDES_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+MAX_BLOQUEOS = 1000
+
+
+def _cubeta(lag_ms):
+    for i, borde in enumerate(BORDES_MS):
+        if lag_ms < borde:
+            return i
+    return len(BORDES_MS)
+
+
+def _etiquetas():
+    etiquetas = [f"<{BORDES_MS[0]}"]
+    etiquetas += [f"{a}-{b}" for a, b in zip(BORDES_MS, BORDES_MS[1:])]
+    etiquetas.append(f">={BORDES_MS[-1]}")
+    return etiquetas
+
+
+def _percentil(conteos, q, maximo):
+    # Borde superior de la cubeta donde cae el percentil q (en la última
+    # cubeta, abierta, se informa el máximo observado)
+    total = sum(conteos)
+    if total == 0:
+        return 0.0
+    acumulado = 0
+    for i, c in enumerate(conteos):
+        acumulado += c
+        if acumulado >= q * total:
+            return float(BORDES_MS[i]) if i < len(BORDES_MS) else round(maximo, 2)
+    return round(maximo, 2)
+
+
+class VigiaLag:
+    def __init__(self, root, nombre="gui", intervalo_ms=20, umbral_ms=50, archivo_json=None):
+        self.root = root
+        self.nombre = nombre
+        self.intervalo_ms = intervalo_ms
+        self.umbral_ms = umbral_ms
+        self.archivo_json = archivo_json or os.environ.get("VIGIA_TK_JSON")
+        self.histograma = [0] * (len(BORDES_MS) + 1)
+        self.sondeos = 0
+        self.lag_max_ms = 0.0
+        self.operaciones = {}
+        self.bloqueos = deque(maxlen=MAX_BLOQUEOS)
+        self._pila = {}
+        self._terminadas = []
+        self._lock = threading.Lock()
+        # Sólo lo que corre en el hilo de Tk puede bloquear el bucle
+        self._hilo_tk = threading.get_ident()
+        self._inicio = time.perf_counter()
+        self._activo = True
+        self._esperado = time.perf_counter() + intervalo_ms / 1000
+        root.after(intervalo_ms, self._sondear)
+        if self.archivo_json:
+            atexit.register(self.exportar_json, self.archivo_json)
+
+    @contextmanager
+    def operacion(self, nombre):
+        # Las operaciones anidadas se registran con su camino: "ISB > reproducir"
+        hilo = threading.get_ident()
+        with self._lock:
+            pila = self._pila.setdefault(hilo, [])
+            pila.append(nombre)
+            camino = " > ".join(pila)
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            duracion = (time.perf_counter() - t0) * 1000
+            with self._lock:
+                pila.pop()
+                stats = self.operaciones.setdefault(
+                    camino, {"veces": 0, "total_ms": 0.0, "max_ms": 0.0,
+                             "bloqueos": 0, "histograma": [0] * (len(BORDES_MS) + 1)})
+                stats["veces"] += 1
+                stats["total_ms"] += duracion
+                stats["max_ms"] = max(stats["max_ms"], duracion)
+                if hilo == self._hilo_tk:
+                    self._terminadas.append((duracion, camino))
+
+    def envolver(self, nombre, funcion):
+        def envuelta(*args, **kwargs):
+            with self.operacion(nombre):
+                return funcion(*args, **kwargs)
+        return envuelta
+
+    def _en_curso(self):
+        # Lo que terminó en el hilo de Tk desde el último sondeo (la más
+        # larga) o, si no, lo que sigue abierto en él
+        if self._terminadas:
+            return max(self._terminadas)[1]
+        pila = self._pila.get(self._hilo_tk)
+        return " > ".join(pila) if pila else None
+
+    def _sondear(self):
+        ahora = time.perf_counter()
+        lag = max((ahora - self._esperado) * 1000, 0.0)
+        with self._lock:
+            self.sondeos += 1
+            cubeta = _cubeta(lag)
+            self.histograma[cubeta] += 1
+            self.lag_max_ms = max(self.lag_max_ms, lag)
+            operacion = self._en_curso()
+            if operacion is not None and operacion in self.operaciones:
+                self.operaciones[operacion]["histograma"][cubeta] += 1
+            if lag >= self.umbral_ms:
+                if operacion is not None and operacion in self.operaciones:
+                    self.operaciones[operacion]["bloqueos"] += 1
+                self.bloqueos.append({"t": round(ahora - self._inicio, 3),
+                                      "lag_ms": round(lag, 1),
+                                      "operacion": operacion or "(desconocida)"})
+            self._terminadas = []
+        if self._activo:
+            self._esperado = time.perf_counter() + self.intervalo_ms / 1000
+            self.root.after(self.intervalo_ms, self._sondear)
+
+    def detener(self):
+        self._activo = False
+
+    def resumen(self):
+        etiquetas = _etiquetas()
+        with self._lock:
+            operaciones = {
+                camino: {**{k: round(v, 2) if isinstance(v, float) else v
+                            for k, v in stats.items() if k != "histograma"},
+                         "histograma": dict(zip(etiquetas, stats["histograma"]))}
+                for camino, stats in self.operaciones.items()
+            }
+            return {
+                "gui": self.nombre,
+                "intervalo_ms": self.intervalo_ms,
+                "umbral_ms": self.umbral_ms,
+                "duracion_s": round(time.perf_counter() - self._inicio, 3),
+                "sondeos": self.sondeos,
+                "lag_p50_ms": _percentil(self.histograma, 0.5, self.lag_max_ms),
+                "lag_p95_ms": _percentil(self.histograma, 0.95, self.lag_max_ms),
+                "lag_p99_ms": _percentil(self.histograma, 0.99, self.lag_max_ms),
+                "lag_max_ms": round(self.lag_max_ms, 2),
+                "histograma": dict(zip(etiquetas, self.histograma)),
+                "operaciones": operaciones,
+                "bloqueos": list(self.bloqueos),
+            }
+
+    def exportar_json(self, ruta):
+        resumen = self.resumen()
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump(resumen, f, indent=2, ensure_ascii=False)
+        print(f"⏱️ Lag de {self.nombre}: p95 < {resumen['lag_p95_ms']:g} ms, "
+              f"máx {resumen['lag_max_ms']:.0f} ms, {len(resumen['bloqueos'])} bloqueos -> {ruta}")
+        return resumen